@@ -5,27 +5,140 @@ This provides a REST API for browsing PRs stored in Supabase.
 The React frontend will consume these endpoints.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+import httpx
+import psycopg2
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
+from classifier.llm_client import BASE_URLS
 from utils.config_loader import load_config
 from utils.logger import setup_logger
-from storage.supabase_client import SupabaseClient
+from storage.supabase_singleton import get_supabase
 
 logger = setup_logger(__name__)
 
-# Load config and initialize Supabase client
+# Load config and get the shared Supabase client
 config = load_config()
-supabase = SupabaseClient(
-    config.credentials.supabase_url,
-    config.credentials.supabase_key
+supabase = get_supabase()
+
+# Route handlers are sync and call the blocking Supabase client, so FastAPI runs
+# each one in anyio's worker threadpool. The default limit of 40 threads caps the
+# number of in-flight Supabase/LLM calls; raise it so slow requests don't queue
+# behind each other.
+API_THREADPOOL_SIZE = 100
+
+# Shared connection pool for LLM API calls (issue generation). Reusing it keeps
+# TLS connections to the provider warm instead of handshaking per request.
+# Sized by LLM_MAX_CONNECTIONS to match what the provider tier allows.
+LLM_HTTP_LIMITS = httpx.Limits(
+    max_connections=config.credentials.llm_max_connections,
+    max_keepalive_connections=config.credentials.llm_max_connections
 )
+# Long read timeout: a full issue can take well over a minute to generate
+LLM_HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+
+# Most common /api/prs query shape (repo filter, merged_at order, one page).
+# Checked once at startup so a missing/dropped index shows up in the logs.
+PR_LIST_EXPLAIN_SQL = """
+EXPLAIN SELECT id FROM pull_requests
+WHERE repo = %s
+ORDER BY merged_at, id
+LIMIT 50;
+"""
+
+# Below this many rows Postgres prefers a seq scan regardless of indexes
+PLAN_CHECK_MIN_ROWS = 10000
+
+_plan_checked = False
+
+
+def _check_pr_list_plan(database_url: str) -> None:
+    """
+    Warn if the PR list query would sequentially scan pull_requests.
+
+    Needs DATABASE_URL (direct Postgres access); PostgREST doesn't expose
+    EXPLAIN by default. Failures are logged and never block startup.
+    """
+    try:
+        conn = psycopg2.connect(database_url, connect_timeout=5)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT reltuples FROM pg_class WHERE relname = 'pull_requests';")
+            row = cursor.fetchone()
+            if not row or row[0] < PLAN_CHECK_MIN_ROWS:
+                return
+            cursor.execute(PR_LIST_EXPLAIN_SQL, ("owner/repo",))
+            plan = "\n".join(line for (line,) in cursor.fetchall())
+            if "Seq Scan on pull_requests" in plan:
+                logger.warning(
+                    "PR list query plan uses a sequential scan on pull_requests. "
+                    "Run setup/migrations/002_add_pr_list_indexes.py.\n" + plan
+                )
+            else:
+                logger.info("PR list query plan uses an index")
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"Skipping PR list query plan check: {e}")
+
+
+async def _prewarm_llm_connection(client: httpx.AsyncClient) -> None:
+    """
+    Open a connection to the LLM provider ahead of the first issue generation.
+
+    The TLS handshake then happens at startup instead of on a user's request;
+    the connection stays in the pool's keep-alive set. Any response (even an
+    error status) does the job, and failures are only logged.
+    """
+    try:
+        await client.head(BASE_URLS[config.credentials.llm_provider])
+        logger.info("LLM provider connection pre-warmed")
+    except Exception as e:
+        logger.debug(f"Skipping LLM connection pre-warm: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Configure process-wide resources on startup and release them on shutdown."""
+    global _plan_checked
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = API_THREADPOOL_SIZE
+    logger.info(f"Worker threadpool size set to {API_THREADPOOL_SIZE}")
+
+    if config.credentials.database_url and not _plan_checked:
+        _plan_checked = True
+        await anyio.to_thread.run_sync(_check_pr_list_plan, config.credentials.database_url)
+
+    app.state.llm_http_client = httpx.AsyncClient(limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT)
+    credentials = config.credentials
+    api_key = credentials.anthropic_api_key if credentials.llm_provider == "anthropic" else credentials.openai_api_key
+    prewarm = None
+    if credentials.llm_prewarm and api_key:
+        prewarm = asyncio.create_task(_prewarm_llm_connection(app.state.llm_http_client))
+    try:
+        yield
+    finally:
+        if prewarm is not None:
+            prewarm.cancel()
+        await app.state.llm_http_client.aclose()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="PR Explorer API",
     description="REST API for browsing GitHub PRs stored in Supabase",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson serializes dicts/lists (and datetimes) in C; much faster than the
+    # default json.dumps for 100-row PR pages
+    default_response_class=ORJSONResponse
 )
 
 # Enable CORS for both local development and production
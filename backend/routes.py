@@ -4,86 +4,343 @@ API routes for PR Explorer.
 Provides endpoints for listing and retrieving PR data from Supabase.
 """
 
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Optional, List, Dict, Any, Tuple
+from datetime import date, datetime, timedelta, timezone
+from threading import Lock
+from cachetools import TTLCache
+import orjson
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 
 from utils.config_loader import load_config
 from utils.logger import setup_logger
-from storage.supabase_client import SupabaseClient
-from classifier.context_builder import build_pr_context
-from classifier.prompt_template import CLASSIFICATION_PROMPT, ISSUE_GENERATION_PROMPT
+from storage.supabase_singleton import get_supabase
+from classifier.context_builder import build_classification_info, build_pr_context
+from classifier.prompt_template import (
+    CLASSIFICATION_PROMPT,
+    ISSUE_GENERATION_PROMPT,
+    build_classification_prompt,
+    build_issue_generation_prompt,
+)
 from classifier.llm_client import LLMClient
 
 logger = setup_logger(__name__)
 
-# Initialize Supabase client for routes
+# Shared config and Supabase client (same instances as backend/app.py)
 config = load_config()
-supabase = SupabaseClient(
-    config.credentials.supabase_url,
-    config.credentials.supabase_key
-)
+supabase = get_supabase()
 
 router = APIRouter(prefix="/api", tags=["prs"])
 
+# Columns returned by the PR list endpoint. The list view only renders a handful
+# of fields, so skip the large blobs (body, files, linked_issue, issue_comments,
+# reasoning, generated_issue); the detail endpoint still returns full rows.
+PR_LIST_COLUMNS = (
+    "id,repo,pr_number,title,merged_at,created_at,platform,repo_url,is_favorite,"
+    "onboarding_suitability,difficulty,task_clarity,is_reproducible,categories,classified_at"
+)
+
+# Short-lived cache of full PR rows keyed by (repo, pr_number).
+# The UI tends to re-open the same PR within seconds (detail view, context tab,
+# favorite toggle, generated issue), so this saves a PostgREST round-trip on
+# each of those hits. Every write made through this API invalidates its entry
+# (or replaces it with the row the write returned);
+# the TTL bounds staleness for writes made elsewhere (e.g. the classifier CLI).
+_PR_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=120)
+_PR_CACHE_LOCK = Lock()
 
-def _get_file_status_from_gitlab(file: Dict[str, Any]) -> str:
-    """Convert GitLab file flags to GitHub-style status."""
-    if file.get("new_file"):
-        return "added"
-    elif file.get("deleted_file"):
-        return "removed"
-    elif file.get("renamed_file"):
-        return "renamed"
-    else:
-        return "modified"
+# Striped locks so concurrent misses for the same PR make one Supabase call
+# instead of one each, without keeping a lock per PR around
+_PR_FETCH_LOCKS = [Lock() for _ in range(64)]
+
+
+def _get_pr_cached(repo: str, pr_number: int) -> Optional[Dict[str, Any]]:
+    """
+    Get a PR by repo and number, serving from the TTL cache when possible.
+
+    The returned dict is shared between requests; copy it before mutating.
+    Misses (PR not found) are not cached so newly ingested PRs show up immediately.
+    """
+    key = (repo, pr_number)
+    with _PR_CACHE_LOCK:
+        pr = _PR_CACHE.get(key)
+    if pr is not None:
+        return pr
+
+    with _PR_FETCH_LOCKS[hash(key) % len(_PR_FETCH_LOCKS)]:
+        # Another request may have fetched it while we waited
+        with _PR_CACHE_LOCK:
+            pr = _PR_CACHE.get(key)
+        if pr is not None:
+            return pr
+
+        pr = supabase.get_pr_by_number(repo, pr_number)
+        if pr:
+            with _PR_CACHE_LOCK:
+                _PR_CACHE[key] = pr
+    return pr
+
+
+def _replace_cached_pr(repo: str, pr_number: int, rows: List[Dict[str, Any]]) -> None:
+    """
+    Cache the row a write returned (UPDATE ... RETURNING the full row), so the
+    next read after e.g. a favorite toggle doesn't refetch it. Drops the
+    entry if the write matched no row.
+    """
+    key = (repo, pr_number)
+    with _PR_CACHE_LOCK:
+        if rows:
+            _PR_CACHE[key] = rows[0]
+        else:
+            _PR_CACHE.pop(key, None)
+
+
+# Built PR context keyed by (repo, pr_number). The debug and issue-generation
+# modals hit /llm_payload and /context back to back for the same PR; this lets
+# the second request skip build_pr_context as well as the database lookup.
+_PAYLOAD_CACHE: TTLCache = TTLCache(maxsize=256, ttl=60)
+_PAYLOAD_CACHE_LOCK = Lock()
+
+
+def _build_payload(repo: str, pr_number: int) -> Optional[Dict[str, Any]]:
+    """
+    Get a PR together with its LLM context, memoized per (repo, pr_number).
+
+    Returns:
+        {"pr": pr, "pr_context": str}, or None if the PR doesn't exist
+    """
+    key = (repo, pr_number)
+    with _PAYLOAD_CACHE_LOCK:
+        payload = _PAYLOAD_CACHE.get(key)
+    if payload is not None:
+        return payload
+
+    pr = _get_pr_cached(repo, pr_number)
+    if not pr:
+        return None
+
+    payload = {"pr": pr, "pr_context": build_pr_context(pr)}
+    with _PAYLOAD_CACHE_LOCK:
+        _PAYLOAD_CACHE[key] = payload
+    return payload
+
+
+# Repository dropdown list. It only changes when a new repo is ingested, so
+# repeated page loads are served from memory instead of calling the RPC.
+_REPOS_CACHE: TTLCache = TTLCache(maxsize=1, ttl=60)
+_REPOS_CACHE_LOCK = Lock()
+
+# Last fetched list, kept past the TTL so an expired entry is refreshed in
+# the background instead of making a page load wait for Supabase
+_REPOS_LAST: Dict[str, List[str]] = {}
+
+# Concurrent misses (and background refreshes) share one get_distinct_repos RPC call
+_REPOS_FETCH_LOCK = Lock()
+
+
+def _classification_info(pr: Dict[str, Any]) -> str:
+    """Classification summary for the issue generation prompt.
+
+    Uses the string rendered at classification time; rows classified before
+    the classification_info column existed are formatted on the fly.
+    """
+    return pr.get("classification_info") or build_classification_info(pr)
+
+
+@lru_cache(maxsize=4)
+def _get_llm_client(
+    provider: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    http_client: Optional[Any] = None
+) -> LLMClient:
+    """
+    Get a shared LLMClient for these settings.
+
+    Built once per (settings, connection pool) instead of per request, so the
+    API key lookup and SDK client setup stay off the hot path. The pool is part
+    of the key because each app lifespan creates (and closes) its own.
+    """
+    api_key = config.credentials.anthropic_api_key if provider == "anthropic" else config.credentials.openai_api_key
+    return LLMClient(
+        provider=provider,
+        model=model,
+        api_key=api_key,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        http_client=http_client
+    )
 
 
-def _count_additions_from_diff(diff: str) -> int:
-    """Count addition lines (starting with +) in a diff."""
-    if not diff:
-        return 0
-    return sum(1 for line in diff.split('\n') if line.startswith('+') and not line.startswith('+++'))
+def _encode_cursor(pr: Dict[str, Any]) -> str:
+    """Encode the (merged_at, id) sort key of a PR row as an opaque cursor."""
+    payload = json.dumps({"merged_at": pr["merged_at"], "id": pr["id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
 
 
-def _count_deletions_from_diff(diff: str) -> int:
-    """Count deletion lines (starting with -) in a diff."""
-    if not diff:
-        return 0
-    return sum(1 for line in diff.split('\n') if line.startswith('-') and not line.startswith('---'))
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by _encode_cursor. Raises 400 if it is malformed."""
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {"merged_at": str(decoded["merged_at"]), "id": int(decoded["id"])}
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: '{cursor}'")
+
+
+# The default issue prompt is a module constant, so its response body and ETag
+# are computed once at import. Clients revalidate with If-None-Match and get a
+# 304; the ETag changes whenever the template changes on deploy.
+_ISSUE_PROMPT_JSON = orjson.dumps({"prompt_template": ISSUE_GENERATION_PROMPT})
+_ISSUE_PROMPT_ETAG = f'"{hashlib.md5(_ISSUE_PROMPT_JSON).hexdigest()}"'
+_ISSUE_PROMPT_HEADERS = {
+    "ETag": _ISSUE_PROMPT_ETAG,
+    "Cache-Control": "public, max-age=3600",
+}
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match header covers the given ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+# Per-PR responses can change at any time (classification, favorite, issue
+# generation), so browsers must revalidate on every use
+_PR_CACHE_CONTROL = "private, no-cache"
+
+
+# Serialized per-PR responses keyed by (endpoint, repo, pr_number): the
+# cached objects they were rendered from, the body and its ETag. An entry is
+# reused only while those same objects are still cached (writes replace or
+# drop _PR_CACHE rows), so revalidating an unchanged PR skips serializing
+# its files and rebuilding its prompt.
+_RESPONSE_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=120)
+_RESPONSE_CACHE_LOCK = Lock()
+
+
+def _json_with_etag(
+    request: Request,
+    key: Tuple[Any, ...],
+    sources: Tuple[Any, ...],
+    build: Callable[[], Dict[str, Any]]
+) -> Response:
+    """
+    Serialize a response body and tag it with a content hash ETag.
 
+    build() makes the response data from `sources` (the cached row, and the
+    cached payload where used); its serialized body is memoized under `key`
+    for as long as the same source objects are served.
 
-def _count_changes_from_diff(diff: str) -> int:
-    """Count total changes (additions + deletions) in a diff."""
-    return _count_additions_from_diff(diff) + _count_deletions_from_diff(diff)
+    Returns 304 Not Modified with no body when the request's If-None-Match
+    already has this content, so re-opening an unchanged PR doesn't resend
+    its files and prompt.
+    """
+    with _RESPONSE_CACHE_LOCK:
+        entry = _RESPONSE_CACHE.get(key)
+    if entry is None or any(a is not b for a, b in zip(entry[0], sources)):
+        body = orjson.dumps(build())
+        entry = (sources, body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE[key] = entry
+    _, body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": _PR_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class PRListItem(BaseModel):
+    """One PR in the list endpoint's response (the PR_LIST_COLUMNS of a row)."""
+    id: int
+    repo: str
+    pr_number: int
+    title: str
+    merged_at: Optional[str] = None
+    created_at: Optional[str] = None
+    platform: Optional[str] = None
+    repo_url: Optional[str] = None
+    is_favorite: Optional[bool] = None
+    onboarding_suitability: Optional[str] = None
+    difficulty: Optional[str] = None
+    task_clarity: Optional[str] = None
+    is_reproducible: Optional[str] = None
+    categories: Optional[List[str]] = None
+    classified_at: Optional[str] = None
 
 
 class PRListResponse(BaseModel):
     """Response model for PR list endpoint."""
-    prs: List[Dict[str, Any]]
-    total: int
+    prs: List[PRListItem]
+    total: Optional[int]
     page: int
     per_page: int
+    next_cursor: Optional[str] = None
 
 
 class GenerateIssueRequest(BaseModel):
     """Request body for issue generation endpoint."""
     custom_prompt_template: Optional[str] = None
+    # Token budget for the generated issue (default: ISSUE_MAX_TOKENS)
+    max_tokens: Optional[int] = Field(default=None, ge=1, le=64000)
+
+
+class FavoriteUpdate(BaseModel):
+    """A single favorite status change."""
+    repo: str
+    pr_number: int
+    is_favorite: bool
+
+
+class FavoriteBatch(BaseModel):
+    """Request body for batch favorite endpoint."""
+    updates: List[FavoriteUpdate]
+
+
+class PRKey(BaseModel):
+    """Identifies a single PR."""
+    repo: str
+    pr_number: int
+
 
+class PRBatchRequest(BaseModel):
+    """Request body for batch PR lookup endpoint."""
+    items: List[PRKey]
 
-@router.get("/prs", response_model=PRListResponse)
+
+class FavoriteValue(BaseModel):
+    """Request body for setting a single PR's favorite status."""
+    value: bool
+
+
+# No response_model: the dict goes straight to orjson instead of being
+# re-validated and run through jsonable_encoder. PRListResponse still documents
+# the shape in OpenAPI.
+@router.get("/prs", responses={200: {"model": PRListResponse}})
 def list_prs(
     repo: Optional[str] = Query(None, description="Filter by repository (e.g., 'facebook/react')"),
     page: int = Query(1, ge=1, description="Page number (1-indexed)"),
     per_page: int = Query(50, ge=1, le=100, description="PRs per page (max 100)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor (preferred over page)"),
     cutoff_date: Optional[str] = Query(None, description="Filter PRs merged after this date (YYYY-MM-DD). Automatically adds 2-day buffer."),
     sort_order: str = Query("asc", pattern="^(asc|desc)$", description="Sort order by merged_at: 'asc' (oldest first, chronological) or 'desc' (newest first)"),
     is_favorite: Optional[bool] = Query(None, description="Filter by favorite status (true = only favorites, false = only non-favorites)"),
     onboarding_suitability: Optional[str] = Query(None, pattern="^(excellent|poor)$", description="Filter by onboarding suitability"),
     difficulty: Optional[str] = Query(None, pattern="^(trivial|easy|medium|hard)$", description="Filter by difficulty level"),
     task_clarity: Optional[str] = Query(None, pattern="^(clear|partial|poor)$", description="Filter by task clarity"),
-    is_reproducible: Optional[str] = Query(None, pattern="^(highly likely|maybe|unclear)$", description="Filter by reproducibility")
+    is_reproducible: Optional[str] = Query(None, pattern="^(highly likely|maybe|unclear)$", description="Filter by reproducibility"),
+    with_total: bool = Query(True, description="Count all matching PRs (ignored with a cursor, which never counts)")
 ):
     """
     List PRs with pagination and optional filtering.
@@ -95,6 +352,10 @@ def list_prs(
     - repo: Optional filter by repository (e.g., "facebook/react")
     - page: Page number (default: 1)
     - per_page: Number of PRs per page (default: 50, max: 100)
+    - cursor: Keyset cursor from a previous response's next_cursor. When set, page is
+              ignored and the next per_page rows after the cursor are returned. Each
+              cursor page is an index seek on (merged_at, id), so it stays fast at any
+              depth; prefer it over page for walking deep into a repo.
     - cutoff_date: Filter PRs merged after this date (YYYY-MM-DD format).
                    NOTE: Automatically adds 2-day buffer to prevent fork/PR overlap issues.
                    Example: cutoff_date=2024-06-15 filters PRs merged after 2024-06-17.
@@ -104,24 +365,28 @@ def list_prs(
     - difficulty: Filter by difficulty (trivial/easy/medium/hard)
     - task_clarity: Filter by clarity (clear/partial/poor)
     - is_reproducible: Filter by reproducibility (highly likely/maybe/unclear)
+    - with_total: Whether to count all matching PRs (default: true). The exact
+                  count scans every matching row. Cursor requests never count
+                  (the keyset predicate would make it the rows left after the
+                  cursor), so take the total from the first, cursorless page.
 
     Returns:
-    - prs: List of PR objects with classification data included (if available)
-    - total: Total count of PRs matching the filter
+    - prs: List of PR summaries (PR_LIST_COLUMNS only) with classification labels
+    - total: Total count of PRs matching the filter (null when with_total is false or a cursor is given)
     - page: Current page number
     - per_page: Number of PRs per page
+    - next_cursor: Cursor for the following page, or null if this is the last page
     """
     try:
         # Parse and validate cutoff_date if provided
         adjusted_cutoff_date = None
         if cutoff_date:
             try:
-                # Parse date string to datetime object
-                parsed_date = datetime.strptime(cutoff_date, "%Y-%m-%d")
-                # Add 2-day buffer to prevent fork/PR overlap
-                adjusted_date = parsed_date + timedelta(days=2)
-                # Format back to ISO 8601 string for Supabase query
-                adjusted_cutoff_date = adjusted_date.strftime("%Y-%m-%d")
+                # Parse ISO date string (C-implemented, no format string to interpret)
+                parsed_date = date.fromisoformat(cutoff_date)
+                # Add 2-day buffer to prevent fork/PR overlap, format back to
+                # ISO 8601 (YYYY-MM-DD) for the Supabase query
+                adjusted_cutoff_date = (parsed_date + timedelta(days=2)).isoformat()
                 logger.debug(f"Cutoff date: {cutoff_date} → adjusted to {adjusted_cutoff_date} (2-day buffer)")
             except ValueError:
                 raise HTTPException(
@@ -132,92 +397,101 @@ def list_prs(
         # Calculate offset for pagination
         offset = (page - 1) * per_page
 
-        # Build query for PRs
-        query = supabase.client.table("pull_requests").select("*")
-
-        # Apply repository filter if provided
-        if repo:
-            query = query.eq("repo", repo)
-
-        # Apply favorite filter if provided
-        if is_favorite is not None:
-            query = query.eq("is_favorite", is_favorite)
-        
-        # Apply classification filters (now directly on pull_requests table)
-        if onboarding_suitability:
-            query = query.eq("onboarding_suitability", onboarding_suitability)
-        if difficulty:
-            query = query.eq("difficulty", difficulty)
-        if task_clarity:
-            query = query.eq("task_clarity", task_clarity)
-        if is_reproducible:
-            query = query.eq("is_reproducible", is_reproducible)
+        # Build query for PRs. count="exact" makes PostgREST return the total
+        # number of matching rows alongside the page, so one request covers both.
+        # With a cursor it would only count the rows after it, so skip it there.
+        with_total = with_total and not cursor
+        if with_total:
+            query = supabase.client.table("pull_requests").select(PR_LIST_COLUMNS, count="exact")
+        else:
+            query = supabase.client.table("pull_requests").select(PR_LIST_COLUMNS)
+
+        # Apply equality filters (repo, favorite and classification columns);
+        # unset (None or empty) parameters don't filter
+        eq_filters = (
+            ("repo", repo),
+            ("is_favorite", is_favorite),
+            ("onboarding_suitability", onboarding_suitability),
+            ("difficulty", difficulty),
+            ("task_clarity", task_clarity),
+            ("is_reproducible", is_reproducible),
+        )
+        for column, value in eq_filters:
+            if value is not None and value != "":
+                query = query.eq(column, value)
 
         # Apply cutoff date filter if provided (with 2-day buffer already added)
         if adjusted_cutoff_date:
             query = query.gte("merged_at", adjusted_cutoff_date)
 
-        # Apply sort order (asc = chronological/oldest first, desc = newest first)
-        query = query.order("merged_at", desc=(sort_order == "desc"))
+        # Apply sort order (asc = chronological/oldest first, desc = newest first).
+        # id breaks ties between PRs merged at the same instant so cursors are stable.
+        descending = sort_order == "desc"
+        query = query.order("merged_at", desc=descending)
+        query = query.order("id", desc=descending)
         
-        # Apply pagination
-        query = query.range(offset, offset + per_page - 1)
+        # Apply pagination: keyset seek when a cursor is given, otherwise offset
+        if cursor:
+            cur = _decode_cursor(cursor)
+            op = "lt" if descending else "gt"
+            merged_at = f'"{cur["merged_at"]}"'  # quoted: timestamps contain reserved chars
+            query = query.or_(
+                f"merged_at.{op}.{merged_at},"
+                f"and(merged_at.eq.{merged_at},id.{op}.{cur['id']})"
+            )
+            # Fetch one extra row to know whether there is a next page
+            query = query.limit(per_page + 1)
+        elif with_total:
+            query = query.range(offset, offset + per_page - 1)
+        else:
+            # No total to compare against, so fetch one extra row here too
+            query = query.range(offset, offset + per_page)
 
         # Execute query
         result = query.execute()
         prs = result.data
+        total = (result.count or 0) if with_total else None
 
-        # Get total count for pagination
-        count_query = supabase.client.table("pull_requests").select("*", count="exact", head=True)
-        
-        # Apply same filters to count query
-        if repo:
-            count_query = count_query.eq("repo", repo)
-        if is_favorite is not None:
-            count_query = count_query.eq("is_favorite", is_favorite)
-        if onboarding_suitability:
-            count_query = count_query.eq("onboarding_suitability", onboarding_suitability)
-        if difficulty:
-            count_query = count_query.eq("difficulty", difficulty)
-        if task_clarity:
-            count_query = count_query.eq("task_clarity", task_clarity)
-        if is_reproducible:
-            count_query = count_query.eq("is_reproducible", is_reproducible)
-        if adjusted_cutoff_date:
-            count_query = count_query.gte("merged_at", adjusted_cutoff_date)
-        
-        count_result = count_query.execute()
-        total = count_result.count or 0
-
-        # Build log message with filters
-        filters_log = []
-        if repo:
-            filters_log.append(f"repo={repo}")
-        if is_favorite is not None:
-            filters_log.append(f"favorite={is_favorite}")
-        if cutoff_date:
-            filters_log.append(f"cutoff={cutoff_date} (adjusted={adjusted_cutoff_date})")
-        if sort_order != "desc":
-            filters_log.append(f"sort={sort_order}")
-        if onboarding_suitability:
-            filters_log.append(f"suitability={onboarding_suitability}")
-        if difficulty:
-            filters_log.append(f"difficulty={difficulty}")
-        if task_clarity:
-            filters_log.append(f"clarity={task_clarity}")
-        if is_reproducible:
-            filters_log.append(f"reproducible={is_reproducible}")
-        filters_str = f" with filters: {', '.join(filters_log)}" if filters_log else ""
-
-        logger.info(
-            f"Listed {len(prs)} PRs (page {page}, per_page {per_page}, total {total}){filters_str}"
-        )
+        if cursor or not with_total:
+            has_more = len(prs) > per_page
+            prs = prs[:per_page]
+        else:
+            has_more = offset + len(prs) < total
+        next_cursor = _encode_cursor(prs[-1]) if has_more and prs else None
+
+        # Build log message with filters (skipped entirely when INFO is disabled)
+        if logger.isEnabledFor(logging.INFO):
+            filters_log = []
+            if repo:
+                filters_log.append(f"repo={repo}")
+            if is_favorite is not None:
+                filters_log.append(f"favorite={is_favorite}")
+            if cutoff_date:
+                filters_log.append(f"cutoff={cutoff_date} (adjusted={adjusted_cutoff_date})")
+            if sort_order != "desc":
+                filters_log.append(f"sort={sort_order}")
+            if onboarding_suitability:
+                filters_log.append(f"suitability={onboarding_suitability}")
+            if difficulty:
+                filters_log.append(f"difficulty={difficulty}")
+            if task_clarity:
+                filters_log.append(f"clarity={task_clarity}")
+            if is_reproducible:
+                filters_log.append(f"reproducible={is_reproducible}")
+            if cursor:
+                filters_log.append("cursor")
+            filters_str = f" with filters: {', '.join(filters_log)}" if filters_log else ""
+
+            logger.info(
+                f"Listed {len(prs)} PRs (page {page}, per_page {per_page}, total {total}){filters_str}"
+            )
 
         return {
             "prs": prs,
             "total": total,
             "page": page,
-            "per_page": per_page
+            "per_page": per_page,
+            "next_cursor": next_cursor
         }
 
     except HTTPException:
@@ -228,11 +502,64 @@ def list_prs(
         raise HTTPException(status_code=500, detail=f"Failed to list PRs: {str(e)}")
 
 
+@router.get("/prs.ndjson")
+def list_prs_ndjson(
+    repo: Optional[str] = Query(None, description="Filter by repository (e.g., 'facebook/react')"),
+    page: int = Query(1, ge=1, description="Page number (1-indexed)"),
+    per_page: int = Query(50, ge=1, le=100, description="PRs per page (max 100)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor (preferred over page)"),
+    cutoff_date: Optional[str] = Query(None, description="Filter PRs merged after this date (YYYY-MM-DD). Automatically adds 2-day buffer."),
+    sort_order: str = Query("asc", pattern="^(asc|desc)$", description="Sort order by merged_at: 'asc' (oldest first, chronological) or 'desc' (newest first)"),
+    is_favorite: Optional[bool] = Query(None, description="Filter by favorite status (true = only favorites, false = only non-favorites)"),
+    onboarding_suitability: Optional[str] = Query(None, pattern="^(excellent|poor)$", description="Filter by onboarding suitability"),
+    difficulty: Optional[str] = Query(None, pattern="^(trivial|easy|medium|hard)$", description="Filter by difficulty level"),
+    task_clarity: Optional[str] = Query(None, pattern="^(clear|partial|poor)$", description="Filter by task clarity"),
+    is_reproducible: Optional[str] = Query(None, pattern="^(highly likely|maybe|unclear)$", description="Filter by reproducibility"),
+    with_total: bool = Query(True, description="Count all matching PRs (ignored with a cursor, which never counts)")
+):
+    """
+    List PRs as newline-delimited JSON (NDJSON).
+
+    Same query parameters and filtering as GET /prs. Instead of one JSON
+    document, the response streams one JSON object per line so clients can
+    start rendering rows before the whole page has arrived:
+
+    - First line: {"total", "page", "per_page", "next_cursor"}
+    - Each following line: one PR object
+    """
+    result = list_prs(
+        repo=repo,
+        page=page,
+        per_page=per_page,
+        cursor=cursor,
+        cutoff_date=cutoff_date,
+        sort_order=sort_order,
+        is_favorite=is_favorite,
+        onboarding_suitability=onboarding_suitability,
+        difficulty=difficulty,
+        task_clarity=task_clarity,
+        is_reproducible=is_reproducible,
+        with_total=with_total
+    )
+
+    def generate():
+        yield orjson.dumps({
+            "total": result["total"],
+            "page": result["page"],
+            "per_page": result["per_page"],
+            "next_cursor": result["next_cursor"]
+        }) + b"\n"
+        for pr in result["prs"]:
+            yield orjson.dumps(pr) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 # NOTE: More specific routes (with /llm_payload, /favorite) must come BEFORE
 # the general /prs/{repo:path}/{pr_number} route to avoid path conflicts
 
 @router.get("/prs/{repo:path}/{pr_number}/llm_payload")
-def get_llm_payload(repo: str, pr_number: int):
+def get_llm_payload(repo: str, pr_number: int, request: Request):
     """
     Reconstruct the exact LLM payload that was used to classify this PR.
 
@@ -248,6 +575,9 @@ def get_llm_payload(repo: str, pr_number: int):
     - full_prompt: The complete prompt sent to the LLM (context + template)
     - prompt_template: The classification prompt template used
 
+    Sent with a content hash ETag; a matching If-None-Match returns 304
+    Not Modified with no body.
+
     Raises:
     - 404: If PR is not found
 
@@ -256,26 +586,24 @@ def get_llm_payload(repo: str, pr_number: int):
     why the LLM made a particular classification decision.
     """
     try:
-        # Get the PR
-        pr = supabase.get_pr_by_number(repo, pr_number)
+        # Get the PR and its context (same build_pr_context the classifier uses)
+        payload = _build_payload(repo, pr_number)
 
-        if not pr:
+        if not payload:
             logger.warning(f"PR not found for LLM payload: {repo}#{pr_number}")
             raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
 
-        # Build the PR context using the same function the classifier uses
-        pr_context = build_pr_context(pr)
-
-        # Build the full prompt by inserting context into template
-        full_prompt = CLASSIFICATION_PROMPT.format(pr_context=pr_context)
+        def build():
+            # Build the full prompt by inserting context into template
+            return {
+                "pr_context": payload["pr_context"],
+                "full_prompt": build_classification_prompt(payload["pr_context"]),
+                "prompt_template": CLASSIFICATION_PROMPT
+            }
 
         logger.info(f"Generated LLM payload for {repo}#{pr_number}")
 
-        return {
-            "pr_context": pr_context,
-            "full_prompt": full_prompt,
-            "prompt_template": CLASSIFICATION_PROMPT
-        }
+        return _json_with_etag(request, ("llm_payload", repo, pr_number), (payload,), build)
 
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -285,6 +613,46 @@ def get_llm_payload(repo: str, pr_number: int):
         raise HTTPException(status_code=500, detail=f"Failed to generate LLM payload: {str(e)}")
 
 
+@router.get("/prs/{repo:path}/{pr_number}/files")
+def get_pr_files(repo: str, pr_number: int, request: Request):
+    """
+    Get a PR's changed files including their diffs.
+
+    GET /prs/{repo}/{pr_number} leaves the diffs out to keep the detail
+    response small; this returns the stored files unchanged.
+
+    Path Parameters:
+    - repo: Repository name (e.g., "facebook/react")
+    - pr_number: PR number
+
+    Returns:
+    - files: Stored files ({"files": [...], "summary": {...}}), or null if not enriched yet
+
+    Sent with a content hash ETag; a matching If-None-Match returns 304
+    Not Modified with no body.
+
+    Raises:
+    - 404: If PR is not found
+    """
+    try:
+        pr = _get_pr_cached(repo, pr_number)
+
+        if not pr:
+            logger.warning(f"PR not found for files: {repo}#{pr_number}")
+            raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
+
+        return _json_with_etag(
+            request, ("files", repo, pr_number), (pr,), lambda: {"files": pr.get("files")}
+        )
+
+    except HTTPException:
+        # Re-raise HTTP exceptions as-is
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get files for {repo}#{pr_number}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get PR files: {str(e)}")
+
+
 @router.get("/prs/{repo:path}/{pr_number}/context")
 def get_pr_context(repo: str, pr_number: int):
     """
@@ -308,31 +676,15 @@ def get_pr_context(repo: str, pr_number: int):
     Classification is optional - issue generation can work without it.
     """
     try:
-        # Fetch PR from database
-        pr = supabase.get_pr_by_number(repo, pr_number)
+        # Fetch PR and its context (same build_pr_context used in classification)
+        payload = _build_payload(repo, pr_number)
         
-        if not pr:
+        if not payload:
             logger.warning(f"PR not found for context: {repo}#{pr_number}")
             raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
         
-        # Build PR context using the same function used in classification
-        pr_context = build_pr_context(pr)
-        
-        # Format classification info if available
-        classification_info = ""
-        if pr.get("classified_at"):
-            # Classification exists - format it
-            classification_info = f"""Difficulty: {pr.get('difficulty', 'Unknown')}
-Task Clarity: {pr.get('task_clarity', 'Unknown')}
-Onboarding Suitability: {pr.get('onboarding_suitability', 'Unknown')}
-Is Reproducible: {pr.get('is_reproducible', 'Unknown')}
-Categories: {', '.join(pr.get('categories', []))}
-Concepts Taught: {', '.join(pr.get('concepts_taught', []))}
-Prerequisites: {', '.join(pr.get('prerequisites', []))}
-Reasoning: {pr.get('reasoning', 'N/A')}"""
-        else:
-            # No classification - that's okay
-            classification_info = "No classification available"
+        pr_context = payload["pr_context"]
+        classification_info = _classification_info(payload["pr"])
         
         logger.info(f"Generated PR context for {repo}#{pr_number}")
         
@@ -349,8 +701,55 @@ Reasoning: {pr.get('reasoning', 'N/A')}"""
         raise HTTPException(status_code=500, detail=f"Failed to generate PR context: {str(e)}")
 
 
+@router.get("/prs/{repo:path}/{pr_number}/bundle")
+def get_pr_bundle(repo: str, pr_number: int):
+    """
+    Get the LLM payload and issue generation context for a PR in one request.
+
+    Combines /llm_payload and /context so a modal that needs both can fetch
+    once; the PR lookup and build_pr_context run a single time.
+
+    Path Parameters:
+    - repo: Repository name (e.g., "facebook/react")
+    - pr_number: PR number
+
+    Returns:
+    - pr_context: Formatted PR context (metadata, files, issue, comments)
+    - full_prompt: The complete classification prompt (context + template)
+    - prompt_template: The classification prompt template used
+    - classification_info: Formatted classification data or "No classification available"
+
+    Raises:
+    - 404: If PR is not found
+    """
+    try:
+        payload = _build_payload(repo, pr_number)
+
+        if not payload:
+            logger.warning(f"PR not found for bundle: {repo}#{pr_number}")
+            raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
+
+        pr_context = payload["pr_context"]
+
+        logger.info(f"Generated PR bundle for {repo}#{pr_number}")
+
+        return {
+            "pr_context": pr_context,
+            "full_prompt": build_classification_prompt(pr_context),
+            "prompt_template": CLASSIFICATION_PROMPT,
+            "classification_info": _classification_info(payload["pr"])
+        }
+
+    except HTTPException:
+        # Re-raise HTTP exceptions as-is
+        raise
+    except Exception as e:
+        logger.error(f"Failed to generate PR bundle for {repo}#{pr_number}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate PR bundle: {str(e)}")
+
+
 @router.get("/prompts/issue-generation")
-def get_issue_generation_prompt():
+def get_issue_generation_prompt(request: Request):
     """
     Get the default issue generation prompt template.
     
@@ -361,63 +760,237 @@ def get_issue_generation_prompt():
     Returns:
     - prompt_template: The default issue generation prompt template string
     
+    The pre-serialized body is sent with an ETag and Cache-Control header;
+    a matching If-None-Match returns 304 Not Modified with no body.
+    
     Note:
     The template contains placeholders {pr_context} and {classification_info}
     that should be filled in before sending to the LLM.
     """
+    if _etag_matches(request, _ISSUE_PROMPT_ETAG):
+        return Response(status_code=304, headers=_ISSUE_PROMPT_HEADERS)
+
+    logger.debug("Retrieved default issue generation prompt template")
+    return Response(
+        content=_ISSUE_PROMPT_JSON,
+        media_type="application/json",
+        headers=_ISSUE_PROMPT_HEADERS
+    )
+
+
+@router.post("/prs/batch")
+def get_prs_batch(batch: PRBatchRequest):
+    """
+    Get several full PRs at once.
+
+    Serves what it can from the PR cache and fetches the rest with one query
+    per repository, instead of one GET /prs/{repo}/{pr_number} round-trip per
+    PR. llm_payload is omitted.
+
+    Request Body:
+    - items: List of {repo, pr_number}
+
+    Returns:
+    - prs: PR objects keyed by "repo#pr_number"
+    - not_found: Items whose PR doesn't exist
+    """
     try:
-        logger.info("Retrieved default issue generation prompt template")
-        
-        return {
-            "prompt_template": ISSUE_GENERATION_PROMPT
+        keys = list(dict.fromkeys((item.repo, item.pr_number) for item in batch.items))
+
+        # 1. Cache hits
+        found: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        missing_by_repo: Dict[str, List[int]] = {}
+        with _PR_CACHE_LOCK:
+            for key in keys:
+                pr = _PR_CACHE.get(key)
+                if pr is not None:
+                    found[key] = pr
+                else:
+                    missing_by_repo.setdefault(key[0], []).append(key[1])
+
+        # 2. One query per repo for the rest
+        for repo, numbers in missing_by_repo.items():
+            result = supabase.client.table("pull_requests").select("*").eq(
+                "repo", repo
+            ).in_("pr_number", numbers).execute()
+            with _PR_CACHE_LOCK:
+                for row in result.data:
+                    key = (row["repo"], row["pr_number"])
+                    _PR_CACHE[key] = row
+                    found[key] = row
+
+        prs = {
+            f"{repo}#{number}": found[(repo, number)]
+            for repo, number in keys
+            if (repo, number) in found
         }
-    
+        not_found = [
+            {"repo": repo, "pr_number": number}
+            for repo, number in keys
+            if (repo, number) not in found
+        ]
+
+        logger.info(
+            f"Retrieved {len(prs)} PRs in batch "
+            f"({len(missing_by_repo)} queries, {len(not_found)} not found)"
+        )
+
+        return {"prs": prs, "not_found": not_found}
+
     except Exception as e:
-        logger.error(f"Failed to retrieve issue generation prompt: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve prompt template: {str(e)}")
+        logger.error(f"Failed to get PR batch: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get PRs: {str(e)}")
 
 
-@router.post("/prs/{repo:path}/{pr_number}/favorite")
-def toggle_favorite(repo: str, pr_number: int):
+@router.post("/prs/favorites")
+def update_favorites(batch: FavoriteBatch):
     """
-    Toggle the favorite status of a PR.
+    Set the favorite status of several PRs at once.
+
+    Resolves all (repo, pr_number) pairs to ids in one query, then issues at
+    most two updates (one per target value) instead of a read and a write per PR.
+    If the same PR appears more than once, the last update wins.
 
-    This endpoint toggles the `is_favorite` field for a PR between TRUE and FALSE.
-    It's idempotent - you can call it multiple times.
+    Request Body:
+    - updates: List of {repo, pr_number, is_favorite}
+
+    Returns:
+    - updated: Updated PR rows ({id, repo, pr_number, is_favorite})
+    - not_found: Updates whose PR doesn't exist
+    """
+    try:
+        # Last write wins for duplicate PRs in one batch
+        wanted = {(u.repo, u.pr_number): u.is_favorite for u in batch.updates}
+        if not wanted:
+            return {"updated": [], "not_found": []}
+
+        # 1. Resolve ids in one round-trip. in_() on repo and pr_number matches
+        # the cross product, so keep only the exact pairs requested.
+        repos = sorted({repo for repo, _ in wanted})
+        numbers = sorted({number for _, number in wanted})
+        result = supabase.client.table("pull_requests").select(
+            "id,repo,pr_number"
+        ).in_("repo", repos).in_("pr_number", numbers).execute()
+        ids_by_key = {
+            (row["repo"], row["pr_number"]): row["id"]
+            for row in result.data
+            if (row["repo"], row["pr_number"]) in wanted
+        }
+
+        # 2. One update per target value
+        ids_by_value: Dict[bool, List[int]] = {True: [], False: []}
+        for key, pr_id in ids_by_key.items():
+            ids_by_value[wanted[key]].append(pr_id)
+
+        updated = []
+        for value, ids in ids_by_value.items():
+            if not ids:
+                continue
+            update_result = supabase.client.table("pull_requests").update(
+                {"is_favorite": value}
+            ).in_("id", ids).execute()
+            updated.extend(
+                {key: row[key] for key in ("id", "repo", "pr_number", "is_favorite")}
+                for row in update_result.data
+            )
+
+        # Drop cached rows so the next read sees the new is_favorite
+        with _PR_CACHE_LOCK:
+            for key in ids_by_key:
+                _PR_CACHE.pop(key, None)
+
+        not_found = [
+            {"repo": repo, "pr_number": number}
+            for repo, number in wanted
+            if (repo, number) not in ids_by_key
+        ]
+
+        logger.info(f"Updated favorites for {len(updated)} PRs ({len(not_found)} not found)")
+
+        return {"updated": updated, "not_found": not_found}
+
+    except Exception as e:
+        logger.error(f"Failed to update favorites: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to update favorites: {str(e)}")
+
+
+@router.put("/prs/{repo:path}/{pr_number}/favorite")
+def set_favorite(repo: str, pr_number: int, body: FavoriteValue):
+    """
+    Set the favorite status of a PR to an explicit value.
+
+    Unlike the toggle endpoint this is idempotent: repeating the request
+    leaves the PR in the same state. It runs as a single conditional UPDATE,
+    so there is no read-then-write race between concurrent clients.
 
     Path Parameters:
     - repo: Repository name (e.g., "facebook/react")
     - pr_number: PR number
 
+    Body:
+    - value: New is_favorite value
+
     Returns:
-    - Updated PR object with new is_favorite value
+    - Updated PR object
 
     Raises:
     - 404: If PR is not found
     """
     try:
-        # Get the PR
-        pr = supabase.get_pr_by_number(repo, pr_number)
+        result = supabase.client.table("pull_requests").update(
+            {"is_favorite": body.value}
+        ).eq("repo", repo).eq("pr_number", pr_number).execute()
 
-        if not pr:
-            logger.warning(f"PR not found for favorite toggle: {repo}#{pr_number}")
+        _replace_cached_pr(repo, pr_number, result.data)
+
+        if not result.data:
+            logger.warning(f"PR not found for favorite update: {repo}#{pr_number}")
             raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
 
-        # Toggle the favorite status
-        current_favorite = pr.get("is_favorite", False)
-        new_favorite = not current_favorite
+        logger.info(f"Set favorite for {repo}#{pr_number} to {body.value}")
+        return result.data[0]
 
-        # Update in database
-        result = supabase.client.table("pull_requests").update(
-            {"is_favorite": new_favorite}
-        ).eq("id", pr["id"]).execute()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to set favorite for {repo}#{pr_number}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to set favorite: {str(e)}")
+
+
+@router.post("/prs/{repo:path}/{pr_number}/favorite/toggle")
+@router.post("/prs/{repo:path}/{pr_number}/favorite")
+def toggle_favorite(repo: str, pr_number: int):
+    """
+    Atomically toggle the favorite status of a PR.
+
+    Flips is_favorite inside a single UPDATE via the `toggle_favorite` RPC
+    function (setup/migrations/004_add_rpc_functions.py), so a toggle is one
+    round-trip and concurrent toggles can't lose an update. Served on both
+    POST .../favorite/toggle and the older POST .../favorite.
+
+    Path Parameters:
+    - repo: Repository name (e.g., "facebook/react")
+    - pr_number: PR number
+
+    Returns:
+    - Updated PR object with new is_favorite value
+
+    Raises:
+    - 404: If PR is not found
+    """
+    try:
+        result = supabase.client.rpc(
+            "toggle_favorite", {"_repo": repo, "_pr": pr_number}
+        ).execute()
+
+        _replace_cached_pr(repo, pr_number, result.data)
 
         if not result.data:
-            raise HTTPException(status_code=500, detail="Failed to update favorite status")
+            logger.warning(f"PR not found for favorite toggle: {repo}#{pr_number}")
+            raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
 
         updated_pr = result.data[0]
-        logger.info(f"Toggled favorite for {repo}#{pr_number}: {current_favorite} → {new_favorite}")
-
+        logger.info(f"Toggled favorite for {repo}#{pr_number} → {updated_pr.get('is_favorite')}")
         return updated_pr
 
     except HTTPException:
@@ -432,31 +1005,256 @@ def toggle_favorite(repo: str, pr_number: int):
 # Issue Generation Endpoints (must come before general get_pr endpoint)
 # ============================================================================
 
-@router.get("/prompts/issue-generation")
-def get_default_issue_prompt():
+def _prepare_issue_prompt(
+    repo: str,
+    pr_number: int,
+    request: Optional[GenerateIssueRequest]
+) -> Tuple[Dict[str, Any], str]:
     """
-    Get the default issue generation prompt template.
-    
-    This allows the frontend to display and edit the prompt template
-    in the generation modal.
-    
+    Fetch a PR and fill the issue generation prompt for it.
+
     Returns:
-    - prompt_template: The default issue generation prompt template string
+        (pr, prompt)
+
+    Raises:
+        HTTPException 404 if the PR doesn't exist
+    """
+    # 1. Fetch PR with classification and its context. The issue modal loads
+    # /context first, so the context is usually already in the payload cache.
+    payload = _build_payload(repo, pr_number)
+    if not payload:
+        logger.warning(f"PR not found for issue generation: {repo}#{pr_number}")
+        raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
+    pr = payload["pr"]
+
+    # 2. Check if PR is classified (recommended but not required)
+    if not pr.get("classified_at"):
+        logger.warning(f"Generating issue for unclassified PR {repo}#{pr_number}")
+
+    # 3. Context from the same build_pr_context the classifier uses
+    pr_context = payload["pr_context"]
+
+    # 4. Format classification info (same text the /context preview shows)
+    classification_info = _classification_info(pr)
+
+    # 5-6. Fill template with context and classification, using the custom
+    # prompt template if provided, otherwise the pre-split default
+    if request and request.custom_prompt_template:
+        prompt = request.custom_prompt_template.format(
+            pr_context=pr_context,
+            classification_info=classification_info
+        )
+    else:
+        prompt = build_issue_generation_prompt(pr_context, classification_info)
+
+    return pr, prompt
+
+
+# Default token budget for generated issues. Most issues are a few KB of
+# markdown, and decoding time grows with the budget actually used; responses cut
+# off at the limit are retried once with double the budget (see LLMClient).
+ISSUE_MAX_TOKENS = 4096
+
+
+def _issue_max_tokens(request: Optional[GenerateIssueRequest]) -> int:
+    """Token budget for an issue generation request."""
+    if request and request.max_tokens:
+        return request.max_tokens
+    return ISSUE_MAX_TOKENS
+
+
+def _issue_llm_client(http_request: Request) -> LLMClient:
+    """Get the shared LLM client used for issue generation."""
+    return _get_llm_client(
+        config.credentials.llm_provider,
+        config.credentials.llm_model,
+        0.0,  # Use deterministic output for issue generation
+        ISSUE_MAX_TOKENS,
+        # Pool created in the app lifespan; absent if the router runs without it
+        getattr(http_request.app.state, "llm_http_client", None)
+    )
+
+
+def _save_generated_issue(
+    repo: str,
+    pr_number: int,
+    pr_id: int,
+    issue_markdown: str,
+    generated_at: datetime
+) -> None:
+    """Store a generated issue and drop cached copies of the PR."""
+    supabase.client.table("pull_requests").update({
+        "generated_issue": issue_markdown,
+        "issue_generated_at": generated_at.isoformat()
+    }).eq("id", pr_id).execute()
+
+    # Drop cached copies so /generated-issue and the detail view see it
+    with _PR_CACHE_LOCK:
+        _PR_CACHE.pop((repo, pr_number), None)
+    with _PAYLOAD_CACHE_LOCK:
+        _PAYLOAD_CACHE.pop((repo, pr_number), None)
+
+
+def _persist_generated_issue(
+    repo: str,
+    pr_number: int,
+    pr_id: int,
+    issue_markdown: str,
+    generated_at: datetime
+) -> None:
+    """
+    Save a generated issue after the response has been sent.
+
+    Runs as a background task, so a failed write is logged rather than
+    turned into an error response (the user already has the issue).
     """
     try:
-        logger.info("Retrieved default issue generation prompt")
-        return {
-            "prompt_template": ISSUE_GENERATION_PROMPT
-        }
+        _save_generated_issue(repo, pr_number, pr_id, issue_markdown, generated_at)
+        logger.info(f"Generated and saved issue for {repo}#{pr_number} ({len(issue_markdown)} chars)")
     except Exception as e:
-        logger.error(f"Failed to get issue prompt template: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get prompt template: {str(e)}")
+        logger.error(f"Failed to save generated issue for {repo}#{pr_number}: {e}")
+
+
+# Small LLM deltas are coalesced into fewer SSE events (see _coalesce_deltas)
+ISSUE_STREAM_FLUSH_CHARS = 8192
+ISSUE_STREAM_FLUSH_DELAY = 0.025
+
+
+async def _coalesce_deltas(
+    deltas: AsyncIterator[str],
+    max_chars: int = ISSUE_STREAM_FLUSH_CHARS,
+    max_delay: float = ISSUE_STREAM_FLUSH_DELAY
+) -> AsyncIterator[str]:
+    """
+    Merge a stream of small text deltas into fewer, larger chunks.
+
+    The LLM emits a delta every few tokens; sending each as its own event
+    costs an encode, a write and a re-render in the UI. The first delta is
+    sent immediately (it is what the user waits for); after that, deltas are
+    buffered until max_chars have accumulated or max_delay seconds have
+    passed since the oldest buffered one, so text is never held back longer
+    than that even if the LLM pauses.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = deltas.__aiter__()
+    buffer: List[str] = []
+    size = 0
+    deadline: Optional[float] = None
+    first = True
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+            if done:
+                try:
+                    delta = pending.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    pending = None
+                buffer.append(delta)
+                size += len(delta)
+                if not first and size < max_chars:
+                    if deadline is None:
+                        deadline = loop.time() + max_delay
+                    continue
+
+            # First delta, full buffer, or deadline passed while waiting
+            first = False
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+            deadline = None
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+    if buffer:
+        yield "".join(buffer)
+
+
+def _sse(data: Dict[str, Any], event: Optional[str] = None) -> bytes:
+    """Encode one server-sent event with a JSON payload."""
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+@router.post("/prs/{repo:path}/{pr_number}/generate-issue/stream")
+async def generate_issue_stream(
+    repo: str,
+    pr_number: int,
+    http_request: Request,
+    request: Optional[GenerateIssueRequest] = None
+):
+    """
+    Generate a student-facing issue, streaming the markdown as it's produced.
+
+    Same inputs as POST .../generate-issue, but the response is a
+    text/event-stream so the UI can render the issue while the LLM is still
+    writing it. The finished issue is saved after the last event is sent.
+
+    Events:
+    - (default) data: {"delta": "..."}  - next chunk of markdown
+    - done      data: {"generated_at": "..."}  - generation finished
+    - error     data: {"detail": "..."}  - generation failed (nothing is saved)
+
+    Raises:
+    - 404: If PR is not found (before the stream starts)
+    - 500: If the prompt can't be built (before the stream starts)
+    """
+    try:
+        # Supabase calls are blocking; keep them off the event loop
+        pr, prompt = await asyncio.to_thread(_prepare_issue_prompt, repo, pr_number, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to generate issue for {repo}#{pr_number}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate issue: {str(e)}")
+    llm_client = _issue_llm_client(http_request)
+    logger.info(f"Streaming issue for {repo}#{pr_number} using LLM")
+
+    parts: List[str] = []
+    finished: Dict[str, datetime] = {}
+
+    async def stream_events():
+        try:
+            deltas = llm_client.stream_issue(prompt, max_tokens=_issue_max_tokens(request))
+            async for delta in _coalesce_deltas(deltas):
+                parts.append(delta)
+                yield _sse({"delta": delta})
+        except Exception as e:
+            logger.error(f"Failed to stream issue for {repo}#{pr_number}: {e}")
+            yield _sse({"detail": f"Failed to generate issue: {str(e)}"}, event="error")
+            return
+
+        finished["generated_at"] = datetime.now(timezone.utc)
+        yield _sse({"generated_at": finished["generated_at"].isoformat()}, event="done")
+
+    def persist():
+        # Runs in the threadpool after the response is sent; skip if the stream failed
+        if "generated_at" in finished:
+            _persist_generated_issue(
+                repo, pr_number, pr["id"], "".join(parts), finished["generated_at"]
+            )
+
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        background=BackgroundTask(persist)
+    )
 
 
 @router.post("/prs/{repo:path}/{pr_number}/generate-issue")
 async def generate_issue(
     repo: str,
     pr_number: int,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
     request: Optional[GenerateIssueRequest] = None
 ):
     """
@@ -472,76 +1270,36 @@ async def generate_issue(
     
     Request Body (optional):
     - custom_prompt_template: Optional custom prompt template to use instead of default
+    - max_tokens: Optional token budget (default 4096; retried once with double
+      the budget if the issue is cut off)
     
     Returns:
     - issue_markdown: The generated issue in markdown format
     - generated_at: ISO 8601 timestamp of when the issue was generated
     
+    The issue is saved to the database after the response is sent; a failed
+    save is logged and doesn't affect the response.
+    
     Raises:
     - 404: If PR is not found
-    - 500: If LLM API call fails or database update fails
+    - 500: If LLM API call fails
     """
     try:
-        # 1. Fetch PR with classification
-        pr = supabase.get_pr_by_number(repo, pr_number)
-        if not pr:
-            logger.warning(f"PR not found for issue generation: {repo}#{pr_number}")
-            raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
-        
-        # 2. Check if PR is classified (recommended but not required)
-        if not pr.get("classified_at"):
-            logger.warning(f"Generating issue for unclassified PR {repo}#{pr_number}")
-        
-        # 3. Build context using existing context_builder
-        pr_context = build_pr_context(pr)
-        
-        # 4. Format classification info
-        classification_info = ""
-        if pr.get("classified_at"):
-            classification_info = f"""Difficulty: {pr.get('difficulty', 'Unknown')}
-Task Clarity: {pr.get('task_clarity', 'Unknown')}
-Is Reproducible: {pr.get('is_reproducible', 'Unknown')}
-Onboarding Suitability: {pr.get('onboarding_suitability', 'Unknown')}
-Categories: {', '.join(pr.get('categories', []))}
-Concepts Taught: {', '.join(pr.get('concepts_taught', []))}
-Prerequisites: {', '.join(pr.get('prerequisites', []))}
-Reasoning: {pr.get('reasoning', 'N/A')}"""
-        else:
-            classification_info = "No classification available"
-        
-        # 5. Use custom prompt template if provided, otherwise use default
-        prompt_template = (
-            request.custom_prompt_template
-            if request and request.custom_prompt_template
-            else ISSUE_GENERATION_PROMPT
-        )
-        
-        # 6. Fill template with context and classification
-        prompt = prompt_template.format(
-            pr_context=pr_context,
-            classification_info=classification_info
-        )
+        # 1-6. Fetch PR and fill the prompt template. Supabase calls are
+        # blocking, so they run in a worker thread instead of the event loop.
+        pr, prompt = await asyncio.to_thread(_prepare_issue_prompt, repo, pr_number, request)
         
         # 7. Generate issue using LLM
         logger.info(f"Generating issue for {repo}#{pr_number} using LLM")
-        provider = config.credentials.llm_provider
-        llm_client = LLMClient(
-            provider=provider,
-            model=config.credentials.llm_model,
-            api_key=config.credentials.anthropic_api_key if provider == "anthropic" else config.credentials.openai_api_key,
-            temperature=0.0,  # Use deterministic output for issue generation
-            max_tokens=16384
+        issue_markdown = await _issue_llm_client(http_request).generate_issue_async(
+            prompt, max_tokens=_issue_max_tokens(request)
         )
-        issue_markdown = llm_client.generate_issue(prompt)
         
-        # 8. Save to database
+        # 8. Save to database once the response is on its way
         generated_at = datetime.now(timezone.utc)
-        supabase.client.table("pull_requests").update({
-            "generated_issue": issue_markdown,
-            "issue_generated_at": generated_at.isoformat()
-        }).eq("id", pr["id"]).execute()
-        
-        logger.info(f"Generated and saved issue for {repo}#{pr_number} ({len(issue_markdown)} chars)")
+        background_tasks.add_task(
+            _persist_generated_issue, repo, pr_number, pr["id"], issue_markdown, generated_at
+        )
         
         # 9. Return generated issue
         return {
@@ -573,8 +1331,7 @@ def get_generated_issue(repo: str, pr_number: int):
     - 404: If PR is not found or no issue has been generated yet
     """
     try:
-        # Fetch PR from database
-        pr = supabase.get_pr_by_number(repo, pr_number)
+        pr = _get_pr_cached(repo, pr_number)
         if not pr:
             logger.warning(f"PR not found for generated issue: {repo}#{pr_number}")
             raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
@@ -599,7 +1356,12 @@ def get_generated_issue(repo: str, pr_number: int):
 
 
 @router.get("/prs/{repo:path}/{pr_number}")
-def get_pr(repo: str, pr_number: int):
+def get_pr(
+    repo: str,
+    pr_number: int,
+    request: Request,
+    include_llm_payload: bool = Query(False, description="Include the classification prompt as llm_payload")
+):
     """
     Get a single PR by repository and PR number.
 
@@ -607,56 +1369,60 @@ def get_pr(repo: str, pr_number: int):
     - repo: Repository name (e.g., "facebook/react")
     - pr_number: PR number
 
+    Query Parameters:
+    - include_llm_payload: Add the full classification prompt as llm_payload
+      (default: false; GET .../llm_payload returns it on its own)
+
     Returns:
-    - PR object with all fields (metadata, files, linked issue, comments, classification)
+    - PR object with all fields (metadata, files, linked issue, comments, classification),
+      except that files omit their diffs (fetch files_url for those)
+
+    Sent with a content hash ETag; a matching If-None-Match returns 304
+    Not Modified with no body.
 
     Raises:
     - 404: If PR is not found
     """
     try:
-        # Use existing SupabaseClient method
-        pr = supabase.get_pr_by_number(repo, pr_number)
+        pr = _get_pr_cached(repo, pr_number)
 
         if not pr:
             logger.warning(f"PR not found: {repo}#{pr_number}")
             raise HTTPException(status_code=404, detail=f"PR not found: {repo}#{pr_number}")
 
-        # Generate LLM payload (full prompt) for debugging classifications
-        try:
-            pr_context = build_pr_context(pr)
-            full_prompt = CLASSIFICATION_PROMPT.format(pr_context=pr_context)
-            pr["llm_payload"] = full_prompt
-        except Exception as payload_error:
-            logger.warning(f"Failed to generate LLM payload for PR {repo}#{pr_number}: {payload_error}")
-            pr["llm_payload"] = None
-
-        # Normalize file data: GitLab uses different structure than GitHub
-        # Transform GitLab format to GitHub format for frontend compatibility
-        if pr.get("files") and "files" in pr["files"]:
-            normalized_files = []
-            for file in pr["files"]["files"]:
-                # Check if this is GitLab format (has 'new_path' but not 'filename')
-                if "new_path" in file and "filename" not in file:
-                    # GitLab format - normalize to GitHub format
-                    normalized_file = {
-                        "filename": file.get("new_path", file.get("old_path", "unknown")),
-                        "status": _get_file_status_from_gitlab(file),
-                        "additions": _count_additions_from_diff(file.get("diff", "")),
-                        "deletions": _count_deletions_from_diff(file.get("diff", "")),
-                        "changes": _count_changes_from_diff(file.get("diff", "")),
-                        "patch": file.get("diff"),  # GitLab calls it 'diff', GitHub calls it 'patch'
-                    }
-                    normalized_files.append(normalized_file)
-                else:
-                    # Already in GitHub format, keep as-is
-                    normalized_files.append(file)
-
-            pr["files"]["files"] = normalized_files
+        # Generate LLM payload (full prompt) for debugging classifications,
+        # only on request. The context comes from the payload cache, so
+        # re-opening a PR (or its context/debug tabs) doesn't rebuild it.
+        payload = None
+        if include_llm_payload:
+            try:
+                payload = _build_payload(repo, pr_number)
+            except Exception as payload_error:
+                logger.warning(f"Failed to generate LLM payload for PR {repo}#{pr_number}: {payload_error}")
+
+        def build():
+            # The cached row is shared with other requests; add fields to a copy
+            data = dict(pr)
+
+            # Diffs are the bulk of a PR row and the detail view doesn't show
+            # them; they're served separately by GET .../files
+            data["files"] = _without_patches(data.get("files"))
+            data["files_url"] = f"/api/prs/{repo}/{pr_number}/files"
+
+            if include_llm_payload:
+                try:
+                    data["llm_payload"] = build_classification_prompt(payload["pr_context"]) if payload else None
+                except Exception as payload_error:
+                    logger.warning(f"Failed to generate LLM payload for PR {repo}#{pr_number}: {payload_error}")
+                    data["llm_payload"] = None
+            return data
 
         # Check if PR is classified (has classified_at timestamp)
         is_classified = pr.get("classified_at") is not None
         logger.info(f"Retrieved PR: {repo}#{pr_number} (classified: {is_classified})")
-        return pr
+        return _json_with_etag(
+            request, ("pr", repo, pr_number, include_llm_payload), (pr, payload), build
+        )
 
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -666,39 +1432,78 @@ def get_pr(repo: str, pr_number: int):
         raise HTTPException(status_code=500, detail=f"Failed to get PR: {str(e)}")
 
 
+def _without_patches(files: Any) -> Any:
+    """Copy of a PR's stored files ({"files": [...], "summary": ...} or a bare list) without diffs."""
+    if isinstance(files, dict) and isinstance(files.get("files"), list):
+        return {**files, "files": _without_patches(files["files"])}
+    if isinstance(files, list):
+        return [
+            {key: value for key, value in file.items() if key != "patch"} if isinstance(file, dict) else file
+            for file in files
+        ]
+    return files
+
+
+def _fetch_repos() -> List[str]:
+    """
+    Fetch the sorted list of distinct repositories from Supabase.
+
+    Uses the get_distinct_repos() RPC (setup/migrations/004_add_rpc_functions.py),
+    so the database returns one row per repo instead of one per PR.
+    """
+    result = supabase.client.rpc('get_distinct_repos').execute()
+    # RPC returns objects like [{"repo": "..."}, ...], extract the strings
+    repos = [row["repo"] if isinstance(row, dict) else row for row in result.data or []]
+    logger.info(f"Found {len(repos)} unique repositories")
+    return repos
+
+
+def _refresh_repos() -> List[str]:
+    """Fetch the repo list into the cache, unless a concurrent call just did."""
+    with _REPOS_FETCH_LOCK:
+        with _REPOS_CACHE_LOCK:
+            repos = _REPOS_CACHE.get("repos")
+        if repos is not None:
+            return repos
+
+        repos = _fetch_repos()
+        with _REPOS_CACHE_LOCK:
+            _REPOS_CACHE["repos"] = _REPOS_LAST["repos"] = repos
+        return repos
+
+
+def _refresh_repos_in_background() -> None:
+    """Refresh the repo list after a stale response was sent; failures keep the stale list."""
+    try:
+        _refresh_repos()
+    except Exception as e:
+        logger.warning(f"Failed to refresh repo list: {e}")
+
+
 @router.get("/repos")
-def list_repos():
+def list_repos(background_tasks: BackgroundTasks):
     """
     Get list of all unique repositories in the database.
 
     This is used to populate the repository filter dropdown in the UI.
+    The list is cached in memory for 60 seconds; after that the previous
+    list is returned while a fresh one is fetched in the background.
 
     Returns:
     - repos: List of repository names (e.g., ["facebook/react", "microsoft/vscode"])
     """
     try:
-        # Try to use efficient RPC function first (if it exists)
-        # This returns only unique repos from the database
-        try:
-            result = supabase.client.rpc('get_distinct_repos').execute()
-            if result.data:
-                # RPC returns objects like [{"repo": "..."}, ...], extract the strings
-                repos = [row["repo"] if isinstance(row, dict) else row for row in result.data]
-                logger.info(f"Found {len(repos)} unique repositories (via RPC)")
-                return {"repos": repos}
-        except Exception as rpc_error:
-            logger.debug(f"RPC function not available, using fallback: {rpc_error}")
-
-        # Fallback: Fetch repos with a high limit and dedupe client-side
-        # Since there are typically only a handful of unique repos,
-        # fetching 5000 rows will likely cover all PRs
-        result = supabase.client.table("pull_requests").select("repo").limit(5000).execute()
-
-        # Get unique repos and sort alphabetically
-        repos = sorted(set(row["repo"] for row in result.data))
-
-        logger.info(f"Found {len(repos)} unique repositories (via fallback)")
-        return {"repos": repos}
+        with _REPOS_CACHE_LOCK:
+            repos = _REPOS_CACHE.get("repos")
+            stale = _REPOS_LAST.get("repos")
+        if repos is not None:
+            return {"repos": repos}
+
+        if stale is not None:
+            background_tasks.add_task(_refresh_repos_in_background)
+            return {"repos": stale}
+
+        return {"repos": _refresh_repos()}
 
     except Exception as e:
         logger.error(f"Failed to list repos: {e}")
@@ -0,0 +1,196 @@
+"""
+Provider batch APIs for non-interactive classification runs.
+
+OpenAI's Batch API and Anthropic's Message Batches API accept thousands of
+requests at once, process them within 24 hours at about half the price of
+regular requests, and draw on a separate (higher) rate limit pool. A large
+classification backlog isn't latency-sensitive, so it can go through them.
+
+Requests are built by LLMClient (the same chat completion arguments
+send_prompt() uses) and identified by a custom ID chosen by the caller.
+"""
+
+from typing import Dict, Optional
+
+import httpx
+import orjson
+from openai import OpenAI
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ANTHROPIC_BATCHES_URL = "https://api.anthropic.com/v1/messages/batches"
+ANTHROPIC_VERSION = "2023-06-01"
+
+# OpenAI batch statuses after which no more results will arrive
+_OPENAI_DONE = {"completed", "failed", "expired", "cancelled"}
+
+
+def openai_batch_file(requests: Dict[str, dict]) -> bytes:
+    """
+    Serialize chat completion requests as an OpenAI batch input file (JSONL).
+
+    Args:
+        requests: Dict mapping custom ID to chat completion arguments
+    """
+    return b"".join(
+        orjson.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": body,
+        }) + b"\n"
+        for custom_id, body in requests.items()
+    )
+
+
+def submit_openai_batch(client: OpenAI, requests: Dict[str, dict]) -> str:
+    """Upload the requests and start an OpenAI batch, returning its ID."""
+    input_file = client.files.create(
+        file=("batch.jsonl", openai_batch_file(requests)),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    return batch.id
+
+
+def openai_batch_results(client: OpenAI, batch_id: str) -> Optional[Dict[str, str]]:
+    """
+    Fetch the results of an OpenAI batch.
+
+    Returns:
+        None while the batch is still running, otherwise a dict mapping
+        custom ID to response text (failed requests are left out)
+    """
+    batch = client.batches.retrieve(batch_id)
+    if batch.status not in _OPENAI_DONE:
+        logger.debug(f"Batch {batch_id} is {batch.status}")
+        return None
+
+    if batch.status != "completed":
+        logger.warning(f"Batch {batch_id} ended as {batch.status}")
+    if not batch.output_file_id:
+        return {}
+
+    results = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line:
+            continue
+        entry = orjson.loads(line)
+        response = entry.get("response") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            logger.warning(f"Batch request {entry['custom_id']} failed: {entry.get('error') or response}")
+            continue
+        results[entry["custom_id"]] = response["body"]["choices"][0]["message"]["content"] or ""
+    return results
+
+
+def anthropic_params(request: dict, json_schema: Optional[dict] = None, tool_name: str = "") -> dict:
+    """
+    Convert chat completion arguments to Anthropic Messages API parameters.
+
+    The batch endpoint isn't OpenAI-compatible, so system messages move to
+    the `system` parameter and JSON mode becomes a native forced tool call.
+    The system prompt is marked for prompt caching: it is identical across
+    the batch, so after the first request it is read from Anthropic's cache
+    at a fraction of the input token price.
+    """
+    params = {
+        "model": request["model"],
+        "max_tokens": request["max_tokens"],
+        "temperature": request["temperature"],
+        "messages": [m for m in request["messages"] if m["role"] != "system"],
+    }
+    system = [m["content"] for m in request["messages"] if m["role"] == "system"]
+    if system:
+        params["system"] = [{
+            "type": "text",
+            "text": "\n\n".join(system),
+            "cache_control": {"type": "ephemeral"},
+        }]
+    if json_schema is not None:
+        params["tools"] = [{
+            "name": tool_name,
+            "description": "Return the requested JSON object.",
+            "input_schema": json_schema,
+        }]
+        params["tool_choice"] = {"type": "tool", "name": tool_name}
+    return params
+
+
+def submit_anthropic_batch(http: httpx.Client, api_key: str, requests: Dict[str, dict]) -> str:
+    """
+    Start an Anthropic message batch, returning its ID.
+
+    Args:
+        http: httpx client to send the request with
+        api_key: Anthropic API key
+        requests: Dict mapping custom ID to Messages API parameters
+                 (custom IDs may only contain letters, digits, - and _)
+    """
+    response = http.post(
+        ANTHROPIC_BATCHES_URL,
+        headers=_anthropic_headers(api_key),
+        content=orjson.dumps({
+            "requests": [
+                {"custom_id": custom_id, "params": params}
+                for custom_id, params in requests.items()
+            ]
+        })
+    )
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def anthropic_batch_results(http: httpx.Client, api_key: str, batch_id: str) -> Optional[Dict[str, str]]:
+    """
+    Fetch the results of an Anthropic message batch.
+
+    Returns:
+        None while the batch is still running, otherwise a dict mapping
+        custom ID to response text (failed requests are left out)
+    """
+    headers = _anthropic_headers(api_key)
+    response = http.get(f"{ANTHROPIC_BATCHES_URL}/{batch_id}", headers=headers)
+    response.raise_for_status()
+    batch = response.json()
+    if batch["processing_status"] != "ended":
+        logger.debug(f"Batch {batch_id} is {batch['processing_status']}")
+        return None
+
+    response = http.get(batch["results_url"], headers=headers)
+    response.raise_for_status()
+
+    results = {}
+    for line in response.text.splitlines():
+        if not line:
+            continue
+        entry = orjson.loads(line)
+        result = entry["result"]
+        if result["type"] != "succeeded":
+            logger.warning(f"Batch request {entry['custom_id']} {result['type']}: {result.get('error')}")
+            continue
+        results[entry["custom_id"]] = _anthropic_text(result["message"])
+    return results
+
+
+def _anthropic_headers(api_key: str) -> dict:
+    """Headers for Anthropic's native (non-OpenAI-compatible) API."""
+    return {
+        "x-api-key": api_key,
+        "anthropic-version": ANTHROPIC_VERSION,
+        "content-type": "application/json",
+    }
+
+
+def _anthropic_text(message: dict) -> str:
+    """Response text of a Messages API message (a forced tool call's input, as JSON)."""
+    for block in message["content"]:
+        if block["type"] == "tool_use":
+            return orjson.dumps(block["input"]).decode()
+    return "".join(block.get("text", "") for block in message["content"] if block["type"] == "text")
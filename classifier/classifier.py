@@ -4,16 +4,65 @@ PR Classifier - orchestrates context building, prompting, and LLM classification
 This is the main entry point for classification logic.
 """
 
+import asyncio
 import json
+import re
 import time
-from typing import Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+import orjson
 from classifier.context_builder import build_pr_context
-from classifier.prompt_template import CLASSIFICATION_PROMPT
+from classifier.prompt_template import (
+    CLASSIFICATION_SYSTEM,
+    build_classification_batch_prompt,
+    build_classification_user_prompt,
+)
+from classifier.llm_cache import LLMCache
 from classifier.llm_client import LLMClient
+from classifier.preflight import trivial_classification
+from classifier.semantic_cache import SemanticCache
+from models.data_models import Classification
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Schema sent to the provider's JSON mode, from the model classifications are stored as
+CLASSIFICATION_SCHEMA = Classification.model_json_schema()
+
+# A classification is ~300-600 tokens. A budget near that (instead of the
+# client's 16K default) keeps providers from reserving capacity for output
+# that never comes; grouped requests get this much per PR.
+CLASSIFICATION_MAX_TOKENS = 1024
+
+# Several PRs per request: JSON modes need an object at the top level
+CLASSIFICATION_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {"classifications": {"type": "array", "items": CLASSIFICATION_SCHEMA}},
+    "required": ["classifications"],
+}
+
+# The small model of a cascade also reports whether it's unsure, so those
+# PRs can be handed to the main model
+SMALL_MODEL_SCHEMA = {
+    **CLASSIFICATION_SCHEMA,
+    "properties": {
+        **CLASSIFICATION_SCHEMA["properties"],
+        "low_confidence": {
+            "type": "boolean",
+            "description": "true if you are not confident in this classification",
+        },
+    },
+    "required": CLASSIFICATION_SCHEMA["required"] + ["low_confidence"],
+}
+LOW_CONFIDENCE_INSTRUCTION = (
+    '\n\nAlso include "low_confidence": true in the JSON if you are not confident '
+    "in this classification (for example, judging it needs deep knowledge of the "
+    'system), otherwise "low_confidence": false.'
+)
+
+# JSON in a ```json fence, or else everything from the first { to the last }
+# (only used when JSON mode is off)
+_JSON_RE = re.compile(r"```json\s*(\{.*?\})\s*```|(\{.*\})", re.DOTALL)
+
 
 class Classifier:
     """
@@ -29,7 +78,14 @@ class Classifier:
         model: str,
         api_key: str,
         max_retries: int = 2,
-        retry_delay: float = 2.0
+        retry_delay: float = 2.0,
+        json_mode: bool = True,
+        cache: Optional[LLMCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        llm_max_retries: int = 2,
+        requests_per_minute: Optional[int] = None,
+        preflight: bool = True,
+        small_model: Optional[str] = None
     ):
         """
         Initialize classifier with LLM client.
@@ -40,14 +96,53 @@ class Classifier:
             api_key: API key for the provider
             max_retries: Maximum number of retries on parsing failures (default 2)
             retry_delay: Delay between retries in seconds (default 2.0)
+            json_mode: Use the provider's JSON mode so responses are raw JSON
+                      (default True). When False, responses are streamed and
+                      read only up to the end of the first JSON object, which
+                      is extracted from the surrounding text.
+            cache: Optional LLMCache so re-runs reuse responses to identical prompts
+            semantic_cache: Optional SemanticCache so near-duplicate PRs reuse
+                           an earlier classification instead of calling the LLM
+            llm_max_retries: API-level retries on rate limits and server errors,
+                            with backoff (default 2; see LLMClient)
+            requests_per_minute: Optional request rate limit for the LLM client
+            preflight: Classify certainly-trivial PRs (dependency bot bumps,
+                      lockfile-only and whitespace-only changes) by rule,
+                      without an LLM call (default True)
+            small_model: Optional cheaper model tried first (e.g. a Haiku
+                        model when `model` is Sonnet). Its answer is used
+                        unless it is invalid, it reports low confidence, or
+                        it rates the PR hard; then `model` classifies the PR.
         """
         self.llm_client = LLMClient(
             provider=provider,
             model=model,
-            api_key=api_key
+            api_key=api_key,
+            max_tokens=CLASSIFICATION_MAX_TOKENS,
+            cache=cache,
+            max_retries=llm_max_retries,
+            requests_per_minute=requests_per_minute
         )
+        self.small_llm_client = LLMClient(
+            provider=provider,
+            model=small_model,
+            api_key=api_key,
+            max_tokens=CLASSIFICATION_MAX_TOKENS,
+            cache=cache,
+            max_retries=llm_max_retries,
+            requests_per_minute=requests_per_minute
+        ) if small_model else None
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.json_mode = json_mode
+        self._json_schema = CLASSIFICATION_SCHEMA if json_mode else None
+        self._batch_json_schema = CLASSIFICATION_BATCH_SCHEMA if json_mode else None
+        self._small_json_schema = SMALL_MODEL_SCHEMA if json_mode else None
+        self.semantic_cache = semantic_cache
+        self.preflight = preflight
+        self._cache_namespace = f"{provider}/{model}"
+        # Small-model answers are cached under their own model, never the main one's
+        self._small_cache_namespace = f"{provider}/{small_model}" if small_model else None
         logger.info(f"Initialized Classifier with {provider}/{model}")
     
     def classify_pr(self, pr_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -74,16 +169,27 @@ class Classifier:
         pr_number = pr_data.get("pr_number", "Unknown")
         logger.info(f"Classifying PR #{pr_number}...")
         
-        # Step 1: Build context from PR data
-        try:
-            pr_context = build_pr_context(pr_data)
-            logger.debug(f"Built PR context ({len(pr_context)} chars)")
-        except Exception as e:
-            logger.error(f"Failed to build PR context: {e}")
-            raise
+        # Steps 1-2: Build context and full prompt
+        pr_context = self._build_context(pr_data)
+        cached = self._classify_without_llm(pr_data, pr_context)
+        if cached is not None:
+            return cached
+        user_prompt = build_classification_user_prompt(pr_context)
         
-        # Step 2: Build full prompt
-        full_prompt = CLASSIFICATION_PROMPT.format(pr_context=pr_context)
+        if self.small_llm_client is not None:
+            try:
+                small_response = self.small_llm_client.send_prompt(
+                    user_prompt + LOW_CONFIDENCE_INSTRUCTION,
+                    system=CLASSIFICATION_SYSTEM,
+                    json_schema=self._small_json_schema,
+                    stop_after_json=not self.json_mode
+                )
+            except Exception as e:
+                logger.warning(f"Small model call failed for PR #{pr_number}: {e}")
+            else:
+                classification = self._accept_small_model(small_response, pr_number, pr_context)
+                if classification is not None:
+                    return classification
         
         # Step 3: Call LLM with retry logic
         response_text = None
@@ -93,61 +199,409 @@ class Classifier:
                 
                 # Send prompt to LLM (only if we don't have a response from a fix attempt)
                 if response_text is None:
-                    response_text = self.llm_client.send_prompt(full_prompt)
-                
-                # Step 4: Parse JSON response
-                classification = self._parse_classification_response(response_text)
+                    # Retries must not get the rejected answer back from the cache
+                    response_text = self.llm_client.send_prompt(
+                        user_prompt,
+                        system=CLASSIFICATION_SYSTEM,
+                        json_schema=self._json_schema,
+                        use_cache=attempt == 1,
+                        stop_after_json=not self.json_mode
+                    )
                 
-                # Step 5: Validate required fields
-                self._validate_classification(classification)
+                # Steps 4-5: Parse and validate JSON response
+                return self._parse_and_validate(response_text, pr_number, attempt, pr_context)
                 
-                logger.info(
-                    f"✓ Successfully classified PR #{pr_number} "
-                    f"(difficulty: {classification.get('difficulty')}, "
-                    f"attempt: {attempt})"
+            except json.JSONDecodeError as e:
+                self._check_retry_left(e, attempt, pr_number, "Failed to parse LLM response")
+                # Ask the LLM to fix the malformed JSON
+                logger.info("Asking LLM to fix malformed JSON...")
+                response_text = self.llm_client.send_prompt(
+                    self._fix_prompt(response_text),
+                    json_schema=self._json_schema,
+                    stop_after_json=not self.json_mode
                 )
-                return classification
+                # Loop will try to parse this fixed response
+            
+            except ValueError as e:
+                self._check_retry_left(e, attempt, pr_number, "Invalid classification format")
+                logger.info(f"Retrying in {self.retry_delay}s...")
+                # Reset response_text so we send the original prompt again
+                response_text = None
+                time.sleep(self.retry_delay)
+            
+            except Exception as e:
+                # For other errors (API failures, etc.), don't retry
+                logger.error(f"LLM call failed: {e}")
+                raise
+    
+    async def aclassify_pr(self, pr_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of classify_pr() with the same retry behavior.
+        
+        Awaits the LLM instead of blocking, so many PRs can be classified
+        concurrently on one event loop (see classify_prs()).
+        
+        Args:
+            pr_data: Dict containing PR information (repo, pr_number, title,
+                    body, files, linked_issue, issue_comments)
+        
+        Returns:
+            Classification dict (same keys as classify_pr())
+        
+        Raises:
+            Exception: If classification fails after all retries
+        """
+        pr_number = pr_data.get("pr_number", "Unknown")
+        logger.info(f"Classifying PR #{pr_number}...")
+        
+        pr_context = self._build_context(pr_data)
+        cached = self._classify_without_llm(pr_data, pr_context)
+        if cached is not None:
+            return cached
+        user_prompt = build_classification_user_prompt(pr_context)
+        
+        if self.small_llm_client is not None:
+            try:
+                small_response = await self.small_llm_client.send_prompt_async(
+                    user_prompt + LOW_CONFIDENCE_INSTRUCTION,
+                    system=CLASSIFICATION_SYSTEM,
+                    json_schema=self._small_json_schema,
+                    stop_after_json=not self.json_mode
+                )
+            except Exception as e:
+                logger.warning(f"Small model call failed for PR #{pr_number}: {e}")
+            else:
+                classification = self._accept_small_model(small_response, pr_number, pr_context)
+                if classification is not None:
+                    return classification
+        
+        response_text = None
+        for attempt in range(1, self.max_retries + 2):
+            try:
+                logger.debug(f"LLM call attempt {attempt}/{self.max_retries + 1}")
+                
+                if response_text is None:
+                    response_text = await self.llm_client.send_prompt_async(
+                        user_prompt,
+                        system=CLASSIFICATION_SYSTEM,
+                        json_schema=self._json_schema,
+                        use_cache=attempt == 1,
+                        stop_after_json=not self.json_mode
+                    )
+                
+                return self._parse_and_validate(response_text, pr_number, attempt, pr_context)
                 
             except json.JSONDecodeError as e:
-                logger.warning(
-                    f"Failed to parse JSON response (attempt {attempt}): {e}"
+                self._check_retry_left(e, attempt, pr_number, "Failed to parse LLM response")
+                logger.info("Asking LLM to fix malformed JSON...")
+                response_text = await self.llm_client.send_prompt_async(
+                    self._fix_prompt(response_text),
+                    json_schema=self._json_schema,
+                    stop_after_json=not self.json_mode
                 )
-                if attempt <= self.max_retries:
-                    # Ask the LLM to fix the malformed JSON
-                    logger.info("Asking LLM to fix malformed JSON...")
-                    fix_prompt = (
-                        f"The following JSON is malformed. Please return a corrected, "
-                        f"properly formatted JSON object with the same content:\n\n{response_text}"
-                    )
-                    response_text = self.llm_client.send_prompt(fix_prompt)
-                    # Loop will try to parse this fixed response
-                else:
-                    logger.error(f"All {self.max_retries + 1} attempts failed for PR #{pr_number}")
-                    raise Exception(f"Failed to parse LLM response after {self.max_retries + 1} attempts") from e
             
             except ValueError as e:
-                logger.warning(
-                    f"Invalid classification format (attempt {attempt}): {e}"
-                )
-                if attempt <= self.max_retries:
-                    logger.info(f"Retrying in {self.retry_delay}s...")
-                    # Reset response_text so we send the original prompt again
-                    response_text = None
-                    time.sleep(self.retry_delay)
-                else:
-                    logger.error(f"All {self.max_retries + 1} attempts failed for PR #{pr_number}")
-                    raise Exception(f"Invalid classification format after {self.max_retries + 1} attempts") from e
+                self._check_retry_left(e, attempt, pr_number, "Invalid classification format")
+                logger.info(f"Retrying in {self.retry_delay}s...")
+                response_text = None
+                await asyncio.sleep(self.retry_delay)
             
             except Exception as e:
-                # For other errors (API failures, etc.), don't retry
                 logger.error(f"LLM call failed: {e}")
                 raise
     
+    async def aclassify_pr_group(self, prs: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Classify several PRs with a single LLM request.
+        
+        The static classification instructions are sent once for the whole
+        group, which saves input tokens and raises throughput when the
+        provider's requests-per-minute limit is the bottleneck. If the
+        response doesn't hold one valid classification per PR, the PRs it
+        got wrong are classified one at a time with aclassify_pr().
+        
+        Args:
+            prs: List of PR data dicts (as accepted by classify_pr())
+        
+        Returns:
+            List aligned with `prs` holding each classification dict or exception
+        """
+        results: List[Union[Dict[str, Any], Exception, None]] = [None] * len(prs)
+        pending = {}
+        for i, pr_data in enumerate(prs):
+            try:
+                pr_context = self._build_context(pr_data)
+            except Exception as e:
+                results[i] = e
+                continue
+            results[i] = self._classify_without_llm(pr_data, pr_context)
+            if results[i] is None:
+                pending[i] = pr_context
+        
+        if len(pending) > 1:
+            logger.info(f"Classifying {len(pending)} PRs in one request...")
+            try:
+                response_text = await self.llm_client.send_prompt_async(
+                    build_classification_batch_prompt(list(pending.values())),
+                    json_schema=self._batch_json_schema,
+                    max_tokens=CLASSIFICATION_MAX_TOKENS * len(pending)
+                )
+                classifications = self._parse_classification_response(response_text).get("classifications")
+                if not isinstance(classifications, list) or len(classifications) != len(pending):
+                    raise ValueError(
+                        f"Expected {len(pending)} classifications, got "
+                        f"{len(classifications) if isinstance(classifications, list) else 'none'}"
+                    )
+            except Exception as e:
+                logger.warning(f"Grouped classification failed, classifying PRs one at a time: {e}")
+                classifications = [None] * len(pending)
+            
+            for (i, pr_context), classification in zip(list(pending.items()), classifications):
+                try:
+                    self._validate_classification(classification)
+                except (TypeError, ValueError) as e:
+                    if classification is not None:
+                        logger.warning(f"Invalid classification for PR #{prs[i].get('pr_number')} in group: {e}")
+                    continue
+                results[i] = self._accept(classification, prs[i].get("pr_number", "Unknown"), 1, pr_context)
+                del pending[i]
+        
+        for i in pending:
+            try:
+                results[i] = await self.aclassify_pr(prs[i])
+            except Exception as e:
+                results[i] = e
+        
+        return results
+    
+    async def classify_prs(
+        self,
+        prs: List[Dict[str, Any]],
+        concurrency: int = 20,
+        on_result: Optional[Callable[[Dict[str, Any], Union[Dict[str, Any], Exception]], Awaitable[None]]] = None,
+        prs_per_request: int = 1
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Classify many PRs concurrently.
+        
+        At most `concurrency` LLM requests are in flight at once. A failure for
+        one PR doesn't affect the others: its exception is returned in place
+        of the classification.
+        
+        Args:
+            prs: List of PR data dicts (as accepted by classify_pr())
+            concurrency: Maximum number of requests in flight at the same time
+            on_result: Optional async callback awaited with (pr_data, result) as
+                      each PR finishes, e.g. to save results incrementally
+            prs_per_request: PRs classified per LLM request (default 1). Above
+                            1, PRs are grouped with aclassify_pr_group().
+        
+        Returns:
+            List aligned with `prs` holding each classification dict or exception
+        
+        Raises:
+            ValueError: If concurrency or prs_per_request is less than 1
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        if prs_per_request < 1:
+            raise ValueError(f"prs_per_request must be at least 1, got {prs_per_request}")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def classify_group(group: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
+            async with semaphore:
+                if len(group) > 1:
+                    results = await self.aclassify_pr_group(group)
+                else:
+                    try:
+                        results = [await self.aclassify_pr(group[0])]
+                    except Exception as e:
+                        results = [e]
+            if on_result is not None:
+                for pr_data, result in zip(group, results):
+                    await on_result(pr_data, result)
+            return results
+        
+        groups = [prs[i:i + prs_per_request] for i in range(0, len(prs), prs_per_request)]
+        grouped_results = await asyncio.gather(*(classify_group(group) for group in groups))
+        return [result for results in grouped_results for result in results]
+    
+    def classify_prs_batch(
+        self,
+        prs: List[Dict[str, Any]],
+        poll_interval: float = 60.0
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Classify many PRs through the provider's batch API.
+        
+        Costs about half as much as classify_prs() but results can take up to
+        24 hours, so it suits large non-interactive backlogs. Blocks until the
+        batch finishes. There are no retries: an invalid or missing response
+        is returned as an exception and the PR stays unclassified for the
+        next run.
+        
+        Args:
+            prs: List of PR data dicts (as accepted by classify_pr())
+            poll_interval: Seconds between batch status checks (default 60)
+        
+        Returns:
+            List aligned with `prs` holding each classification dict or exception
+        """
+        results: List[Union[Dict[str, Any], Exception, None]] = [None] * len(prs)
+        contexts = {}
+        for i, pr_data in enumerate(prs):
+            try:
+                pr_context = self._build_context(pr_data)
+            except Exception as e:
+                results[i] = e
+                continue
+            results[i] = self._classify_without_llm(pr_data, pr_context)
+            if results[i] is None:
+                contexts[str(i)] = pr_context
+        
+        if contexts:
+            batch_id = self.llm_client.submit_batch(
+                {custom_id: build_classification_user_prompt(pr_context) for custom_id, pr_context in contexts.items()},
+                system=CLASSIFICATION_SYSTEM,
+                json_schema=self._json_schema
+            )
+            responses = self.llm_client.poll_batch(batch_id, poll_interval=poll_interval)
+            
+            for custom_id, pr_context in contexts.items():
+                i = int(custom_id)
+                pr_number = prs[i].get("pr_number", "Unknown")
+                if custom_id not in responses:
+                    results[i] = Exception(f"No batch response for PR #{pr_number}")
+                    continue
+                try:
+                    results[i] = self._parse_and_validate(responses[custom_id], pr_number, 1, pr_context)
+                except ValueError as e:
+                    logger.warning(f"Invalid batch response for PR #{pr_number}: {e}")
+                    results[i] = e
+        
+        return results
+    
+    def _build_context(self, pr_data: Dict[str, Any]) -> str:
+        """Build the PR context that fills the classification prompt."""
+        try:
+            pr_context = build_pr_context(pr_data)
+            logger.debug(f"Built PR context ({len(pr_context)} chars)")
+        except Exception as e:
+            logger.error(f"Failed to build PR context: {e}")
+            raise
+        
+        return pr_context
+    
+    def _classify_without_llm(self, pr_data: Dict[str, Any], pr_context: str) -> Optional[Dict[str, Any]]:
+        """Classify a PR by rule or from a near-duplicate's classification, or return None."""
+        pr_number = pr_data.get("pr_number", "Unknown")
+        
+        if self.preflight:
+            classification = trivial_classification(pr_data)
+            if classification is not None:
+                logger.info(f"✓ Classified PR #{pr_number} by rule as trivial ({classification['categories'][0]})")
+                return classification
+        
+        return self._semantic_lookup(pr_context, pr_number)
+    
+    def _semantic_lookup(self, pr_context: str, pr_number: Any) -> Optional[Dict[str, Any]]:
+        """Return the classification of a near-duplicate PR, or None."""
+        if self.semantic_cache is None:
+            return None
+        
+        cached = self.semantic_cache.get(self._cache_namespace, pr_context)
+        if cached is None and self._small_cache_namespace is not None:
+            # A confident small-model answer is what the cascade would accept anyway
+            cached = self.semantic_cache.get(self._small_cache_namespace, pr_context)
+        if cached is None:
+            return None
+        
+        classification = orjson.loads(cached)
+        logger.info(
+            f"✓ Reused classification of a similar PR for PR #{pr_number} "
+            f"(difficulty: {classification.get('difficulty')})"
+        )
+        return classification
+    
+    def _accept_small_model(self, response_text: str, pr_number: Any, pr_context: str) -> Optional[Dict[str, Any]]:
+        """Return the small model's classification, or None if the main model should classify the PR."""
+        try:
+            classification = self._parse_classification_response(response_text)
+            low_confidence = classification.pop("low_confidence", False)
+            self._validate_classification(classification)
+        except (TypeError, ValueError, AttributeError) as e:
+            logger.info(f"Small model response invalid for PR #{pr_number}, using main model: {e}")
+            return None
+        
+        if low_confidence is not False or classification["difficulty"] == "hard":
+            logger.info(
+                f"Small model unsure about PR #{pr_number} "
+                f"(difficulty: {classification['difficulty']}, low_confidence: {low_confidence}), "
+                f"using main model"
+            )
+            return None
+        
+        return self._accept(classification, pr_number, 1, pr_context, self._small_cache_namespace)
+    
+    def _parse_and_validate(
+        self,
+        response_text: str,
+        pr_number: Any,
+        attempt: int,
+        pr_context: str
+    ) -> Dict[str, Any]:
+        """Parse and validate an LLM response (raises JSONDecodeError/ValueError)."""
+        classification = self._parse_classification_response(response_text)
+        self._validate_classification(classification)
+        return self._accept(classification, pr_number, attempt, pr_context)
+    
+    def _accept(
+        self,
+        classification: Dict[str, Any],
+        pr_number: Any,
+        attempt: int,
+        pr_context: str,
+        namespace: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Record a validated classification in the semantic cache (under the producing model's namespace, default the main model's) and log it."""
+        if self.semantic_cache is not None:
+            # Store the validated classification so hits never need re-checking
+            self.semantic_cache.set(
+                namespace or self._cache_namespace, pr_context, orjson.dumps(classification).decode()
+            )
+        
+        logger.info(
+            f"✓ Successfully classified PR #{pr_number} "
+            f"(difficulty: {classification.get('difficulty')}, "
+            f"attempt: {attempt})"
+        )
+        return classification
+    
+    def _check_retry_left(self, error: ValueError, attempt: int, pr_number: Any, failure: str) -> None:
+        """Log a failed attempt and raise `failure` if no retries are left."""
+        if isinstance(error, json.JSONDecodeError):
+            logger.warning(f"Failed to parse JSON response (attempt {attempt}): {error}")
+        else:
+            logger.warning(f"Invalid classification format (attempt {attempt}): {error}")
+        
+        if attempt > self.max_retries:
+            logger.error(f"All {self.max_retries + 1} attempts failed for PR #{pr_number}")
+            raise Exception(f"{failure} after {self.max_retries + 1} attempts") from error
+    
+    def _fix_prompt(self, response_text: str) -> str:
+        """Prompt asking the LLM to repair malformed JSON."""
+        return (
+            f"The following JSON is malformed. Please return a corrected, "
+            f"properly formatted JSON object with the same content:\n\n{response_text}"
+        )
+    
     def _parse_classification_response(self, response_text: str) -> Dict[str, Any]:
         """
         Parse JSON from LLM response.
         
-        Handles cases where LLM includes extra text before/after JSON.
+        In JSON mode the response must be a bare JSON object. Otherwise, handles
+        cases where LLM includes extra text before/after JSON.
         
         Args:
             response_text: Raw response from LLM
@@ -156,28 +610,20 @@ class Classifier:
             Parsed JSON as dict
         
         Raises:
-            json.JSONDecodeError: If no valid JSON found
+            json.JSONDecodeError: If no valid JSON found (orjson.JSONDecodeError
+                is a subclass, so callers can keep catching the stdlib error)
         """
         # Try to parse directly first
         try:
-            return json.loads(response_text)
-        except json.JSONDecodeError:
-            pass
-        
-        # Try to extract JSON from markdown code blocks
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            if end > start:
-                json_str = response_text[start:end].strip()
-                return json.loads(json_str)
-        
-        # Try to extract JSON object (find first { and last })
-        start = response_text.find("{")
-        end = response_text.rfind("}")
-        if start >= 0 and end > start:
-            json_str = response_text[start:end + 1]
-            return json.loads(json_str)
+            return orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            if self.json_mode:
+                raise
+        
+        # Extract JSON from a markdown code block or surrounding text
+        match = _JSON_RE.search(response_text)
+        if match:
+            return orjson.loads(match.group(1) or match.group(2))
         
         # If all fails, raise original error
         raise json.JSONDecodeError("No valid JSON found in response", response_text, 0)
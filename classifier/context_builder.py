@@ -8,8 +8,22 @@ and the explorer GUI to show "what the LLM sees".
 
 from typing import Dict, Any, Optional
 
+from utils.logger import setup_logger
 
-def build_pr_context(pr_data: Dict[str, Any]) -> str:
+logger = setup_logger(__name__)
+
+# Section separators, built once instead of on every call
+_BANNER = "=" * 80
+_RULE = "-" * 80
+
+# Cap on the context's size, so one runaway PR (huge description, long
+# issue thread, minified lines in a diff) can't blow up prompt cost.
+# Tokens are estimated from characters (no tokenizer matches every provider).
+MAX_CONTEXT_TOKENS = 30000
+CHARS_PER_TOKEN = 4
+
+
+def build_pr_context(pr_data: Dict[str, Any], max_tokens: Optional[int] = MAX_CONTEXT_TOKENS) -> str:
     """
     Build formatted context string from PR data for LLM classification.
     
@@ -26,41 +40,41 @@ def build_pr_context(pr_data: Dict[str, Any]) -> str:
             - files: Optional[List[Dict]] (changed files with diffs)
             - linked_issue: Optional[Dict] (issue metadata)
             - issue_comments: Optional[List[Dict]] (issue comments)
+        max_tokens: Approximate token cap for the context (None for no cap)
     
     Returns:
         Formatted string with sections for PR metadata, files, issue, and comments.
         
     Note:
-        We already truncated diffs in Milestone 6 (100 lines per file, max 10 files),
-        so no additional truncation is needed here.
+        Diffs are already truncated in Milestone 6 (100 lines per file, max 10 files),
+        but descriptions and comments aren't, so the whole context is capped
+        at max_tokens (see truncate_context()).
     """
     sections = []
     
     # Section 1: PR Metadata
-    sections.append("=" * 80)
-    sections.append("PULL REQUEST METADATA")
-    sections.append("=" * 80)
-    sections.append(f"Repository: {pr_data.get('repo', 'Unknown')}")
-    sections.append(f"PR Number: #{pr_data.get('pr_number', 'Unknown')}")
-    sections.append(f"Title: {pr_data.get('title', 'Unknown')}")
-    sections.append(f"Merged At: {pr_data.get('merged_at', 'Unknown')}")
-    sections.append("")
+    sections.extend((
+        _BANNER,
+        "PULL REQUEST METADATA",
+        _BANNER,
+        f"Repository: {pr_data.get('repo', 'Unknown')}",
+        f"PR Number: #{pr_data.get('pr_number', 'Unknown')}",
+        f"Title: {pr_data.get('title', 'Unknown')}",
+        f"Merged At: {pr_data.get('merged_at', 'Unknown')}",
+        "",
+    ))
     
     # Section 2: PR Description/Body
-    sections.append("=" * 80)
-    sections.append("PR DESCRIPTION")
-    sections.append("=" * 80)
-    body = pr_data.get("body")
-    if body:
-        sections.append(body)
-    else:
-        sections.append("(No description provided)")
-    sections.append("")
+    sections.extend((
+        _BANNER,
+        "PR DESCRIPTION",
+        _BANNER,
+        pr_data.get("body") or "(No description provided)",
+        "",
+    ))
     
     # Section 3: Changed Files with Diffs
-    sections.append("=" * 80)
-    sections.append("CHANGED FILES AND DIFFS")
-    sections.append("=" * 80)
+    sections.extend((_BANNER, "CHANGED FILES AND DIFFS", _BANNER))
     files = pr_data.get("files")
     
     # Handle nested structure: files might be {'files': [...], 'summary': {...}}
@@ -68,68 +82,120 @@ def build_pr_context(pr_data: Dict[str, Any]) -> str:
         files = files['files']
     
     if files and isinstance(files, list):
-        sections.append(f"Total files changed: {len(files)}")
-        sections.append("")
+        sections.extend((f"Total files changed: {len(files)}", ""))
         
         for i, file in enumerate(files, 1):
-            filename = file.get("filename", "Unknown")
-            status = file.get("status", "Unknown")
-            additions = file.get("additions", 0)
-            deletions = file.get("deletions", 0)
             patch = file.get("patch")
-            
-            sections.append(f"File {i}: {filename}")
-            sections.append(f"Status: {status} (+{additions} -{deletions})")
+            header = (
+                f"File {i}: {file.get('filename', 'Unknown')}\n"
+                f"Status: {file.get('status', 'Unknown')} "
+                f"(+{file.get('additions', 0)} -{file.get('deletions', 0)})"
+            )
             
             if patch:
-                sections.append("```diff")
-                sections.append(patch)
-                sections.append("```")
+                sections.extend((header, "```diff", patch, "```", ""))
             else:
-                sections.append("(No diff available - likely binary or too large)")
-            
-            sections.append("")
+                sections.extend((header, "(No diff available - likely binary or too large)", ""))
     else:
-        sections.append("(No files information available)")
-        sections.append("")
+        sections.extend(("(No files information available)", ""))
     
     # Section 4: Linked Issue (if present)
     linked_issue = pr_data.get("linked_issue")
     if linked_issue and isinstance(linked_issue, dict):
-        sections.append("=" * 80)
-        sections.append("LINKED ISSUE")
-        sections.append("=" * 80)
-        sections.append(f"Issue Number: #{linked_issue.get('number', 'Unknown')}")
-        sections.append(f"Title: {linked_issue.get('title', 'Unknown')}")
-        sections.append(f"State: {linked_issue.get('state', 'Unknown')}")
-        sections.append("")
-        sections.append("Issue Body:")
-        issue_body = linked_issue.get("body")
-        if issue_body:
-            sections.append(issue_body)
-        else:
-            sections.append("(No issue description)")
-        sections.append("")
+        sections.extend((
+            _BANNER,
+            "LINKED ISSUE",
+            _BANNER,
+            f"Issue Number: #{linked_issue.get('number', 'Unknown')}",
+            f"Title: {linked_issue.get('title', 'Unknown')}",
+            f"State: {linked_issue.get('state', 'Unknown')}",
+            "",
+            "Issue Body:",
+            linked_issue.get("body") or "(No issue description)",
+            "",
+        ))
     
     # Section 5: Issue Comments (if present)
     issue_comments = pr_data.get("issue_comments")
     if issue_comments and isinstance(issue_comments, list) and len(issue_comments) > 0:
-        sections.append("=" * 80)
-        sections.append("ISSUE DISCUSSION")
-        sections.append("=" * 80)
-        sections.append(f"Total comments: {len(issue_comments)}")
-        sections.append("")
+        sections.extend((
+            _BANNER,
+            "ISSUE DISCUSSION",
+            _BANNER,
+            f"Total comments: {len(issue_comments)}",
+            "",
+        ))
         
         for i, comment in enumerate(issue_comments, 1):
             author = comment.get("user", {}).get("login", "Unknown")
             created_at = comment.get("created_at", "Unknown")
-            body = comment.get("body", "")
-            
-            sections.append(f"Comment {i} by {author} at {created_at}:")
-            sections.append(body)
-            sections.append("")
-            sections.append("-" * 80)
+            sections.extend((
+                f"Comment {i} by {author} at {created_at}:",
+                comment.get("body", ""),
+                "",
+                _RULE,
+            ))
     
     # Join all sections with newlines
-    return "\n".join(sections)
+    return truncate_context("\n".join(sections), max_tokens)
+
+
+def truncate_context(context: str, max_tokens: Optional[int] = MAX_CONTEXT_TOKENS) -> str:
+    """
+    Cut a context down to about max_tokens, noting how much was dropped.
+    
+    The end is dropped (at a line break where possible), since metadata,
+    description and diffs come first and matter most.
+    
+    Args:
+        context: Formatted PR context
+        max_tokens: Approximate token cap (None for no cap)
+    
+    Returns:
+        The context, or its truncated beginning followed by a
+        "[... truncated about N tokens ...]" marker
+    """
+    max_chars = None if max_tokens is None else max_tokens * CHARS_PER_TOKEN
+    if max_chars is None or len(context) <= max_chars:
+        return context
+    
+    cut = context.rfind("\n", 0, max_chars)
+    if cut <= 0:
+        cut = max_chars
+    dropped = (len(context) - cut) // CHARS_PER_TOKEN
+    logger.warning(
+        f"Truncated PR context from about {len(context) // CHARS_PER_TOKEN} "
+        f"to {cut // CHARS_PER_TOKEN} tokens"
+    )
+    return f"{context[:cut]}\n[... truncated about {dropped} tokens ...]"
+
+
+def build_classification_info(pr_data: Dict[str, Any]) -> str:
+    """
+    Build the classification summary used in the issue generation prompt.
+
+    Rendered once when a classification is saved (stored in the
+    classification_info column) and on the fly for rows saved before that
+    column existed.
+
+    Args:
+        pr_data: Dict containing classification fields (difficulty,
+            task_clarity, onboarding_suitability, is_reproducible, categories,
+            concepts_taught, prerequisites, reasoning) and classified_at
+
+    Returns:
+        Multi-line summary, or "No classification available" if the PR
+        hasn't been classified
+    """
+    if not pr_data.get("classified_at"):
+        # No classification - that's okay
+        return "No classification available"
 
+    return f"""Difficulty: {pr_data.get('difficulty', 'Unknown')}
+Task Clarity: {pr_data.get('task_clarity', 'Unknown')}
+Onboarding Suitability: {pr_data.get('onboarding_suitability', 'Unknown')}
+Is Reproducible: {pr_data.get('is_reproducible', 'Unknown')}
+Categories: {', '.join(pr_data.get('categories', []))}
+Concepts Taught: {', '.join(pr_data.get('concepts_taught', []))}
+Prerequisites: {', '.join(pr_data.get('prerequisites', []))}
+Reasoning: {pr_data.get('reasoning', 'N/A')}"""
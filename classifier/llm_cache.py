@@ -0,0 +1,90 @@
+"""
+On-disk cache of LLM responses for identical requests.
+
+At temperature 0 the same request gets the same answer, so re-running the
+classifier (dev iteration, retried batches, duplicate PRs) can reuse earlier
+responses instead of paying for another API round-trip. Entries are stored
+in a small SQLite database keyed by a hash of the full request.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import orjson
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def cache_key(request: Dict[str, Any]) -> str:
+    """
+    Hash a chat completion request into a cache key.
+
+    The request is every argument sent to the API (model, messages,
+    temperature, max_tokens, JSON mode options...), so any change to it
+    is a different key.
+    """
+    return hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class LLMCache:
+    """
+    Exact-match LLM response cache backed by SQLite.
+
+    Safe to share between threads and between concurrent tasks on one
+    event loop; lookups are local disk reads, far cheaper than the API call
+    they replace.
+    """
+
+    def __init__(self, directory: Union[str, Path] = ".cache/llm"):
+        """
+        Open (or create) the cache.
+
+        Args:
+            directory: Directory holding the cache database (default .cache/llm)
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path / "responses.sqlite3", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self.stats["hits" if row else "misses"] += 1
+        return row[0] if row else None
+
+    def set(self, key: str, response: str) -> None:
+        """Store the response for a key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)", (key, response)
+            )
+            self._conn.commit()
+
+    def log_stats(self) -> None:
+        """Log the hit rate since the cache was opened."""
+        total = self.stats["hits"] + self.stats["misses"]
+        if total:
+            logger.info(
+                f"LLM cache: {self.stats['hits']}/{total} hits "
+                f"({self.stats['hits'] / total:.0%})"
+            )
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
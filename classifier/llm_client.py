@@ -5,13 +5,82 @@ Uses OpenAI Python SDK which supports both OpenAI and Anthropic models,
 providing a unified interface for both providers.
 """
 
-from typing import Optional
-from openai import OpenAI
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from classifier import batch
+from classifier.llm_cache import LLMCache, cache_key
+from classifier.rate_limiter import RateLimiter
 from utils.logger import setup_logger
 
+# Tool the model is forced to call when JSON mode is emulated with tool use
+JSON_TOOL_NAME = "submit_json"
+
+# API endpoints per provider (Anthropic through its OpenAI-compatible API)
+BASE_URLS = {
+    "anthropic": "https://api.anthropic.com/v1",
+    "openai": "https://api.openai.com/v1",
+}
+
 logger = setup_logger(__name__)
 
 
+def strict_json_schema(schema: dict) -> dict:
+    """
+    Copy a JSON schema in the form OpenAI's strict structured outputs require.
+    
+    Every object must list all its properties as required and forbid
+    additional ones (Pydantic's model_json_schema() does neither).
+    """
+    if isinstance(schema, list):
+        return [strict_json_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    
+    strict = {key: strict_json_schema(value) for key, value in schema.items()}
+    if strict.get("type") == "object" and "properties" in strict:
+        strict["required"] = list(strict["properties"])
+        strict["additionalProperties"] = False
+    return strict
+
+
+class _JSONObjectScanner:
+    """
+    Finds where the first top-level JSON object in streamed text ends.
+    
+    Braces inside JSON strings (e.g. in a reasoning field) are ignored.
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+    
+    def feed(self, text: str) -> Optional[int]:
+        """Scan the next chunk; return the index just past the closing brace, if it's in this chunk."""
+        for i, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"' and self.depth:
+                self.in_string = True
+            elif char == "{":
+                self.depth += 1
+            elif char == "}" and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    return i + 1
+        return None
+
+
 class LLMClient:
     """
     Client for interacting with LLM providers.
@@ -26,7 +95,11 @@ class LLMClient:
         model: str,
         api_key: str,
         temperature: float = 0.0,
-        max_tokens: int = 16384
+        max_tokens: int = 16384,
+        http_client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[LLMCache] = None,
+        max_retries: int = 2,
+        requests_per_minute: Optional[int] = None
     ):
         """
         Initialize LLM client.
@@ -39,6 +112,16 @@ class LLMClient:
             max_tokens: Maximum tokens in response (default 16384)
                        Claude 4.5 Sonnet supports up to 64000 tokens output
                        Note: max_tokens is required for Anthropic API and cannot be omitted
+            http_client: Optional shared httpx.AsyncClient for the async methods, so
+                         connections are pooled across clients (e.g. one per API process)
+            cache: Optional LLMCache. At temperature 0, identical requests are
+                   answered from it instead of calling the API again
+            max_retries: Retries on rate limits (429), overload and server
+                        errors, connection errors and timeouts (default 2).
+                        The SDK backs off exponentially with jitter and
+                        honors the provider's Retry-After headers.
+            requests_per_minute: Optional limit; requests are spaced evenly
+                                so this client stays under it
         
         Raises:
             ValueError: If provider is not supported or API key is missing
@@ -47,6 +130,10 @@ class LLMClient:
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.cache = cache
+        self._api_key = api_key
+        # Futures of identical async requests in flight, by request hash
+        self._inflight: Dict[str, asyncio.Future] = {}
         
         # Validate provider
         if self.provider not in ["anthropic", "openai"]:
@@ -58,17 +145,27 @@ class LLMClient:
         
         # Initialize OpenAI client
         # For Anthropic, OpenAI SDK uses base_url and api_key
-        if self.provider == "anthropic":
-            self.client = OpenAI(
-                api_key=api_key,
-                base_url="https://api.anthropic.com/v1"
-            )
-        else:
-            self.client = OpenAI(api_key=api_key)
+        base_url = BASE_URLS[self.provider]
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries)
+        self.async_client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=http_client,
+            max_retries=max_retries
+        )
+        self.rate_limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
         
         logger.info(f"Initialized LLMClient: provider={provider}, model={model}")
     
-    def send_prompt(self, prompt: str, system: Optional[str] = None) -> str:
+    def send_prompt(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        json_schema: Optional[dict] = None,
+        use_cache: bool = True,
+        stop_after_json: bool = False,
+        max_tokens: Optional[int] = None
+    ) -> str:
         """
         Send a prompt to the LLM and get a text response.
         
@@ -78,6 +175,18 @@ class LLMClient:
         Args:
             prompt: The prompt text to send
             system: Optional system message (for Anthropic/OpenAI)
+            json_schema: Optional JSON schema. When given, the provider's JSON
+                        mode is used so the response is a raw JSON object
+                        (see _json_mode_kwargs)
+            use_cache: Whether a cached response may be returned (default True).
+                      Pass False to force a fresh answer, e.g. when retrying
+                      after the cached one was rejected; it still replaces
+                      the cached entry.
+            stop_after_json: Stream the response and stop reading as soon as
+                            the first JSON object is complete, dropping any
+                            text the model adds after it. Only used without
+                            json_schema (JSON mode already ends there).
+            max_tokens: Token budget for this call (default: the client's max_tokens)
         
         Returns:
             Text response from the LLM
@@ -88,52 +197,110 @@ class LLMClient:
         try:
             logger.debug(f"Sending prompt to {self.provider} ({len(prompt)} chars)")
             
-            # Build messages
-            messages = [{"role": "user", "content": prompt}]
+            # Make API call
+            request = {**self._chat_kwargs(prompt, system, max_tokens), **self._json_mode_kwargs(json_schema)}
+            key, cached = self._cache_lookup(request, use_cache)
+            if cached is not None:
+                return cached
             
-            # For Anthropic, system messages are handled differently
-            # But OpenAI SDK normalizes this for us
-            kwargs = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": self.temperature,
-                "max_tokens": self.max_tokens,
-            }
+            if stop_after_json and json_schema is None:
+                response_text = self._stream_until_json(self._create(**request, stream=True))
+            else:
+                response = self._create(**request)
+                response_text = self._response_text(response, tool_call=self._uses_tool_call(json_schema))
+            self._cache_store(key, response_text)
+            return response_text
             
-            if system:
-                # For providers that support system messages
-                kwargs["messages"].insert(0, {"role": "system", "content": system})
+        except Exception as e:
+            logger.error(f"LLM API call failed: {e}")
+            raise
+    
+    async def send_prompt_async(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        json_schema: Optional[dict] = None,
+        use_cache: bool = True,
+        stop_after_json: bool = False,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Async version of send_prompt(), used for concurrent batch classification.
+        
+        Args:
+            prompt: The prompt text to send
+            system: Optional system message (for Anthropic/OpenAI)
+            json_schema: Optional JSON schema to enable JSON mode (see send_prompt())
+            use_cache: Whether a cached response may be returned (see send_prompt())
+            stop_after_json: Stop reading once the JSON object is complete (see send_prompt())
+            max_tokens: Token budget for this call (default: the client's max_tokens)
+        
+        Returns:
+            Text response from the LLM
+        
+        Raises:
+            Exception: If API call fails (auth, rate limit, etc.)
+        """
+        try:
+            logger.debug(f"Sending prompt to {self.provider} ({len(prompt)} chars)")
             
-            # Make API call
-            response = self.client.chat.completions.create(**kwargs)
+            request = {**self._chat_kwargs(prompt, system, max_tokens), **self._json_mode_kwargs(json_schema)}
+            key, cached = self._cache_lookup(request, use_cache)
+            if cached is not None:
+                return cached
             
-            # Extract response text
-            response_text = response.choices[0].message.content
+            # An identical deterministic request already in flight (e.g. two
+            # PRs with the same context) answers this one too. Fresh answers
+            # (use_cache=False) always get their own request.
+            flight_key = None
+            if use_cache and self.temperature == 0:
+                flight_key = key or cache_key(request)
+                if flight_key in self._inflight:
+                    logger.debug("Joining identical in-flight LLM request")
+                    # Shielded so a cancelled waiter doesn't cancel the shared request
+                    return await asyncio.shield(self._inflight[flight_key])
+                future = self._inflight[flight_key] = asyncio.get_running_loop().create_future()
             
-            # Log token usage
-            if hasattr(response, "usage") and response.usage:
-                logger.info(
-                    f"LLM usage: {response.usage.prompt_tokens} prompt tokens, "
-                    f"{response.usage.completion_tokens} completion tokens, "
-                    f"{response.usage.total_tokens} total"
-                )
+            try:
+                if stop_after_json and json_schema is None:
+                    stream = await self._acreate(**request, stream=True)
+                    response_text = await self._stream_until_json_async(stream)
+                else:
+                    response = await self._acreate(**request)
+                    response_text = self._response_text(response, tool_call=self._uses_tool_call(json_schema))
+                if flight_key is not None:
+                    future.set_result(response_text)
+            except Exception as e:
+                if flight_key is not None:
+                    future.set_exception(e)
+                    future.exception()  # Raised here; don't warn if nobody else was waiting
+                raise
+            finally:
+                if flight_key is not None:
+                    self._inflight.pop(flight_key, None)
+                    if not future.done():
+                        future.cancel()
             
-            logger.debug(f"Received response from {self.provider} ({len(response_text)} chars)")
+            self._cache_store(key, response_text)
             return response_text
             
         except Exception as e:
             logger.error(f"LLM API call failed: {e}")
             raise
     
-    def generate_issue(self, prompt: str) -> str:
+    def generate_issue(self, prompt: str, max_tokens: Optional[int] = None) -> str:
         """
         Generate a student-facing issue from a PR using LLM.
         
         Similar to send_prompt() but specifically for issue generation.
         Expects plain markdown output (no JSON parsing needed).
         
+        If the response is cut off at the token budget, retries once with
+        double the budget, so a small default budget stays safe for long issues.
+        
         Args:
             prompt: The complete prompt including PR context and instructions
+            max_tokens: Token budget for this call (default: the client's max_tokens)
         
         Returns:
             str: The generated issue in markdown format (may be empty if LLM returns empty)
@@ -144,35 +311,356 @@ class LLMClient:
         try:
             logger.debug(f"Generating issue with {self.provider} ({len(prompt)} chars)")
             
-            # Build messages
-            messages = [{"role": "user", "content": prompt}]
+            # Make API call
+            budget = max_tokens or self.max_tokens
+            request = self._chat_kwargs(prompt, max_tokens=budget)
+            key, cached = self._cache_lookup(request)
+            if cached is not None:
+                return cached
             
-            kwargs = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": self.temperature,
-                "max_tokens": self.max_tokens,
-            }
+            response = self._create(**request)
             
-            # Make API call
-            response = self.client.chat.completions.create(**kwargs)
+            if self._hit_token_limit(response):
+                logger.warning(f"Issue hit the {budget}-token limit, retrying with {budget * 2}")
+                response = self._create(
+                    **self._chat_kwargs(prompt, max_tokens=budget * 2)
+                )
+            
+            issue_text = self._issue_text(response)
+            self._cache_store(key, issue_text)
+            return issue_text
+            
+        except Exception as e:
+            logger.error(f"Issue generation API call failed: {e}")
+            raise
+    
+    async def generate_issue_async(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """
+        Async version of generate_issue() for use inside the API event loop.
+        
+        Uses the AsyncOpenAI client, so the request doesn't block the event loop
+        and shares the connection pool passed in as http_client.
+        
+        Args:
+            prompt: The complete prompt including PR context and instructions
+            max_tokens: Token budget for this call (default: the client's max_tokens)
+        
+        Returns:
+            str: The generated issue in markdown format (may be empty if LLM returns empty)
+        
+        Raises:
+            Exception: If API call fails (auth, rate limit, network errors, etc.)
+        """
+        try:
+            logger.debug(f"Generating issue with {self.provider} ({len(prompt)} chars)")
+            
+            budget = max_tokens or self.max_tokens
+            request = self._chat_kwargs(prompt, max_tokens=budget)
+            key, cached = self._cache_lookup(request)
+            if cached is not None:
+                return cached
             
-            # Extract response text
-            response_text = response.choices[0].message.content
+            response = await self._acreate(**request)
             
-            # Log token usage
-            if hasattr(response, "usage") and response.usage:
-                logger.info(
-                    f"Issue generation usage: {response.usage.prompt_tokens} prompt tokens, "
-                    f"{response.usage.completion_tokens} completion tokens, "
-                    f"{response.usage.total_tokens} total"
+            if self._hit_token_limit(response):
+                logger.warning(f"Issue hit the {budget}-token limit, retrying with {budget * 2}")
+                response = await self._acreate(
+                    **self._chat_kwargs(prompt, max_tokens=budget * 2)
                 )
             
-            logger.info(f"Generated issue ({len(response_text) if response_text else 0} chars)")
+            issue_text = self._issue_text(response)
+            self._cache_store(key, issue_text)
+            return issue_text
+            
+        except Exception as e:
+            logger.error(f"Issue generation API call failed: {e}")
+            raise
+    
+    async def stream_issue(self, prompt: str, max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Generate an issue like generate_issue_async(), yielding text as it arrives.
+        
+        Lets the API forward tokens to the browser instead of waiting for the
+        whole completion. Text already sent can't be taken back, so unlike
+        generate_issue_async() there is no retry when the token limit is hit.
+        
+        Args:
+            prompt: The complete prompt including PR context and instructions
+            max_tokens: Token budget for this call (default: the client's max_tokens)
+        
+        Yields:
+            str: Chunks of the generated markdown, in order
+        
+        Raises:
+            Exception: If API call fails (auth, rate limit, network errors, etc.)
+        """
+        try:
+            logger.debug(f"Streaming issue from {self.provider} ({len(prompt)} chars)")
+            
+            stream = await self._acreate(
+                **self._chat_kwargs(prompt, max_tokens=max_tokens), stream=True
+            )
             
-            # Return response as-is, even if empty
-            return response_text if response_text else ""
+            total_chars = 0
+            async for chunk in stream:
+                # Some chunks (e.g. a trailing usage chunk) carry no choices
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    total_chars += len(delta)
+                    yield delta
+            
+            logger.info(f"Streamed issue ({total_chars} chars)")
             
         except Exception as e:
             logger.error(f"Issue generation API call failed: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    def submit_batch(
+        self,
+        prompts: Dict[str, str],
+        system: Optional[str] = None,
+        json_schema: Optional[dict] = None
+    ) -> str:
+        """
+        Submit prompts to the provider's batch API (about half the price, results within 24h).
+        
+        Args:
+            prompts: Dict mapping a custom ID to each prompt. IDs are returned
+                    with the results; Anthropic only allows letters, digits,
+                    - and _ in them.
+            system: Optional system message shared by every request
+            json_schema: Optional JSON schema to enable JSON mode (see send_prompt())
+        
+        Returns:
+            Batch ID to pass to poll_batch()
+        
+        Raises:
+            Exception: If the submission fails
+        """
+        try:
+            requests = {
+                custom_id: {**self._chat_kwargs(prompt, system), **self._json_mode_kwargs(json_schema)}
+                for custom_id, prompt in prompts.items()
+            }
+            
+            if self.provider == "openai":
+                batch_id = batch.submit_openai_batch(self.client, requests)
+            else:
+                requests = {
+                    custom_id: batch.anthropic_params(request, json_schema, JSON_TOOL_NAME)
+                    for custom_id, request in requests.items()
+                }
+                with httpx.Client(timeout=120.0) as http:
+                    batch_id = batch.submit_anthropic_batch(http, self._api_key, requests)
+            
+            logger.info(f"Submitted batch {batch_id} ({len(prompts)} requests)")
+            return batch_id
+            
+        except Exception as e:
+            logger.error(f"Batch submission failed: {e}")
+            raise
+    
+    def poll_batch(self, batch_id: str, poll_interval: float = 60.0) -> Dict[str, str]:
+        """
+        Wait for a batch submitted with submit_batch() to finish.
+        
+        Args:
+            batch_id: ID returned by submit_batch()
+            poll_interval: Seconds between status checks (default 60)
+        
+        Returns:
+            Dict mapping custom ID to response text. Requests that failed or
+            expired are left out.
+        """
+        while True:
+            results = self.batch_results(batch_id)
+            if results is not None:
+                logger.info(f"Batch {batch_id} finished ({len(results)} responses)")
+                return results
+            time.sleep(poll_interval)
+    
+    def batch_results(self, batch_id: str) -> Optional[Dict[str, str]]:
+        """Check a batch once: its results if it has finished, else None."""
+        if self.provider == "openai":
+            return batch.openai_batch_results(self.client, batch_id)
+        with httpx.Client(timeout=120.0) as http:
+            return batch.anthropic_batch_results(http, self._api_key, batch_id)
+    
+    def _create(self, **kwargs):
+        """chat.completions.create(), paced by the rate limiter if there is one."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait()
+        return self.client.chat.completions.create(**kwargs)
+    
+    async def _acreate(self, **kwargs):
+        """Async chat.completions.create(), paced by the rate limiter if there is one."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.wait_async()
+        return await self.async_client.chat.completions.create(**kwargs)
+    
+    def _chat_kwargs(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> dict:
+        """Build chat completion arguments for a single-turn prompt."""
+        messages = [{"role": "user", "content": prompt}]
+        
+        if system:
+            # For providers that support system messages
+            # (the OpenAI SDK normalizes this for Anthropic too)
+            messages.insert(0, {"role": "system", "content": system})
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": max_tokens or self.max_tokens,
+        }
+    
+    @staticmethod
+    def _hit_token_limit(response) -> bool:
+        """Check whether a chat completion stopped because it ran out of tokens."""
+        return response.choices[0].finish_reason == "length"
+    
+    def _cache_lookup(self, request: dict, use_cache: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a request in the response cache.
+        
+        Returns:
+            (key, cached_response). key is None when the request isn't cacheable
+            (no cache, or temperature > 0 so answers can differ between calls);
+            cached_response is None on a miss or when use_cache is False.
+        """
+        if self.cache is None or self.temperature != 0:
+            return None, None
+        key = cache_key(request)
+        if not use_cache:
+            return key, None
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug(f"LLM cache hit ({len(cached)} chars)")
+        return key, cached
+    
+    def _cache_store(self, key: Optional[str], response_text: str) -> None:
+        """Cache a response (empty responses aren't worth keeping)."""
+        if key is not None and response_text:
+            self.cache.set(key, response_text)
+    
+    def _json_mode_kwargs(self, json_schema: Optional[dict]) -> dict:
+        """
+        Extra chat completion arguments that make the provider return JSON.
+        
+        OpenAI decodes against the schema itself (strict structured outputs),
+        so the response always matches it. Anthropic's OpenAI-compatible
+        endpoint ignores response_format, so there the schema is sent as a
+        single tool the model is forced to call; the tool arguments are the
+        JSON object.
+        """
+        if json_schema is None:
+            return {}
+        
+        if self.provider == "openai":
+            return {
+                "response_format": {
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": json_schema.get("title", "response"),
+                        "strict": True,
+                        "schema": strict_json_schema(json_schema),
+                    },
+                }
+            }
+        
+        return {
+            "tools": [{
+                "type": "function",
+                "function": {
+                    "name": JSON_TOOL_NAME,
+                    "description": "Return the requested JSON object.",
+                    "parameters": json_schema,
+                },
+            }],
+            "tool_choice": {"type": "function", "function": {"name": JSON_TOOL_NAME}},
+        }
+    
+    def _uses_tool_call(self, json_schema: Optional[dict]) -> bool:
+        """Whether the JSON answer comes back as tool call arguments."""
+        return json_schema is not None and self.provider == "anthropic"
+    
+    def _response_text(self, response, tool_call: bool = False) -> str:
+        """Extract the text of a chat completion and log token usage."""
+        message = response.choices[0].message
+        response_text = message.tool_calls[0].function.arguments if tool_call else message.content
+        self._log_usage(response, "LLM usage")
+        logger.debug(f"Received response from {self.provider} ({len(response_text)} chars)")
+        return response_text
+    
+    @staticmethod
+    def _log_usage(response, label: str) -> None:
+        """Log a completion's token usage (cached = prompt prefix served from the provider's prompt cache)."""
+        # Skip building the message when INFO is off (e.g. large batch runs at WARNING)
+        usage = getattr(response, "usage", None)
+        if not usage or not logger.isEnabledFor(logging.INFO):
+            return
+        cached = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+        logger.info(
+            f"{label}: {usage.prompt_tokens} prompt tokens"
+            f"{f' ({cached} cached)' if isinstance(cached, int) and cached else ''}, "
+            f"{usage.completion_tokens} completion tokens, "
+            f"{usage.total_tokens} total"
+        )
+    
+    def _stream_until_json(self, stream) -> str:
+        """Read a streamed completion until its first JSON object is complete, then close it."""
+        scanner = _JSONObjectScanner()
+        parts = []
+        try:
+            for chunk in stream:
+                if self._append_until_json(chunk, scanner, parts):
+                    break
+        finally:
+            stream.close()
+        return self._streamed_text(parts)
+    
+    async def _stream_until_json_async(self, stream) -> str:
+        """Async version of _stream_until_json()."""
+        scanner = _JSONObjectScanner()
+        parts = []
+        try:
+            async for chunk in stream:
+                if self._append_until_json(chunk, scanner, parts):
+                    break
+        finally:
+            await stream.close()
+        return self._streamed_text(parts)
+    
+    @staticmethod
+    def _append_until_json(chunk, scanner: _JSONObjectScanner, parts: list) -> bool:
+        """Add a chunk's text to parts, cut at the end of the JSON object; True once it's complete."""
+        if not chunk.choices:
+            return False
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            return False
+        end = scanner.feed(delta)
+        parts.append(delta if end is None else delta[:end])
+        return end is not None
+    
+    def _streamed_text(self, parts: list) -> str:
+        """Join streamed text and log its size."""
+        response_text = "".join(parts)
+        logger.debug(f"Received streamed response from {self.provider} ({len(response_text)} chars)")
+        return response_text
+    
+    def _issue_text(self, response) -> str:
+        """Extract the issue markdown from a chat completion and log usage."""
+        response_text = response.choices[0].message.content
+        self._log_usage(response, "Issue generation usage")
+        logger.info(f"Generated issue ({len(response_text) if response_text else 0} chars)")
+        
+        # Return response as-is, even if empty
+        return response_text if response_text else ""
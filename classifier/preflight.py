@@ -0,0 +1,132 @@
+"""
+Rule-based classification of PRs that don't need an LLM.
+
+Automated dependency bumps, lockfile-only updates and whitespace-only
+reformatting are never good onboarding material, and they are easy to spot
+from the title and diff. Classifying them here skips the LLM call entirely.
+The rules only match when they are certain; anything else returns None and
+goes to the LLM.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Titles written by dependency bots (Dependabot, Renovate, pre-commit.ci)
+_BOT_TITLE_RE = re.compile(
+    r"^(?:"
+    r"(?:build|chore|fix)\(deps(?:-dev)?\): (?:bump|update) "  # Dependabot/Renovate with conventional commits
+    r"|bump \S+ from \S+ to \S+"                              # Dependabot
+    r"|update dependency \S+ to \S+"                          # Renovate
+    r"|update \S+ digest to \S+"                              # Renovate (Docker/GitHub Actions digests)
+    r"|\[pre-commit\.ci\] pre-commit autoupdate"              # pre-commit.ci
+    r")",
+    re.IGNORECASE
+)
+
+# File headers some diffs (e.g. GitLab's) start with; not changed lines
+_DIFF_HEADERS = ("--- a/", "+++ b/", "--- /dev/null", "+++ /dev/null")
+
+_INDENT_SENSITIVE = (".py", ".pyi", ".pyx", ".yml", ".yaml", ".coffee", ".haml", ".slim", ".sass", "Makefile")
+
+LOCKFILES = {
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "Pipfile.lock",
+    "uv.lock",
+    "Gemfile.lock",
+    "Cargo.lock",
+    "composer.lock",
+    "go.sum",
+}
+
+
+def trivial_classification(pr_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Classify a PR without the LLM if it is certainly trivial.
+
+    Args:
+        pr_data: Dict containing PR information (as accepted by Classifier.classify_pr())
+
+    Returns:
+        Classification dict (same keys as an LLM classification), or None if
+        the PR needs the LLM
+    """
+    title = (pr_data.get("title") or "").strip()
+    files = pr_data.get("files") or []
+    # Stored PRs nest the list: {'files': [...], 'summary': {...}}
+    if isinstance(files, dict):
+        files = files.get("files") or []
+
+    if _BOT_TITLE_RE.match(title):
+        return _poor_classification(
+            ["dependencies"],
+            "Automated dependency update (matched a dependency bot's PR title), "
+            "classified by rule without the LLM. Version bumps are one-off "
+            "maintenance with no problem to reproduce."
+        )
+
+    if files and all(_basename(f.get("filename", "")) in LOCKFILES for f in files):
+        return _poor_classification(
+            ["dependencies"],
+            "Only lockfiles changed, classified by rule without the LLM. "
+            "Regenerated lockfiles are tool output with nothing to learn from."
+        )
+
+    if files and all(_whitespace_only(f) for f in files):
+        return _poor_classification(
+            ["formatting"],
+            "Only whitespace changed, classified by rule without the LLM. "
+            "Reformatting has no behavior to reproduce or verify."
+        )
+
+    return None
+
+
+def _poor_classification(categories: List[str], reasoning: str) -> Dict[str, Any]:
+    """A trivial, poor-onboarding classification."""
+    return {
+        "difficulty": "trivial",
+        "task_clarity": "poor",
+        "is_reproducible": "unclear",
+        "onboarding_suitability": "poor",
+        "categories": categories,
+        "concepts_taught": ["Repository maintenance"],
+        "prerequisites": ["None"],
+        "reasoning": reasoning,
+    }
+
+
+def _basename(path: str) -> str:
+    """File name without its directory."""
+    return path.rsplit("/", 1)[-1]
+
+
+def _whitespace_only(file: Dict[str, Any]) -> bool:
+    """Whether a file's diff only adds/removes whitespace (needs the full diff to tell)."""
+    patch = file.get("patch")
+    if not patch or file.get("patch_truncated") or file.get("status") not in ("modified", None):
+        return False
+
+    # Where indentation is syntax, only trailing whitespace is ignorable
+    if _basename(file.get("filename", "")).endswith(_INDENT_SENSITIVE):
+        normalize = str.rstrip
+    else:
+        normalize = lambda text: "".join(text.split())
+
+    removed, added = Counter(), Counter()
+    for line in patch.splitlines():
+        if line.startswith(_DIFF_HEADERS):
+            continue
+        if line.startswith("-"):
+            removed[normalize(line[1:])] += 1
+        elif line.startswith("+"):
+            added[normalize(line[1:])] += 1
+
+    # Blank lines added or removed are whitespace too
+    removed.pop("", None)
+    added.pop("", None)
+    return removed == added
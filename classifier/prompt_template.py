@@ -5,6 +5,9 @@ This is a flexible template that will evolve as we develop the prompt.
 Keeping it as a separate configuration file makes iteration easy.
 """
 
+from string import Formatter
+from typing import List
+
 CLASSIFICATION_PROMPT = """You are helping identify pull requests that are good learning opportunities for developers new to a codebase.
 
 Your task is to analyze the PR and classify it based on technical complexity and onboarding suitability.
@@ -135,6 +138,44 @@ Now, analyze the following pull request:
 Return your classification as JSON:"""
 
 
+# Several PRs classified in one request share one copy of the field
+# definitions above; only the output format differs
+CLASSIFICATION_PROMPT_BATCH = CLASSIFICATION_PROMPT[:CLASSIFICATION_PROMPT.index("OUTPUT FORMAT:")] + """OUTPUT FORMAT:
+
+You will be given {pr_count} pull requests, numbered PR 1 to PR {pr_count}. Classify each one independently.
+
+Return ONLY a valid JSON object with this exact structure, holding one classification per pull request in the same order as the PRs:
+
+{{
+  "classifications": [
+    {{
+      "difficulty": "trivial" | "easy" | "medium" | "hard",
+      "task_clarity": "clear" | "partial" | "poor",
+      "is_reproducible": "highly likely" | "maybe" | "unclear",
+      "onboarding_suitability": "excellent" | "poor",
+      "categories": ["category1", "category2", ...],
+      "concepts_taught": ["concept1", "concept2", ...],
+      "prerequisites": ["prerequisite1", "prerequisite2", ...],
+      "reasoning": "Your explanation here"
+    }},
+    ...
+  ]
+}}
+
+IMPORTANT:
+- Return ONLY valid JSON, no other text
+- "classifications" must contain exactly {pr_count} objects, in PR order
+- All fields are required
+- categories, concepts_taught, and prerequisites should be non-empty arrays
+- Be specific and educational in your classifications
+
+Now, analyze the following pull requests:
+
+{pr_contexts}
+
+Return your classifications as JSON:"""
+
+
 ISSUE_GENERATION_PROMPT = """You are helping create training exercises for developers learning a new codebase.
 
 Your task is to analyze a pull request and generate a clear, actionable GitHub issue that a student could use to implement the same change independently.
@@ -253,3 +294,70 @@ CLASSIFICATION INFO:
 ---
 
 Generate the issue in markdown format:"""
+
+
+def _split_template(template: str, *fields: str) -> List[str]:
+    """
+    Pre-split a format template into its literal segments.
+
+    The template must contain exactly the given placeholders, once each and in
+    that order. Escaped braces ({{ }}) are resolved, so joining the returned
+    segments with the field values gives the same result as template.format().
+    This lets the constant prompts be filled by concatenation instead of having
+    str.format re-parse several KB of template on every call.
+
+    Returns:
+        len(fields) + 1 literal segments
+    """
+    # Formatter.parse also breaks at escaped braces, so accumulate the literal
+    # text and only start a new segment at each real placeholder
+    literals = [""]
+    found = []
+    for literal, field, _, _ in Formatter().parse(template):
+        literals[-1] += literal
+        if field is not None:
+            found.append(field)
+            literals.append("")
+    if tuple(found) != fields:
+        raise ValueError(f"Expected placeholders {fields}, found {tuple(found)}")
+    return literals
+
+
+_CLASSIFICATION_PARTS = _split_template(CLASSIFICATION_PROMPT, "pr_context")
+_CLASSIFICATION_BATCH_PARTS = _split_template(
+    CLASSIFICATION_PROMPT_BATCH, "pr_count", "pr_count", "pr_count", "pr_contexts"
+)
+_ISSUE_GENERATION_PARTS = _split_template(ISSUE_GENERATION_PROMPT, "pr_context", "classification_info")
+
+# CLASSIFICATION_PROMPT as a system message (the rubric and output format,
+# identical on every call so providers can cache it as a prompt prefix) and
+# a user message carrying the PR. Together they say the same as the full prompt.
+_USER_START = _CLASSIFICATION_PARTS[0].index("Now, analyze the following pull request:")
+CLASSIFICATION_SYSTEM = _CLASSIFICATION_PARTS[0][:_USER_START].rstrip()
+_CLASSIFICATION_USER_PREFIX = _CLASSIFICATION_PARTS[0][_USER_START:]
+
+
+def build_classification_prompt(pr_context: str) -> str:
+    """Fill CLASSIFICATION_PROMPT (same result as .format(pr_context=...))."""
+    prefix, suffix = _CLASSIFICATION_PARTS
+    return prefix + pr_context + suffix
+
+
+def build_classification_user_prompt(pr_context: str) -> str:
+    """User message sent after CLASSIFICATION_SYSTEM (the PR part of CLASSIFICATION_PROMPT)."""
+    return _CLASSIFICATION_USER_PREFIX + pr_context + _CLASSIFICATION_PARTS[1]
+
+
+def build_classification_batch_prompt(pr_contexts: List[str]) -> str:
+    """Fill CLASSIFICATION_PROMPT_BATCH with numbered PR contexts (without re-parsing the template)."""
+    numbered = "".join(
+        f"--- PR {i} ---\n\n{pr_context}\n\n" for i, pr_context in enumerate(pr_contexts, 1)
+    )
+    *count_parts, last = _CLASSIFICATION_BATCH_PARTS
+    return str(len(pr_contexts)).join(count_parts) + numbered + "---" + last
+
+
+def build_issue_generation_prompt(pr_context: str, classification_info: str) -> str:
+    """Fill ISSUE_GENERATION_PROMPT (same result as .format(pr_context=..., classification_info=...))."""
+    prefix, middle, suffix = _ISSUE_GENERATION_PARTS
+    return prefix + pr_context + middle + classification_info + suffix
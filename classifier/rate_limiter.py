@@ -0,0 +1,50 @@
+"""
+Client-side request pacing for LLM provider rate limits.
+
+The OpenAI SDK retries 429s with backoff, but every rejected request still
+counts against the limit and a burst of concurrent classifications trips it
+again. Spacing requests to the provider's requests-per-minute limit keeps the
+pipeline just under it instead.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Spaces requests evenly to stay under a requests-per-minute limit.
+
+    Each caller reserves the next free slot and sleeps until it, so
+    concurrent callers (threads or tasks) are released one interval apart.
+    """
+
+    def __init__(self, requests_per_minute: int):
+        """
+        Args:
+            requests_per_minute: Maximum requests started per minute
+        """
+        self.interval = 60.0 / requests_per_minute
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserve the next slot; return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+            return start - now
+
+    def wait(self) -> None:
+        """Block until this request may start."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self) -> None:
+        """Wait (without blocking the event loop) until this request may start."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
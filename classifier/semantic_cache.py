@@ -0,0 +1,166 @@
+"""
+Similarity cache of classifications for near-duplicate PRs.
+
+The exact-match LLMCache misses PRs whose context differs only slightly
+(e.g. the same dependency bump across repos). This cache compares the PR
+context of a new prompt to earlier ones and reuses the stored response when
+they are similar enough.
+
+Contexts are embedded as sparse bag-of-tokens vectors (identifiers, words
+and numbers, log-scaled counts, L2-normalized), so similarity is a cosine
+over shared tokens. Lookups go through an inverted index (token to the
+entries containing it), so only entries sharing a token with the query are
+scored. Only the PR context is embedded: the static prompt
+template is identical for every PR and would make all prompts look alike.
+"""
+
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import orjson
+from cachetools import LRUCache
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+
+DEFAULT_THRESHOLD = 0.92
+
+# Recently embedded texts; a miss is looked up and then stored with the same context
+_EMBED_MEMO_SIZE = 256
+
+
+def embed(text: str) -> Dict[str, float]:
+    """
+    Embed text as an L2-normalized sparse vector of token weights.
+
+    Args:
+        text: Text to embed (a PR context)
+
+    Returns:
+        Dict mapping token to weight (empty for text with no tokens)
+    """
+    counts = Counter(token.lower() for token in _TOKEN_RE.findall(text))
+    weights = {token: 1.0 + math.log(count) for token, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {token: w / norm for token, w in weights.items()} if norm else {}
+
+
+def cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(token, 0.0) for token, w in a.items())
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour response cache backed by SQLite.
+
+    Vectors are kept in memory, indexed by token, and persisted so later
+    runs start warm. Entries are grouped by namespace (provider/model), so a
+    response is never reused for a different model.
+    """
+
+    def __init__(self, directory: Union[str, Path] = ".cache/llm", threshold: float = DEFAULT_THRESHOLD):
+        """
+        Open (or create) the cache.
+
+        Args:
+            directory: Directory holding the cache database (default .cache/llm)
+            threshold: Minimum cosine similarity for a hit (default 0.92)
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path / "semantic.sqlite3", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(namespace TEXT NOT NULL, vector TEXT NOT NULL, response TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+        # Per namespace: stored responses, and token -> [(response index, weight)]
+        self._responses: Dict[str, List[str]] = {}
+        self._index: Dict[str, Dict[str, List[Tuple[int, float]]]] = {}
+        self._embeddings: LRUCache = LRUCache(maxsize=_EMBED_MEMO_SIZE)
+        for namespace, vector, response in self._conn.execute(
+            "SELECT namespace, vector, response FROM entries"
+        ):
+            self._add(namespace, orjson.loads(vector), response)
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, namespace: str, text: str) -> Optional[str]:
+        """
+        Return the response stored for the most similar text, or None.
+
+        Args:
+            namespace: Entry group to search (e.g. "anthropic/claude-...")
+            text: Text to match (a PR context)
+        """
+        with self._lock:
+            vector = self._embed(text)
+            index = self._index.get(namespace, {})
+            scores: Dict[int, float] = defaultdict(float)
+            for token, weight in vector.items():
+                for entry, stored_weight in index.get(token, ()):
+                    scores[entry] += weight * stored_weight
+
+            best = max(scores, key=scores.__getitem__, default=None)
+            if best is not None and scores[best] >= self.threshold:
+                self.stats["hits"] += 1
+                logger.debug(f"Semantic cache hit (similarity {scores[best]:.3f})")
+                return self._responses[namespace][best]
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, namespace: str, text: str, response: str) -> None:
+        """Store the response for a text."""
+        with self._lock:
+            vector = self._embed(text)
+            if not vector:
+                return
+            self._add(namespace, vector, response)
+            self._conn.execute(
+                "INSERT INTO entries (namespace, vector, response) VALUES (?, ?, ?)",
+                (namespace, orjson.dumps(vector).decode(), response)
+            )
+            self._conn.commit()
+
+    def _embed(self, text: str) -> Dict[str, float]:
+        """embed(), memoized for recent texts (call with the lock held)."""
+        vector = self._embeddings.get(text)
+        if vector is None:
+            vector = self._embeddings[text] = embed(text)
+        return vector
+
+    def _add(self, namespace: str, vector: Dict[str, float], response: str) -> None:
+        """Add an entry to the in-memory index (call with the lock held)."""
+        responses = self._responses.setdefault(namespace, [])
+        index = self._index.setdefault(namespace, {})
+        for token, weight in vector.items():
+            index.setdefault(token, []).append((len(responses), weight))
+        responses.append(response)
+
+    def log_stats(self) -> None:
+        """Log the hit rate since the cache was opened."""
+        total = self.stats["hits"] + self.stats["misses"]
+        if total:
+            logger.info(
+                f"Semantic cache: {self.stats['hits']}/{total} hits "
+                f"({self.stats['hits'] / total:.0%})"
+            )
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
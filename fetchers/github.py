@@ -5,16 +5,71 @@ This module implements both phases of the two-phase fetch workflow:
 - Phase 2 (Enrichment): Fetch PR files, diffs, and linked issues (expensive, per-PR)
 """
 
+import io
 import logging
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
 
+import orjson
 import requests
+from cachetools import LRUCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from fetchers.http_cache import CachedResponse, ResponseCache, request_key
 
 logger = logging.getLogger(__name__)
 
+# Matches: fix/fixes/fixed/close/closes/closed/resolve/resolves/resolved #123
+_ISSUE_LINK_RE = re.compile(r'(?:fix(?:es|ed)?|close[sd]?|resolve[sd]?)\s+#(\d+)', re.IGNORECASE)
+
+# One Link header entry: <url>; rel="next"
+_LINK_RE = re.compile(r'<([^>]+)>;\s*rel="([^"]+)"')
+
+# Requests kept in reserve per rate limit window; below this, wait for the reset
+RATE_LIMIT_RESERVE = 50
+
+# Linked issues kept in memory for other PRs that link them
+ISSUE_CACHE_SIZE = 1024
+
+# Requests in flight at once (GitHub's secondary limits punish large bursts)
+MAX_CONCURRENT_REQUESTS = 10
+
+
+def _json(response: requests.Response) -> Any:
+    """Parse a response body (orjson is several times faster on large pages and patches)."""
+    return orjson.loads(response.content)
+
+
+def _cached_response(cached: CachedResponse, not_modified: requests.Response) -> requests.Response:
+    """Build a 200 response from a cached body, for a request answered with 304.
+    
+    Headers describe the cached body; the 304's rate limit headers are kept
+    because they are current.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.url = not_modified.url
+    response.request = not_modified.request
+    response.encoding = "utf-8"
+    response.raw = io.BytesIO(cached.body)
+    response.headers.update({
+        name: value for name, value in not_modified.headers.items()
+        if name.lower().startswith("x-ratelimit-")
+    })
+    response.headers["Content-Type"] = "application/json; charset=utf-8"
+    response.headers["Content-Length"] = str(len(cached.body))
+    response.headers["ETag"] = cached.etag
+    if cached.link:
+        response.headers["Link"] = cached.link
+    return response
+
 
 class GitHubFetcher:
     """Fetch pull request data from GitHub API.
@@ -23,24 +78,63 @@ class GitHubFetcher:
     When GitLab support is added (Milestone 19), we can extract a common interface.
     """
     
-    def __init__(self, token: str):
+    def __init__(
+        self,
+        token: str,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        cache: Optional[ResponseCache] = None
+    ):
         """Initialize GitHub API client.
         
         Args:
             token: GitHub personal access token for authentication
+            max_concurrent: Maximum requests in flight at once (default: 10)
+            cache: Response cache for conditional requests (optional)
         """
         self.token = token
+        self.cache = cache
         self.base_url = "https://api.github.com"
         self.headers = {
             "Accept": "application/vnd.github+json",
             "Authorization": f"Bearer {token}",
             "X-GitHub-Api-Version": "2022-11-28"
         }
+        
+        # Keep-alive connections reused across requests (and worker threads);
+        # transient gateway errors are retried with backoff
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max_concurrent,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        ))
+        
+        # Linked issues (with comments) already fetched this run; several PRs
+        # often link the same issue. Striped locks make concurrent misses for
+        # one issue fetch it once.
+        self._issue_cache: LRUCache = LRUCache(maxsize=ISSUE_CACHE_SIZE)
+        self._issue_cache_lock = threading.Lock()
+        self._issue_fetch_locks = [threading.Lock() for _ in range(16)]
+        
+        # Rate limit state from the latest response (shared by worker threads)
+        self.max_concurrent = max_concurrent
+        self._in_flight = threading.BoundedSemaphore(max_concurrent)
+        self._rate_lock = threading.Lock()
+        self._rate_remaining: Optional[int] = None
+        self._rate_reset: float = 0.0
     
     def _make_github_request(self, url: str, params: Optional[dict] = None) -> requests.Response:
         """Make GitHub API request with automatic rate limit handling.
         
-        If rate limited (429), waits until rate limit resets and retries.
+        Requests are throttled before they are sent: once fewer than
+        RATE_LIMIT_RESERVE requests remain in the window, callers wait for
+        the reset instead of spending requests on rejections. If rate limited
+        anyway (429, or a 403 secondary limit), waits for Retry-After or the
+        reset and retries.
+        
+        With a response cache, requests carry the stored ETag; a 304 Not
+        Modified (free against the rate limit) is answered from the cache.
         
         Args:
             url: GitHub API URL to request
@@ -52,35 +146,114 @@ class GitHubFetcher:
         Raises:
             requests.HTTPError: On non-rate-limit errors (401, 403, 404, etc.)
         """
+        key = request_key(url, params) if self.cache else None
+        cached = self.cache.get(key) if self.cache else None
+        headers = {"If-None-Match": cached.etag} if cached else None
+        
         while True:
-            response = requests.get(url, headers=self.headers, params=params)
+            self._wait_for_rate_limit()
+            with self._in_flight:
+                response = self.session.get(url, headers=headers, params=params)
             
             # Log rate limit info
             remaining = response.headers.get("X-RateLimit-Remaining")
             limit = response.headers.get("X-RateLimit-Limit")
             if remaining and limit:
                 logger.debug(f"Rate limit: {remaining}/{limit} remaining")
+            self._record_rate_limit(response)
             
-            # Handle rate limiting (429)
-            if response.status_code == 429:
-                reset_time = int(response.headers.get("X-RateLimit-Reset", 0))
-                current_time = int(time.time())
-                wait_seconds = max(reset_time - current_time + 5, 60)  # +5 second buffer, minimum 60s
-                
-                reset_datetime = datetime.fromtimestamp(reset_time)
-                reset_str = reset_datetime.strftime("%H:%M:%S")
-                
+            # Handle rate limiting (429, or 403 for secondary/exhausted limits)
+            wait_seconds = self._rate_limit_wait(response)
+            if wait_seconds is not None:
+                resume_str = datetime.fromtimestamp(time.time() + wait_seconds).strftime("%H:%M:%S")
                 logger.warning(
-                    f"⏳ Rate limited! Waiting until {reset_str} "
+                    f"⏳ Rate limited! Waiting until {resume_str} "
                     f"({wait_seconds/60:.1f} minutes)..."
                 )
                 time.sleep(wait_seconds)
                 logger.info("Rate limit reset - resuming...")
                 continue  # Retry the request
             
+            if self.cache:
+                response = self._cache_response(key, cached, response)
+            
             # Return response for caller to handle other status codes
             return response
     
+    def _cache_response(
+        self,
+        key: str,
+        cached: Optional[CachedResponse],
+        response: requests.Response
+    ) -> requests.Response:
+        """Store a fresh response, or answer a 304 with the cached one."""
+        if response.status_code == 304 and cached:
+            logger.debug(f"Not modified, using cached response: {key}")
+            return _cached_response(cached, response)
+        
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag:
+            self.cache.set(key, CachedResponse(etag, response.headers.get("Link"), response.content))
+        return response
+    
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+    
+    def _record_rate_limit(self, response: requests.Response) -> None:
+        """Remember the remaining requests and reset time reported by a response."""
+        try:
+            remaining = int(response.headers.get("X-RateLimit-Remaining"))
+            reset = float(response.headers.get("X-RateLimit-Reset"))
+        except (TypeError, ValueError):
+            return
+        with self._rate_lock:
+            self._rate_remaining = remaining
+            self._rate_reset = reset
+    
+    def _wait_for_rate_limit(self) -> None:
+        """Sleep until the window resets if it is nearly used up."""
+        with self._rate_lock:
+            if self._rate_remaining is None:
+                return
+            if self._rate_remaining >= RATE_LIMIT_RESERVE:
+                self._rate_remaining -= 1  # Count this request until its response reports
+                return
+            wait_seconds = self._rate_reset - time.time() + 1
+            if wait_seconds <= 0:
+                self._rate_remaining = None  # Window has reset; the next response says by how much
+                return
+            remaining = self._rate_remaining
+        
+        logger.info(
+            f"⏳ Only {remaining} requests left in this window, "
+            f"pausing {wait_seconds:.0f}s until it resets..."
+        )
+        time.sleep(wait_seconds)
+    
+    @staticmethod
+    def _rate_limit_wait(response: requests.Response) -> Optional[float]:
+        """Seconds to wait before retrying a rate-limited response, or None if it wasn't."""
+        if response.status_code not in (403, 429):
+            return None
+        
+        # Secondary rate limits say how long to back off
+        retry_after = response.headers.get("Retry-After")
+        if isinstance(retry_after, str) and retry_after.isdigit():
+            return max(int(retry_after), 1)
+        
+        try:
+            reset_time = int(response.headers.get("X-RateLimit-Reset"))
+        except (TypeError, ValueError):
+            reset_time = None
+        
+        if response.status_code == 429:
+            reset_time = reset_time or 0
+        elif reset_time is None or response.headers.get("X-RateLimit-Remaining") != "0":
+            return None  # A plain 403 (bad token, no access)
+        
+        return max(reset_time - int(time.time()) + 5, 60)  # +5 second buffer, minimum 60s
+    
     def fetch_pr_list(
         self,
         owner: str,
@@ -94,6 +267,9 @@ class GitHubFetcher:
         
         Uses simple page-based pagination with max_pages limit. This is
         "good enough" for bulk analysis where missing a few PRs is acceptable.
+        When the first page's Link header gives the last page, the remaining
+        pages are fetched concurrently; otherwise "next" links are followed
+        until the last page (which has none).
         
         Args:
             owner: Repository owner (e.g., "facebook")
@@ -111,54 +287,46 @@ class GitHubFetcher:
             f"Fetching merged PRs from {owner}/{repo} (max {max_pages} pages)"
         )
         
+        first_page = self._fetch_pr_page(owner, repo, 1)
+        pages = [_json(first_page)]
+        last_page = self._link_page(first_page, "last")
+        
+        if pages[0] and last_page:
+            # The Link header says how many pages exist, so fetch the rest at once
+            remaining_pages = range(2, min(last_page, max_pages) + 1)
+            with ThreadPoolExecutor(max_workers=self.max_concurrent) as pool:
+                pages.extend(pool.map(
+                    lambda page: _json(self._fetch_pr_page(owner, repo, page)),
+                    remaining_pages
+                ))
+        else:
+            # Follow "next" links; the last page has none, so no empty page is fetched
+            response = first_page
+            next_page = self._link_page(response, "next")
+            while next_page and next_page <= max_pages:
+                response = self._fetch_pr_page(owner, repo, next_page)
+                pages.append(_json(response))
+                next_page = self._link_page(response, "next")
+        
         all_prs = []
         merged_count = 0
         
-        for page in range(1, max_pages + 1):
-            url = f"{self.base_url}/repos/{owner}/{repo}/pulls"
-            params = {
-                "state": "closed",
-                "sort": "created",
-                "direction": "desc",
-                "per_page": 100,
-                "page": page
-            }
+        for page, prs in enumerate(pages, 1):
+            # Stop if no more PRs
+            if not prs:
+                logger.info(f"No more PRs found at page {page}, stopping pagination")
+                break
             
-            try:
-                response = self._make_github_request(url, params=params)
-                
-                # Handle authentication errors immediately
-                if response.status_code in (401, 403):
-                    logger.error(
-                        f"Authentication error: {response.status_code} - "
-                        f"{response.text[:200]}"
-                    )
-                    response.raise_for_status()
-                
-                # Raise on other HTTP errors
-                response.raise_for_status()
-                
-                prs = response.json()
-                
-                # Stop if no more PRs
-                if not prs:
-                    logger.info(f"No more PRs found at page {page}, stopping pagination")
-                    break
-                
-                # Filter for merged PRs only
-                filtered_prs = [pr for pr in prs if pr.get("merged_at") is not None]
-                
-                merged_count += len(filtered_prs)
-                all_prs.extend(filtered_prs)
-                
-                logger.debug(
-                    f"Page {page}: {len(prs)} closed PRs, "
-                    f"{len(filtered_prs)} merged (total: {merged_count})"
-                )
-                
-            except requests.RequestException as e:
-                logger.error(f"Error fetching page {page}: {e}")
-                raise
+            # Filter for merged PRs only
+            filtered_prs = [pr for pr in prs if pr.get("merged_at") is not None]
+            
+            merged_count += len(filtered_prs)
+            all_prs.extend(filtered_prs)
+            
+            logger.debug(
+                f"Page {page}: {len(prs)} closed PRs, "
+                f"{len(filtered_prs)} merged (total: {merged_count})"
+            )
         
         logger.info(
             f"Fetched {merged_count} merged PRs from {owner}/{repo}"
@@ -166,6 +334,49 @@ class GitHubFetcher:
         
         return all_prs
     
+    def _fetch_pr_page(self, owner: str, repo: str, page: int) -> requests.Response:
+        """Fetch one page (100 PRs) of closed PRs, newest first.
+        
+        Raises:
+            requests.HTTPError: On authentication errors (401, 403) or other HTTP errors
+        """
+        url = f"{self.base_url}/repos/{owner}/{repo}/pulls"
+        params = {
+            "state": "closed",
+            "sort": "created",
+            "direction": "desc",
+            "per_page": 100,
+            "page": page
+        }
+        
+        try:
+            response = self._make_github_request(url, params=params)
+            
+            # Handle authentication errors immediately
+            if response.status_code in (401, 403):
+                logger.error(
+                    f"Authentication error: {response.status_code} - "
+                    f"{response.text[:200]}"
+                )
+                response.raise_for_status()
+            
+            # Raise on other HTTP errors
+            response.raise_for_status()
+            return response
+            
+        except requests.RequestException as e:
+            logger.error(f"Error fetching page {page}: {e}")
+            raise
+    
+    @staticmethod
+    def _link_page(response: requests.Response, rel: str) -> Optional[int]:
+        """Page number of a Link header relation ("next", "last"...), or None if absent."""
+        for url, link_rel in _LINK_RE.findall(response.headers.get("Link") or ""):
+            if link_rel == rel:
+                page = parse_qs(urlparse(url).query).get("page")
+                return int(page[0]) if page else None
+        return None
+    
     def fetch_pr_files(
         self,
         owner: str,
@@ -226,7 +437,7 @@ class GitHubFetcher:
             
             response.raise_for_status()
             
-            all_files = response.json()
+            all_files = _json(response)
             
             # Calculate aggregate statistics across ALL files
             total_additions = sum(f.get("additions", 0) for f in all_files)
@@ -291,18 +502,8 @@ class GitHubFetcher:
         if not pr_body:
             return []
         
-        # Pattern matches: fix/fixes/fixed/close/closes/closed/resolve/resolves/resolved #123
-        pattern = r'(?:fix|fixes|fixed|close|closes|closed|resolve|resolves|resolved)\s+#(\d+)'
-        matches = re.findall(pattern, pr_body, re.IGNORECASE)
-        
         # Convert to integers and remove duplicates while preserving order
-        issue_numbers = []
-        seen = set()
-        for match in matches:
-            num = int(match)
-            if num not in seen:
-                issue_numbers.append(num)
-                seen.add(num)
+        issue_numbers = list(dict.fromkeys(map(int, _ISSUE_LINK_RE.findall(pr_body))))
         
         logger.debug(f"Extracted {len(issue_numbers)} issue numbers from PR body")
         return issue_numbers
@@ -353,7 +554,7 @@ class GitHubFetcher:
             
             response.raise_for_status()
             
-            issue = response.json()
+            issue = _json(response)
             logger.debug(f"Fetched issue #{issue_number}: {issue.get('title', '')[:50]}")
             
             return issue
@@ -366,17 +567,21 @@ class GitHubFetcher:
         self,
         owner: str,
         repo: str,
-        issue_number: int
+        issue_number: int,
+        comment_count: Optional[int] = None
     ) -> list[dict[str, Any]]:
         """Fetch comments for an issue (Phase 2 - Enrichment).
         
         Handles pagination to fetch all comments (up to a reasonable limit).
         Most issues have <100 comments, so this typically requires 1 API call.
+        If the comment count is known (the issue's "comments" field), issues
+        without comments need no call and all pages are fetched at once.
         
         Args:
             owner: Repository owner (e.g., "facebook")
             repo: Repository name (e.g., "react")
             issue_number: Issue number
+            comment_count: Number of comments on the issue, if known
         
         Returns:
             List of comment dictionaries. Each comment contains:
@@ -396,25 +601,34 @@ class GitHubFetcher:
         page = 1
         max_pages = 5  # Limit to 500 comments (most issues have far fewer)
         
-        try:
-            while page <= max_pages:
-                params = {"per_page": 100, "page": page}
-                response = self._make_github_request(url, params=params)
-                
-                # Handle auth errors
-                if response.status_code in (401, 403):
-                    logger.error(f"Authentication error: {response.status_code}")
-                    response.raise_for_status()
-                
+        def fetch_page(page: int) -> requests.Response:
+            params = {"per_page": 100, "page": page}
+            response = self._make_github_request(url, params=params)
+            
+            # Handle auth errors
+            if response.status_code in (401, 403):
+                logger.error(f"Authentication error: {response.status_code}")
                 response.raise_for_status()
-                
-                comments = response.json()
-                
-                if not comments:
-                    break
-                
-                all_comments.extend(comments)
-                page += 1
+            
+            response.raise_for_status()
+            return response
+        
+        try:
+            if comment_count is not None:
+                # Page count is known: skip empty issues, fetch the pages at once
+                page_count = min(-(-comment_count // 100), max_pages)
+                if page_count > 1:
+                    with ThreadPoolExecutor(max_workers=page_count) as pool:
+                        for response in pool.map(fetch_page, range(1, page_count + 1)):
+                            all_comments.extend(_json(response))
+                elif page_count == 1:
+                    all_comments.extend(_json(fetch_page(1)))
+            else:
+                # Follow "next" links; the last page has none
+                while page and page <= max_pages:
+                    response = fetch_page(page)
+                    all_comments.extend(_json(response))
+                    page = self._link_page(response, "next")
             
             logger.debug(f"Fetched {len(all_comments)} comments for issue #{issue_number}")
             return all_comments
@@ -423,6 +637,44 @@ class GitHubFetcher:
             logger.error(f"Error fetching comments for issue #{issue_number}: {e}")
             raise
     
+    def _fetch_linked_issue(
+        self,
+        owner: str,
+        repo: str,
+        issue_number: int
+    ) -> tuple[Optional[dict[str, Any]], list[dict[str, Any]]]:
+        """Fetch an issue and its comments, reusing them for other PRs that link it.
+        
+        Returns:
+            Tuple of (issue or None if not found, comments)
+        """
+        key = (owner, repo, issue_number)
+        with self._issue_cache_lock:
+            cached = self._issue_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        with self._issue_fetch_locks[hash(key) % len(self._issue_fetch_locks)]:
+            # Another PR may have fetched it while we waited
+            with self._issue_cache_lock:
+                cached = self._issue_cache.get(key)
+            if cached is not None:
+                return cached
+            
+            # Fetch issue (returns None if 404)
+            issue = self.fetch_issue(owner, repo, issue_number)
+            
+            # Fetch comments if issue exists
+            comments = []
+            if issue:
+                comments = self.fetch_issue_comments(
+                    owner, repo, issue_number, comment_count=issue.get("comments")
+                )
+            
+            with self._issue_cache_lock:
+                self._issue_cache[key] = (issue, comments)
+        return issue, comments
+    
     def _truncate_patch(self, patch: str, max_lines: int = 100) -> str:
         """Truncate patch to maximum number of lines.
         
@@ -448,15 +700,16 @@ class GitHubFetcher:
         Returns:
             Tuple of (truncated_patch, was_truncated)
         """
-        lines = patch.split('\n')
-        
-        if len(lines) <= max_lines:
-            return patch, False
+        # Find the end of line max_lines without splitting the whole patch
+        end = -1
+        for _ in range(max_lines):
+            end = patch.find('\n', end + 1)
+            if end == -1:
+                return patch, False
         
-        truncated = '\n'.join(lines[:max_lines])
-        remaining = len(lines) - max_lines
+        remaining = patch.count('\n', end)
         
-        return f"{truncated}\n... [TRUNCATED: {remaining} more lines]", True
+        return f"{patch[:end]}\n... [TRUNCATED: {remaining} more lines]", True
     
     def enrich_pr(
         self,
@@ -468,7 +721,10 @@ class GitHubFetcher:
         """Fetch all enrichment data for a PR (Phase 2 - Enrichment).
         
         This orchestrates fetching files, linked issue, and issue comments.
-        All components are fetched; if any fail, the exception propagates.
+        Files are fetched on a worker thread while the linked issue and its
+        comments are fetched here, so the PR costs the slower of the two
+        instead of their sum. All components are fetched; if any fail, the
+        exception propagates.
         
         Args:
             owner: Repository owner (e.g., "facebook")
@@ -489,26 +745,24 @@ class GitHubFetcher:
         """
         logger.info(f"Enriching PR #{pr_number} in {owner}/{repo}")
         
-        # Step 1: Fetch files with diffs
-        files = self.fetch_pr_files(owner, repo, pr_number)
-        
-        # Step 2: Extract and fetch linked issue
-        issue_numbers = self.extract_issue_numbers(pr_body)
-        linked_issue = None
-        issue_comments = []
-        
-        if issue_numbers:
-            issue_number = issue_numbers[0]  # Take first linked issue
-            logger.debug(f"PR #{pr_number} links to issue #{issue_number}")
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            # Step 1: Fetch files with diffs (in the background)
+            files_future = pool.submit(self.fetch_pr_files, owner, repo, pr_number)
             
-            # Fetch issue (returns None if 404)
-            linked_issue = self.fetch_issue(owner, repo, issue_number)
+            # Step 2: Extract and fetch linked issue
+            issue_numbers = self.extract_issue_numbers(pr_body)
+            linked_issue = None
+            issue_comments = []
             
-            # Fetch comments if issue exists
-            if linked_issue:
-                issue_comments = self.fetch_issue_comments(owner, repo, issue_number)
-        else:
-            logger.debug(f"PR #{pr_number} has no linked issues")
+            if issue_numbers:
+                issue_number = issue_numbers[0]  # Take first linked issue
+                logger.debug(f"PR #{pr_number} links to issue #{issue_number}")
+                
+                linked_issue, issue_comments = self._fetch_linked_issue(owner, repo, issue_number)
+            else:
+                logger.debug(f"PR #{pr_number} has no linked issues")
+            
+            files = files_future.result()
         
         result = {
             "files": files,
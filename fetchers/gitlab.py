@@ -23,6 +23,89 @@ import requests
 
 logger = logging.getLogger(__name__)
 
+# Pattern matches:
+# - fix/fixes/close/closes/resolve/resolves #123
+# - Full issue URLs: https://gitlab.com/.../issues/123
+_ISSUE_LINK_PATTERNS = (
+    re.compile(r'(?:fix|fixes|fixed|close|closes|closed|resolve|resolves|resolved)[s]?\s+#(\d+)', re.IGNORECASE),
+    re.compile(r'https://[^\s]+/-/issues/(\d+)', re.IGNORECASE),
+)
+
+
+def count_diff_lines(diff: str) -> tuple[int, int]:
+    """Count addition and deletion lines in a unified diff.
+    
+    A line starts either at the beginning of the diff or right after a newline,
+    so counting "\\n+" (minus "\\n+++" file headers) counts added lines. Each
+    str.count is a single C-level scan, far cheaper than looping over lines
+    in Python.
+    
+    Returns:
+        Tuple of (additions, deletions)
+    """
+    if not diff:
+        return 0, 0
+    
+    additions = diff.count('\n+') - diff.count('\n+++')
+    deletions = diff.count('\n-') - diff.count('\n---')
+    
+    # First line has no preceding newline
+    if diff.startswith('+') and not diff.startswith('+++'):
+        additions += 1
+    elif diff.startswith('-') and not diff.startswith('---'):
+        deletions += 1
+    
+    return additions, deletions
+
+
+def _gitlab_file_status(file: dict[str, Any]) -> str:
+    """Convert GitLab file flags to GitHub-style status."""
+    if file.get("new_file"):
+        return "added"
+    elif file.get("deleted_file"):
+        return "removed"
+    elif file.get("renamed_file"):
+        return "renamed"
+    else:
+        return "modified"
+
+
+def normalize_gitlab_file(file: dict[str, Any]) -> dict[str, Any]:
+    """Convert a GitLab diff entry to the GitHub file shape.
+    
+    Stored files, the API, the frontend and the classifier context all use the
+    GitHub shape, so GitLab files are converted once here rather than on every
+    read. Entries already in GitHub shape are returned unchanged.
+    
+    Uses the additions/deletions already on the entry when both are present
+    (fetch_mr_diffs counts them before truncating the diff); otherwise counts
+    them from the diff text.
+    
+    Args:
+        file: GitLab diff entry (old_path, new_path, diff, new_file, ...)
+    
+    Returns:
+        Dict with filename, status, additions, deletions, changes, patch and
+        patch_truncated
+    """
+    if "filename" in file or "new_path" not in file:
+        return file
+    
+    additions = file.get("additions")
+    deletions = file.get("deletions")
+    if additions is None or deletions is None:
+        additions, deletions = count_diff_lines(file.get("diff") or "")
+    
+    return {
+        "filename": file.get("new_path", file.get("old_path", "unknown")),
+        "status": _gitlab_file_status(file),
+        "additions": additions,
+        "deletions": deletions,
+        "changes": additions + deletions,
+        "patch": file.get("diff"),  # GitLab calls it 'diff', GitHub calls it 'patch'
+        "patch_truncated": file.get("diff_truncated", False),
+    }
+
 
 class GitLabFetcher:
     """Fetch merge request data from GitLab API.
@@ -180,7 +263,9 @@ class GitLabFetcher:
         """Fetch changed files with diffs for an MR (Phase 2 - Enrichment).
         
         Returns up to 10 files with diffs, truncated to 100 lines each.
-        Skips files without diffs (e.g., binary files).
+        Skips files without diffs (e.g., binary files). Files are normalized
+        to the GitHub file shape (see normalize_gitlab_file), with line counts
+        taken from the full diff before truncation.
         
         Args:
             owner: Repository owner (e.g., "gitlab-org")
@@ -198,13 +283,13 @@ class GitLabFetcher:
                 },
                 "files": [
                     {
-                        "old_path": str,
-                        "new_path": str,
-                        "diff": str,
-                        "new_file": bool,
-                        "renamed_file": bool,
-                        "deleted_file": bool,
-                        "diff_truncated": bool
+                        "filename": str,
+                        "status": str,
+                        "additions": int,
+                        "deletions": int,
+                        "changes": int,
+                        "patch": str,
+                        "patch_truncated": bool
                     }
                 ]
             }
@@ -234,15 +319,18 @@ class GitLabFetcher:
             # Take first 10
             files = files_with_diffs[:10]
             
-            # Truncate each diff to 100 lines
+            # Count lines on the full diff, then truncate each diff to 100 lines
             for file in files:
                 original_diff = file["diff"]
+                file["additions"], file["deletions"] = count_diff_lines(original_diff)
                 truncated_diff, was_truncated = self._truncate_diff_with_flag(
                     original_diff, max_lines=100
                 )
                 file["diff"] = truncated_diff
                 file["diff_truncated"] = was_truncated
             
+            files = [normalize_gitlab_file(file) for file in files]
+            
             # Check if file list is truncated (showing fewer files than exist)
             file_list_truncated = len(files_with_diffs) > len(files)
             
@@ -287,26 +375,12 @@ class GitLabFetcher:
         if not mr_description:
             return []
         
-        # Pattern matches:
-        # - fix/fixes/close/closes/resolve/resolves #123
-        # - Full issue URLs: https://gitlab.com/.../issues/123
-        patterns = [
-            r'(?:fix|fixes|fixed|close|closes|closed|resolve|resolves|resolved)[s]?\s+#(\d+)',
-            r'https://[^\s]+/-/issues/(\d+)'
-        ]
-        
         matches = []
-        for pattern in patterns:
-            matches.extend(re.findall(pattern, mr_description, re.IGNORECASE))
+        for pattern in _ISSUE_LINK_PATTERNS:
+            matches.extend(pattern.findall(mr_description))
         
         # Convert to integers and remove duplicates while preserving order
-        issue_numbers = []
-        seen = set()
-        for match in matches:
-            num = int(match)
-            if num not in seen:
-                issue_numbers.append(num)
-                seen.add(num)
+        issue_numbers = list(dict.fromkeys(map(int, matches)))
         
         logger.debug(f"Extracted {len(issue_numbers)} issue numbers from MR description (hint)")
         return issue_numbers
@@ -463,15 +537,16 @@ class GitLabFetcher:
         Returns:
             Tuple of (truncated_diff, was_truncated)
         """
-        lines = diff.split('\n')
-        
-        if len(lines) <= max_lines:
-            return diff, False
+        # Find the end of line max_lines without splitting the whole diff
+        end = -1
+        for _ in range(max_lines):
+            end = diff.find('\n', end + 1)
+            if end == -1:
+                return diff, False
         
-        truncated = '\n'.join(lines[:max_lines])
-        remaining = len(lines) - max_lines
+        remaining = diff.count('\n', end)
         
-        return f"{truncated}\n... [TRUNCATED: {remaining} more lines]", True
+        return f"{diff[:end]}\n... [TRUNCATED: {remaining} more lines]", True
     
     def fetch_issue(
         self,
@@ -0,0 +1,76 @@
+"""
+On-disk cache of GitHub API responses for conditional requests.
+
+GitHub answers a request carrying the ETag of an earlier response with
+304 Not Modified when nothing changed, and 304s don't count against the
+rate limit. Storing each response body with its ETag lets re-runs (retried
+enrichments, re-indexing a repo) revalidate instead of refetching. Entries
+are kept in a small SQLite database keyed by URL and query parameters.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+from urllib.parse import urlencode
+
+
+class CachedResponse(NamedTuple):
+    """A stored response: its validator, pagination header and body."""
+    etag: str
+    link: Optional[str]
+    body: bytes
+
+
+def request_key(url: str, params: Optional[dict] = None) -> str:
+    """Cache key of a GET request (URL plus sorted query parameters)."""
+    return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+
+class ResponseCache:
+    """
+    ETag-validated response cache backed by SQLite.
+
+    Safe to share between threads; lookups are local disk reads, far
+    cheaper than the round-trip they save.
+    """
+
+    def __init__(self, directory: Union[str, Path] = ".cache/github"):
+        """
+        Open (or create) the cache.
+
+        Args:
+            directory: Directory holding the cache database (default .cache/github)
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path / "responses.sqlite3", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, etag TEXT NOT NULL, link TEXT, body BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the stored response for a key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, link, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        """Store the response for a key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, link, body) VALUES (?, ?, ?, ?)",
+                (key, *response)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
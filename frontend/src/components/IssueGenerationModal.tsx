@@ -73,10 +73,17 @@ function IssueGenerationModal({
     try {
       // Send custom prompt template to backend (if different from default)
       const customPrompt = promptTemplate !== defaultPrompt ? promptTemplate : undefined;
-      const result = await api.generateIssue(repo, prNumber, customPrompt);
+      // Render the issue as it streams in; the backend saves it when done
+      const result = await api.generateIssueStream(
+        repo,
+        prNumber,
+        customPrompt,
+        setGeneratedIssue
+      );
       setGeneratedIssue(result.issue_markdown);
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : "Unknown error occurred";
+      setGeneratedIssue(null); // Drop any partially streamed text
       setError(errorMessage);
       console.error("Failed to generate issue:", err);
     } finally {
@@ -320,7 +327,8 @@ function IssueGenerationModal({
             <>
               <button
                 onClick={handleGenerateAgain}
-                className="px-4 py-2 text-gray-700 hover:bg-gray-100 rounded transition-colors"
+                disabled={isGenerating}
+                className="px-4 py-2 text-gray-700 hover:bg-gray-100 rounded disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
               >
                 Generate Again
               </button>
@@ -332,7 +340,8 @@ function IssueGenerationModal({
               </button>
               <button
                 onClick={handleSave}
-                className="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700 transition-colors"
+                disabled={isGenerating}
+                className="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
               >
                 Save & Close
               </button>
@@ -1,6 +1,6 @@
 import { useParams, useNavigate } from "react-router-dom";
 import { useQuery } from "@tanstack/react-query";
-import { fetchPR, fetchGeneratedIssue } from "@/lib/api";
+import { fetchPR, fetchGeneratedIssue, fetchLLMPayload } from "@/lib/api";
 import ClassificationCard from "./ClassificationCard";
 import GeneratedIssueCard from "./GeneratedIssueCard";
 import LLMPayloadCard from "./LLMPayloadCard";
@@ -22,6 +22,14 @@ function PRDetail() {
     enabled: !!owner && !!repo && !!number,
   });
 
+  // The classification prompt is loaded alongside, not as part of the PR
+  const { data: llmPayload, isLoading: isPayloadLoading } = useQuery({
+    queryKey: ["llm-payload", fullRepo, prNumber],
+    queryFn: () => fetchLLMPayload(fullRepo, prNumber),
+    enabled: !!owner && !!repo && !!number,
+    retry: false,
+  });
+
   // Fetch generated issue if it exists
   const { data: generatedIssue } = useQuery({
     queryKey: ["generated-issue", fullRepo, prNumber],
@@ -155,7 +163,7 @@ function PRDetail() {
         />
 
         {/* LLM Payload */}
-        <LLMPayloadCard llmPayload={pr.llm_payload} isLoading={isLoading} />
+        <LLMPayloadCard llmPayload={llmPayload?.full_prompt} isLoading={isPayloadLoading} />
 
         {/* PR Body */}
         <div className="bg-white rounded-lg shadow p-6 mb-6">
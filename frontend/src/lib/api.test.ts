@@ -46,7 +46,7 @@ describe('toggleFavorite', () => {
     const result = await toggleFavorite('facebook/react', 12345)
 
     expect(global.fetch).toHaveBeenCalledWith(
-      '/api/prs/facebook/react/12345/favorite',
+      '/api/prs/facebook/react/12345/favorite/toggle',
       { method: 'POST' }
     )
     expect(result).toEqual(mockPR)
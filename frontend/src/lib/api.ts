@@ -4,7 +4,8 @@ import type {
   ReposResponse, 
   GeneratedIssue, 
   PRContext, 
-  IssuePromptTemplate 
+  IssuePromptTemplate,
+  LLMPayload
 } from "@/types/pr";
 
 // In production, VITE_API_URL will be set by Render
@@ -100,6 +101,24 @@ export async function fetchPR(
   return response.json();
 }
 
+/**
+ * Get the classification prompt for a PR (shown in the detail page's debug card).
+ *
+ * Fetched separately so the PR detail itself doesn't have to build it.
+ */
+export async function fetchLLMPayload(
+  repo: string,
+  prNumber: number
+): Promise<LLMPayload> {
+  const response = await fetch(`${API_BASE_URL}/prs/${repo}/${prNumber}/llm_payload`);
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch LLM payload: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
 export async function fetchRepos(): Promise<ReposResponse> {
   const response = await fetch(`${API_BASE_URL}/repos`);
 
@@ -114,7 +133,7 @@ export async function toggleFavorite(
   repo: string,
   prNumber: number
 ): Promise<PullRequest> {
-  const response = await fetch(`${API_BASE_URL}/prs/${repo}/${prNumber}/favorite`, {
+  const response = await fetch(`${API_BASE_URL}/prs/${repo}/${prNumber}/favorite/toggle`, {
     method: "POST",
   });
 
@@ -170,6 +189,85 @@ export async function generateIssue(
   return response.json();
 }
 
+/**
+ * Generate a student-facing issue, receiving the markdown as it is written.
+ * 
+ * Reads the server-sent events from the /generate-issue/stream endpoint and
+ * calls onText with the full markdown so far after each chunk. The backend
+ * saves the issue once the stream finishes.
+ * 
+ * @param repo - Repository name (e.g., "facebook/react")
+ * @param prNumber - PR number
+ * @param customPromptTemplate - Optional custom prompt template to use instead of default
+ * @param onText - Called with the accumulated markdown after each chunk
+ * @returns Generated issue markdown and timestamp
+ */
+export async function generateIssueStream(
+  repo: string,
+  prNumber: number,
+  customPromptTemplate: string | undefined,
+  onText: (markdown: string) => void
+): Promise<GeneratedIssue> {
+  const response = await fetch(
+    `${API_BASE_URL}/prs/${encodeURIComponent(repo)}/${prNumber}/generate-issue/stream`,
+    {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({
+        custom_prompt_template: customPromptTemplate || null,
+      }),
+    }
+  );
+
+  if (!response.ok || !response.body) {
+    if (response.status === 404) {
+      throw new Error(`PR not found: ${repo}#${prNumber}`);
+    }
+    const errorText = await response.text();
+    throw new Error(`Failed to generate issue: ${errorText || response.statusText}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let markdown = "";
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of rawEvent.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (!data) continue;
+      const payload = JSON.parse(data);
+
+      if (event === "error") {
+        throw new Error(payload.detail);
+      }
+      if (event === "done") {
+        return { issue_markdown: markdown, generated_at: payload.generated_at };
+      }
+      markdown += payload.delta;
+      onText(markdown);
+    }
+  }
+
+  throw new Error("Failed to generate issue: stream ended unexpectedly");
+}
+
 /**
  * Get the generated issue for a PR (if it exists).
  * 
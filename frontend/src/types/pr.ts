@@ -16,7 +16,7 @@ export interface PullRequest {
       additions: number;
       deletions: number;
       changes: number;
-      patch?: string;
+      patch?: string;  // Omitted by GET /prs/{repo}/{number}; see files_url
     }>;
     summary: {
       total_files: number;
@@ -25,6 +25,7 @@ export interface PullRequest {
       truncated: boolean;
     };
   } | null;
+  files_url?: string;
   linked_issue: {
     number: number;
     title: string;
@@ -54,7 +55,7 @@ export interface PullRequest {
   reasoning?: string | null;
   classified_at?: string | null;
   
-  llm_payload?: string | null;
+  llm_payload?: string | null;  // Only with ?include_llm_payload=true
   
   // Favorite field
   is_favorite?: boolean;
@@ -69,6 +70,7 @@ export interface PRListResponse {
   total: number;
   page: number;
   per_page: number;
+  next_cursor: string | null;
 }
 
 export interface ReposResponse {
@@ -86,6 +88,12 @@ export interface PRContext {
   classification_info: string;
 }
 
+export interface LLMPayload {
+  pr_context: string;
+  full_prompt: string;
+  prompt_template: string;
+}
+
 export interface IssuePromptTemplate {
   prompt_template: string;
 }
@@ -14,8 +14,10 @@ Usage:
 """
 
 import argparse
+import asyncio
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
 from utils.config_loader import load_config
 from utils.logger import setup_logger
@@ -23,6 +25,9 @@ from storage.supabase_client import SupabaseClient
 
 logger = setup_logger(__name__)
 
+# PRs enriched at once; their requests share each fetcher's connection pool and rate limit
+ENRICH_CONCURRENCY = 5
+
 
 def parse_repository_url(repo_url_or_path: str) -> Tuple[str, str, str]:
     """
@@ -97,7 +102,7 @@ def initialize_fetcher(platform: str, config):
                 "Add GITHUB_TOKEN to access GitHub repositories."
             )
         from fetchers.github import GitHubFetcher
-        return GitHubFetcher(config.credentials.github_token)
+        return GitHubFetcher(config.credentials.github_token, cache=_github_cache(config))
     
     elif platform == "gitlab":
         if not config.credentials.gitlab_token:
@@ -113,48 +118,104 @@ def initialize_fetcher(platform: str, config):
         raise ValueError(f"Unsupported platform: {platform}")
 
 
-def _classify_single_pr(pr_record, classifier, supabase, index, total):
+def _github_cache(config):
+    """Open the GitHub response cache from config, or None if GITHUB_CACHE_DIR is empty."""
+    if not config.credentials.github_cache_dir:
+        return None
+    from fetchers.http_cache import ResponseCache
+    return ResponseCache(config.credentials.github_cache_dir)
+
+
+def _llm_cache(config):
+    """Open the LLM response cache from config, or None if LLM_CACHE_DIR is empty."""
+    if not config.credentials.llm_cache_dir:
+        return None
+    from classifier.llm_cache import LLMCache
+    return LLMCache(config.credentials.llm_cache_dir)
+
+
+def _semantic_cache(config):
+    """Open the similar-PR cache from config, or None unless LLM_SEMANTIC_CACHE_THRESHOLD is set."""
+    if not config.credentials.llm_cache_dir or config.credentials.llm_semantic_cache_threshold is None:
+        return None
+    from classifier.semantic_cache import SemanticCache
+    return SemanticCache(
+        config.credentials.llm_cache_dir,
+        threshold=config.credentials.llm_semantic_cache_threshold
+    )
+
+
+def _save_classification(pr_record, result, supabase):
     """
-    Classify a single PR (helper function for parallel execution).
+    Save one classification result (or log its failure).
     
     Args:
-        pr_record: PR data from database
-        classifier: Classifier instance
+        pr_record: PR record from database
+        result: Classification dict, or the exception classifying it raised
         supabase: SupabaseClient instance
-        index: Current index (for logging)
-        total: Total number of PRs (for logging)
     
     Returns:
-        Tuple of (success: bool, pr_id: str, error: Optional[str])
+        bool: True if the classification was saved
     """
-    pr_id = pr_record["id"]
-    pr_repo = pr_record["repo"]
-    pr_number = pr_record["pr_number"]
-    pr_title = pr_record["title"]
-    
     try:
-        logger.info(f"[{index}/{total}] {pr_repo} PR #{pr_number}: {pr_title}")
+        if isinstance(result, Exception):
+            raise result
         
-        # Classify the PR
-        classification = classifier.classify_pr(pr_record)
-        
-        # Save classification to database
         supabase.save_classification(
-            pr_id=pr_id,
+            pr_id=pr_record["id"],
             pr_data=pr_record,
-            classification=classification
+            classification=result
         )
         
         logger.info(
-            f"  ✓ Classified as {classification['difficulty']} "
-            f"({', '.join(classification['categories'][:3])})"
+            f"  ✓ Classified as {result['difficulty']} "
+            f"({', '.join(result['categories'][:3])})"
         )
-        
-        return (True, pr_id, None)
-        
+        return True
     except Exception as e:
         logger.error(f"  ✗ Failed to classify: {e}")
-        return (False, pr_id, str(e))
+        return False
+
+
+async def _classify_and_save(prs_to_classify, classifier, supabase, concurrency, prs_per_request=1):
+    """
+    Classify PRs concurrently, saving each classification as soon as it arrives.
+    
+    Args:
+        prs_to_classify: PR records from database
+        classifier: Classifier instance
+        supabase: SupabaseClient instance
+        concurrency: Maximum number of in-flight LLM requests
+        prs_per_request: PRs classified per LLM request
+    
+    Returns:
+        Tuple of (classified: int, failed: int)
+    """
+    total = len(prs_to_classify)
+    counts = {"completed": 0, "classified": 0, "failed": 0}
+    
+    async def save_result(pr_record, result):
+        counts["completed"] += 1
+        completed = counts["completed"]
+        logger.info(f"[{completed}/{total}] {pr_record['repo']} PR #{pr_record['pr_number']}: {pr_record['title']}")
+        
+        # SupabaseClient is blocking; run it off the event loop
+        if await asyncio.to_thread(_save_classification, pr_record, result, supabase):
+            counts["classified"] += 1
+        else:
+            counts["failed"] += 1
+        
+        # Show progress every 10 PRs
+        if completed % 10 == 0 and completed < total:
+            logger.info(f"  Progress: {completed}/{total} PRs processed...")
+    
+    await classifier.classify_prs(
+        prs_to_classify,
+        concurrency=concurrency,
+        on_result=save_result,
+        prs_per_request=prs_per_request
+    )
+    return counts["classified"], counts["failed"]
 
 
 def classify_prs(
@@ -162,7 +223,9 @@ def classify_prs(
     limit: int = 100,
     classifier = None,
     supabase: SupabaseClient = None,
-    concurrency: int = 5
+    concurrency: int = None,
+    batch: bool = False,
+    prs_per_request: int = 1
 ):
     """
     Classify enriched PRs using LLM with parallel processing.
@@ -178,11 +241,19 @@ def classify_prs(
         limit: Maximum number of PRs to classify (default: 100)
         classifier: Classifier instance (optional, will create if not provided)
         supabase: SupabaseClient instance (optional, will create if not provided)
-        concurrency: Number of parallel classification requests (default: 5, max recommended: 10)
+        concurrency: Number of parallel classification requests
+                    (default: LLM_MAX_CONCURRENCY from config, 50 unless overridden)
+        batch: Submit the PRs through the provider's batch API instead
+              (about half the cost; waits until the batch finishes, up to 24h)
+        prs_per_request: PRs classified per LLM request (default 1). Grouping
+                        PRs sends the classification instructions once per group.
     
     Returns:
         bool: True if successful, False otherwise
     """
+    if concurrency is None:
+        concurrency = load_config().credentials.llm_max_concurrency
+    
     # Initialize clients if not provided
     if classifier is None or supabase is None:
         config = load_config()
@@ -202,7 +273,13 @@ def classify_prs(
             classifier = Classifier(
                 provider=config.credentials.llm_provider,
                 model=config.credentials.llm_model,
-                api_key=api_key
+                api_key=api_key,
+                json_mode=config.credentials.llm_json_mode,
+                cache=_llm_cache(config),
+                semantic_cache=_semantic_cache(config),
+                llm_max_retries=config.credentials.llm_max_retries,
+                requests_per_minute=config.credentials.llm_requests_per_minute,
+                small_model=config.credentials.llm_small_model
             )
     
     logger.info("=" * 80)
@@ -241,41 +318,27 @@ def classify_prs(
         return True
     
     logger.info(f"Found {len(prs_to_classify)} PRs to classify")
-    logger.info(f"Using {concurrency} concurrent requests")
-    logger.info("-" * 80)
-    
-    # Classify PRs in parallel using ThreadPoolExecutor
-    classified = 0
-    failed = 0
-    
-    with ThreadPoolExecutor(max_workers=concurrency) as executor:
-        # Submit all tasks
-        future_to_pr = {}
-        for i, pr_record in enumerate(prs_to_classify, 1):
-            future = executor.submit(
-                _classify_single_pr,
-                pr_record,
-                classifier,
-                supabase,
-                i,
-                len(prs_to_classify)
-            )
-            future_to_pr[future] = pr_record
+    
+    if batch:
+        logger.info("Using the batch API (results can take up to 24 hours)")
+        logger.info("-" * 80)
         
-        # Process results as they complete
-        completed = 0
-        for future in as_completed(future_to_pr):
-            completed += 1
-            success, pr_id, error = future.result()
-            
-            if success:
+        results = classifier.classify_prs_batch(prs_to_classify)
+        classified = failed = 0
+        for i, (pr_record, result) in enumerate(zip(prs_to_classify, results), 1):
+            logger.info(f"[{i}/{len(results)}] {pr_record['repo']} PR #{pr_record['pr_number']}: {pr_record['title']}")
+            if _save_classification(pr_record, result, supabase):
                 classified += 1
             else:
                 failed += 1
-            
-            # Show progress every 10 PRs
-            if completed % 10 == 0 and completed < len(prs_to_classify):
-                logger.info(f"  Progress: {completed}/{len(prs_to_classify)} PRs processed...")
+    else:
+        logger.info(f"Using {concurrency} concurrent requests ({prs_per_request} PR(s) per request)")
+        logger.info("-" * 80)
+        
+        # Classify PRs concurrently on one event loop (async LLM calls)
+        classified, failed = asyncio.run(
+            _classify_and_save(prs_to_classify, classifier, supabase, concurrency, prs_per_request)
+        )
     
     # Summary
     logger.info("\n" + "=" * 80)
@@ -290,6 +353,11 @@ def classify_prs(
     logger.info(f"PRs classified: {classified}")
     logger.info(f"PRs failed: {failed}")
     
+    if classifier.llm_client.cache is not None:
+        classifier.llm_client.cache.log_stats()
+    if classifier.semantic_cache is not None:
+        classifier.semantic_cache.log_stats()
+    
     # Show classification stats
     try:
         stats = supabase.get_classification_stats(repo=repo_full_name)
@@ -484,7 +552,10 @@ def fetch_and_enrich_prs(
             enriched = 0
             failed = 0
             
-            for i, pr_record in enumerate(prs_to_enrich, 1):
+            fetcher_lock = threading.Lock()
+            
+            def enrich_one(pr_record) -> bool:
+                """Enrich one PR and record the outcome in Supabase; returns whether it succeeded."""
                 pr_number = pr_record["pr_number"]
                 pr_id = pr_record["id"]
                 pr_repo = pr_record["repo"]  # Format: "owner/repo"
@@ -495,23 +566,22 @@ def fetch_and_enrich_prs(
                     pr_owner, pr_repo_name = pr_repo.split("/", 1)
                 else:
                     logger.error(f"  PR #{pr_number}: Invalid repo format '{pr_repo}', skipping")
-                    failed += 1
-                    continue
+                    return False
                 
                 # Initialize platform-specific fetcher if needed (for multi-repo enrichment)
                 try:
-                    if not hasattr(fetch_and_enrich_prs, '_fetcher_cache'):
-                        fetch_and_enrich_prs._fetcher_cache = {}
-                    
-                    if pr_platform not in fetch_and_enrich_prs._fetcher_cache:
-                        config = load_config()
-                        fetch_and_enrich_prs._fetcher_cache[pr_platform] = initialize_fetcher(pr_platform, config)
-                    
-                    pr_fetcher = fetch_and_enrich_prs._fetcher_cache[pr_platform]
+                    with fetcher_lock:
+                        if not hasattr(fetch_and_enrich_prs, '_fetcher_cache'):
+                            fetch_and_enrich_prs._fetcher_cache = {}
+                        
+                        if pr_platform not in fetch_and_enrich_prs._fetcher_cache:
+                            config = load_config()
+                            fetch_and_enrich_prs._fetcher_cache[pr_platform] = initialize_fetcher(pr_platform, config)
+                        
+                        pr_fetcher = fetch_and_enrich_prs._fetcher_cache[pr_platform]
                 except Exception as e:
                     logger.error(f"  {pr_repo} #{pr_number}: Failed to initialize {pr_platform} fetcher - {e}")
-                    failed += 1
-                    continue
+                    return False
                 
                 try:
                     logger.info(f"  {pr_repo} [{pr_platform}] #{pr_number}: Enriching...")
@@ -549,12 +619,11 @@ def fetch_and_enrich_prs(
                         error=None
                     )
                     
-                    enriched += 1
                     logger.info(f"  {pr_repo} PR #{pr_number}: ✓ Enriched")
+                    return True
                     
                 except Exception as e:
                     logger.error(f"  {pr_repo} PR #{pr_number}: ✗ Failed - {e}")
-                    failed += 1
                     
                     # Update status to failed in Supabase
                     try:
@@ -566,10 +635,19 @@ def fetch_and_enrich_prs(
                         )
                     except Exception as update_error:
                         logger.error(f"  {pr_repo} PR #{pr_number}: Could not update failure status: {update_error}")
-                
-                # Show progress every 10 PRs
-                if i % 10 == 0:
-                    logger.info(f"  Progress: {i}/{len(prs_to_enrich)} PRs processed...")
+                    return False
+            
+            # Enrich several PRs at once; each spends most of its time waiting on the API
+            with ThreadPoolExecutor(max_workers=ENRICH_CONCURRENCY) as pool:
+                for i, succeeded in enumerate(pool.map(enrich_one, prs_to_enrich), 1):
+                    if succeeded:
+                        enriched += 1
+                    else:
+                        failed += 1
+                    
+                    # Show progress every 10 PRs
+                    if i % 10 == 0:
+                        logger.info(f"  Progress: {i}/{len(prs_to_enrich)} PRs processed...")
     
     # Step 4: Show summary
     logger.info("\n" + "=" * 80)
@@ -628,6 +706,14 @@ def fetch_and_enrich_prs(
     return True
 
 
+def _positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
 def main():
     """Main CLI entrypoint."""
     parser = argparse.ArgumentParser(
@@ -695,9 +781,20 @@ Examples:
     )
     classify_parser.add_argument(
         "--concurrency",
-        type=int,
-        default=5,
-        help="Number of parallel classification requests (default: 5, recommended max: 10)"
+        type=_positive_int,
+        default=None,
+        help="Number of parallel classification requests (default: LLM_MAX_CONCURRENCY, 50)"
+    )
+    classify_parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Use the provider's batch API: about half the cost, results within 24 hours"
+    )
+    classify_parser.add_argument(
+        "--prs-per-request",
+        type=_positive_int,
+        default=1,
+        help="Classify this many PRs per LLM request, sharing one copy of the instructions (default: 1)"
     )
     
     subparsers.add_parser(
@@ -783,7 +880,13 @@ Examples:
             classifier = Classifier(
                 provider=config.credentials.llm_provider,
                 model=config.credentials.llm_model,
-                api_key=api_key
+                api_key=api_key,
+                json_mode=config.credentials.llm_json_mode,
+                cache=_llm_cache(config),
+                semantic_cache=_semantic_cache(config),
+                llm_max_retries=config.credentials.llm_max_retries,
+                requests_per_minute=config.credentials.llm_requests_per_minute,
+                small_model=config.credentials.llm_small_model
             )
             supabase = SupabaseClient(
                 config.credentials.supabase_url,
@@ -799,7 +902,9 @@ Examples:
             limit=args.limit,
             classifier=classifier,
             supabase=supabase,
-            concurrency=args.concurrency
+            concurrency=args.concurrency,
+            batch=args.batch,
+            prs_per_request=args.prs_per_request
         )
         
         sys.exit(0 if success else 1)
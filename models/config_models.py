@@ -15,12 +15,22 @@ class CredentialsConfig(BaseModel):
     supabase_url: str = Field(..., min_length=1, description="Supabase project URL")
     supabase_key: str = Field(..., min_length=1, description="Supabase API key")
     database_url: Optional[str] = Field(None, description="PostgreSQL database URL (optional, for schema setup)")
+    github_cache_dir: Optional[str] = Field(default=".cache/github", description="Directory of the on-disk GitHub response cache for conditional requests (empty to disable)")
     
     # LLM configuration (Milestones 10-14)
     anthropic_api_key: Optional[str] = Field(None, description="Anthropic API key for Claude")
     openai_api_key: Optional[str] = Field(None, description="OpenAI API key")
     llm_provider: str = Field(default="anthropic", description="LLM provider: 'anthropic' or 'openai'")
     llm_model: str = Field(default="claude-sonnet-4-5-20250929", description="LLM model name")
+    llm_small_model: Optional[str] = Field(default=None, description="Cheaper model tried first during classification; the main model handles PRs it's unsure about (unset to disable)")
+    llm_max_concurrency: int = Field(default=50, ge=1, description="Maximum in-flight LLM requests during batch classification")
+    llm_max_connections: int = Field(default=100, ge=1, description="Connection pool size for async LLM requests made by the API")
+    llm_json_mode: bool = Field(default=True, description="Use the provider's JSON mode for classification responses")
+    llm_cache_dir: Optional[str] = Field(default=".cache/llm", description="Directory of the on-disk LLM response cache (empty to disable)")
+    llm_max_retries: int = Field(default=6, ge=0, description="Retries (with backoff, honoring Retry-After) on LLM rate limits and server errors during classification")
+    llm_requests_per_minute: Optional[int] = Field(default=None, ge=1, description="Space classification requests to stay under this provider limit (unset for no limit)")
+    llm_semantic_cache_threshold: Optional[float] = Field(default=None, gt=0, le=1, description="Reuse the classification of a PR whose context is at least this similar (unset to disable)")
+    llm_prewarm: bool = Field(default=True, description="Open a connection to the LLM provider when the API starts (skipped without an API key)")
     
     @model_validator(mode='after')
     def validate_at_least_one_platform_token(self):
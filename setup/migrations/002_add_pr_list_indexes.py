@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Migration 002: Add indexes backing the PR list endpoint.
+
+This migration adds:
+- idx_pr_list: (repo, merged_at, id) covering index for the default list query
+  and keyset (cursor) pagination, with the list filter columns INCLUDEd
+- idx_pr_favorite_merged_at: Partial index for the favorites-only view
+- idx_pr_excellent_merged_at: Partial index for onboarding_suitability = 'excellent'
+
+Indexes are built CONCURRENTLY so the table stays writable while they build.
+
+This script is idempotent - safe to run multiple times.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.config_loader import load_config
+from utils.logger import setup_logger
+
+try:
+    import psycopg2
+except ImportError:
+    print("Error: psycopg2 not installed. Run: uv sync")
+    sys.exit(1)
+
+logger = setup_logger(__name__)
+
+
+INDEXES = {
+    "idx_pr_list": """
+        CREATE INDEX CONCURRENTLY idx_pr_list
+        ON pull_requests(repo, merged_at, id)
+        INCLUDE (is_favorite, difficulty, onboarding_suitability);
+    """,
+    "idx_pr_favorite_merged_at": """
+        CREATE INDEX CONCURRENTLY idx_pr_favorite_merged_at
+        ON pull_requests(merged_at, id)
+        WHERE is_favorite;
+    """,
+    "idx_pr_excellent_merged_at": """
+        CREATE INDEX CONCURRENTLY idx_pr_excellent_merged_at
+        ON pull_requests(merged_at, id)
+        WHERE onboarding_suitability = 'excellent';
+    """,
+}
+
+
+def get_database_url(config) -> str:
+    """Get PostgreSQL database URL from config."""
+    if config.credentials.database_url:
+        return config.credentials.database_url
+
+    logger.error("DATABASE_URL not found in .env file")
+    logger.error("Add to .env file: DATABASE_URL=postgresql://...")
+    sys.exit(1)
+
+
+def create_connection(database_url: str):
+    """
+    Create a PostgreSQL database connection.
+
+    Uses autocommit because CREATE INDEX CONCURRENTLY cannot run inside a
+    transaction block.
+    """
+    try:
+        conn = psycopg2.connect(database_url)
+        conn.autocommit = True
+        logger.info("✓ Connected to PostgreSQL database")
+        return conn
+    except Exception as e:
+        logger.error(f"✗ Failed to connect to database: {e}")
+        sys.exit(1)
+
+
+def check_index_exists(conn, index_name: str) -> bool:
+    """Check if an index exists."""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM pg_indexes
+                WHERE indexname = %s
+            );
+        """, (index_name,))
+        exists = cursor.fetchone()[0]
+        cursor.close()
+        return exists
+    except Exception as e:
+        logger.error(f"Failed to check if index exists: {e}")
+        return False
+
+
+def create_index_if_not_exists(conn, index_name: str, index_sql: str) -> bool:
+    """Create an index if it doesn't exist."""
+    if check_index_exists(conn, index_name):
+        logger.info(f"⊙ Index '{index_name}' already exists, skipping")
+        return True
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(index_sql)
+        cursor.close()
+        logger.info(f"✓ Created index '{index_name}'")
+        return True
+    except Exception as e:
+        # A failed CONCURRENTLY build leaves an INVALID index behind; drop it
+        # so the next run can retry instead of skipping it as "exists"
+        logger.error(f"✗ Failed to create index '{index_name}': {e}")
+        cursor = conn.cursor()
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+        cursor.close()
+        return False
+
+
+def verify_migration(conn) -> bool:
+    """Verify that the migration was successful."""
+    logger.info("\nVerifying migration...")
+
+    success = True
+    for index_name in INDEXES:
+        if check_index_exists(conn, index_name):
+            logger.info(f"✓ Index '{index_name}' exists")
+        else:
+            logger.error(f"✗ Index '{index_name}' missing")
+            success = False
+
+    return success
+
+
+def main():
+    logger.info("="*80)
+    logger.info("MIGRATION 002: Add PR List Indexes")
+    logger.info("="*80)
+
+    # Load configuration
+    try:
+        config = load_config()
+        logger.info("✓ Configuration loaded")
+    except Exception as e:
+        logger.error(f"✗ Failed to load configuration: {e}")
+        sys.exit(1)
+
+    # Get database URL and connect
+    database_url = get_database_url(config)
+    conn = create_connection(database_url)
+
+    try:
+        logger.info("\nCreating indexes...")
+
+        for index_name, index_sql in INDEXES.items():
+            if not create_index_if_not_exists(conn, index_name, index_sql):
+                sys.exit(1)
+
+        # Refresh planner statistics so the new indexes are used right away
+        cursor = conn.cursor()
+        cursor.execute("ANALYZE pull_requests;")
+        cursor.close()
+
+        # Verify migration
+        if verify_migration(conn):
+            logger.info("\n" + "="*80)
+            logger.info("✓ Migration completed successfully!")
+            logger.info("="*80)
+            sys.exit(0)
+        else:
+            logger.error("\n✗ Migration verification failed")
+            sys.exit(1)
+
+    finally:
+        conn.close()
+        logger.info("\n✓ Database connection closed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Migration 003: Store the rendered classification summary on each PR.
+
+This migration adds:
+- classification_info: TEXT column holding the classification summary used by
+  the issue generation prompt, written by save_classification
+
+It then backfills the column for PRs that were classified before it existed,
+using the same formatter the classifier uses, so stored and on-the-fly values
+match exactly.
+
+This script is idempotent - safe to run multiple times.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from classifier.context_builder import build_classification_info
+from utils.config_loader import load_config
+from utils.logger import setup_logger
+
+try:
+    import psycopg2
+    from psycopg2.extras import RealDictCursor, execute_batch
+except ImportError:
+    print("Error: psycopg2 not installed. Run: uv sync")
+    sys.exit(1)
+
+logger = setup_logger(__name__)
+
+
+CLASSIFICATION_COLUMNS = [
+    "difficulty",
+    "task_clarity",
+    "onboarding_suitability",
+    "is_reproducible",
+    "categories",
+    "concepts_taught",
+    "prerequisites",
+    "reasoning",
+    "classified_at",
+]
+
+
+def get_database_url(config) -> str:
+    """Get PostgreSQL database URL from config."""
+    if config.credentials.database_url:
+        return config.credentials.database_url
+
+    logger.error("DATABASE_URL not found in .env file")
+    logger.error("Add to .env file: DATABASE_URL=postgresql://...")
+    sys.exit(1)
+
+
+def create_connection(database_url: str):
+    """Create a PostgreSQL database connection."""
+    try:
+        conn = psycopg2.connect(database_url)
+        logger.info("✓ Connected to PostgreSQL database")
+        return conn
+    except Exception as e:
+        logger.error(f"✗ Failed to connect to database: {e}")
+        sys.exit(1)
+
+
+def check_column_exists(conn, table_name: str, column_name: str) -> bool:
+    """Check if a column exists in a table."""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_name = %s
+                AND column_name = %s
+            );
+        """, (table_name, column_name))
+        exists = cursor.fetchone()[0]
+        cursor.close()
+        return exists
+    except Exception as e:
+        logger.error(f"Failed to check if column exists: {e}")
+        return False
+
+
+def add_column_if_not_exists(conn, column_name: str, column_definition: str) -> bool:
+    """Add a column to pull_requests table if it doesn't exist."""
+    if check_column_exists(conn, "pull_requests", column_name):
+        logger.info(f"⊙ Column '{column_name}' already exists, skipping")
+        return True
+
+    try:
+        cursor = conn.cursor()
+        sql = f"ALTER TABLE pull_requests ADD COLUMN {column_name} {column_definition};"
+        cursor.execute(sql)
+        conn.commit()
+        cursor.close()
+        logger.info(f"✓ Added column '{column_name}'")
+        return True
+    except Exception as e:
+        logger.error(f"✗ Failed to add column '{column_name}': {e}")
+        conn.rollback()
+        return False
+
+
+def backfill_classification_info(conn) -> bool:
+    """Render classification_info for classified PRs that don't have it yet."""
+    try:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(f"""
+            SELECT id, {", ".join(CLASSIFICATION_COLUMNS)}
+            FROM pull_requests
+            WHERE classified_at IS NOT NULL
+            AND classification_info IS NULL;
+        """)
+        rows = cursor.fetchall()
+        cursor.close()
+
+        updates = [(build_classification_info(dict(row)), row["id"]) for row in rows]
+
+        cursor = conn.cursor()
+        execute_batch(
+            cursor,
+            "UPDATE pull_requests SET classification_info = %s WHERE id = %s;",
+            updates,
+        )
+        conn.commit()
+        cursor.close()
+        logger.info(f"✓ Backfilled classification_info for {len(updates)} PRs")
+        return True
+    except Exception as e:
+        logger.error(f"✗ Failed to backfill classification_info: {e}")
+        conn.rollback()
+        return False
+
+
+def verify_migration(conn) -> bool:
+    """Verify that the migration was successful."""
+    logger.info("\nVerifying migration...")
+
+    if check_column_exists(conn, "pull_requests", "classification_info"):
+        logger.info("✓ Column 'classification_info' exists")
+        return True
+
+    logger.error("✗ Column 'classification_info' missing")
+    return False
+
+
+def main():
+    logger.info("="*80)
+    logger.info("MIGRATION 003: Add Classification Info Column")
+    logger.info("="*80)
+
+    # Load configuration
+    try:
+        config = load_config()
+        logger.info("✓ Configuration loaded")
+    except Exception as e:
+        logger.error(f"✗ Failed to load configuration: {e}")
+        sys.exit(1)
+
+    # Get database URL and connect
+    database_url = get_database_url(config)
+    conn = create_connection(database_url)
+
+    try:
+        logger.info("\nAdding columns...")
+
+        if not add_column_if_not_exists(conn, "classification_info", "TEXT"):
+            sys.exit(1)
+
+        logger.info("\nBackfilling existing classifications...")
+
+        if not backfill_classification_info(conn):
+            sys.exit(1)
+
+        # Verify migration
+        if verify_migration(conn):
+            logger.info("\n" + "="*80)
+            logger.info("✓ Migration completed successfully!")
+            logger.info("="*80)
+            sys.exit(0)
+        else:
+            logger.error("\n✗ Migration verification failed")
+            sys.exit(1)
+
+    finally:
+        conn.close()
+        logger.info("\n✓ Database connection closed")
+
+
+if __name__ == "__main__":
+    main()
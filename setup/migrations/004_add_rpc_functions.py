@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Migration 004: Add the PostgreSQL functions called by the API via RPC.
+
+This migration adds:
+- get_distinct_repos(): Unique repository names for the repo filter dropdown,
+  so /api/repos doesn't fetch and dedupe thousands of rows client-side
+- toggle_favorite(_repo, _pr): Flips is_favorite in a single UPDATE, so
+  concurrent toggles can't lose an update
+
+Both use CREATE OR REPLACE, so this script is idempotent - safe to run
+multiple times.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.config_loader import load_config
+from utils.logger import setup_logger
+
+try:
+    import psycopg2
+except ImportError:
+    print("Error: psycopg2 not installed. Run: uv sync")
+    sys.exit(1)
+
+logger = setup_logger(__name__)
+
+
+FUNCTIONS = {
+    "get_distinct_repos": """
+        CREATE OR REPLACE FUNCTION get_distinct_repos()
+        RETURNS TABLE(repo TEXT) AS $$
+          SELECT DISTINCT pull_requests.repo
+          FROM pull_requests
+          ORDER BY pull_requests.repo;
+        $$ LANGUAGE sql STABLE;
+    """,
+    "toggle_favorite": """
+        CREATE OR REPLACE FUNCTION toggle_favorite(_repo TEXT, _pr INTEGER)
+        RETURNS SETOF pull_requests AS $$
+          UPDATE pull_requests
+          SET is_favorite = NOT COALESCE(is_favorite, false)
+          WHERE repo = _repo AND pr_number = _pr
+          RETURNING *;
+        $$ LANGUAGE sql;
+    """,
+}
+
+
+def get_database_url(config) -> str:
+    """Get PostgreSQL database URL from config."""
+    if config.credentials.database_url:
+        return config.credentials.database_url
+
+    logger.error("DATABASE_URL not found in .env file")
+    logger.error("Add to .env file: DATABASE_URL=postgresql://...")
+    sys.exit(1)
+
+
+def create_connection(database_url: str):
+    """Create a PostgreSQL database connection."""
+    try:
+        conn = psycopg2.connect(database_url)
+        logger.info("✓ Connected to PostgreSQL database")
+        return conn
+    except Exception as e:
+        logger.error(f"✗ Failed to connect to database: {e}")
+        sys.exit(1)
+
+
+def check_function_exists(conn, function_name: str) -> bool:
+    """Check if a function exists."""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM pg_proc
+                WHERE proname = %s
+            );
+        """, (function_name,))
+        exists = cursor.fetchone()[0]
+        cursor.close()
+        return exists
+    except Exception as e:
+        logger.error(f"Failed to check if function exists: {e}")
+        return False
+
+
+def create_function(conn, function_name: str, function_sql: str) -> bool:
+    """Create or replace a function."""
+    try:
+        cursor = conn.cursor()
+        cursor.execute(function_sql)
+        # Ask PostgREST to reload its schema cache so the RPC is callable now
+        cursor.execute("NOTIFY pgrst, 'reload schema';")
+        conn.commit()
+        cursor.close()
+        logger.info(f"✓ Created function '{function_name}'")
+        return True
+    except Exception as e:
+        logger.error(f"✗ Failed to create function '{function_name}': {e}")
+        conn.rollback()
+        return False
+
+
+def verify_migration(conn) -> bool:
+    """Verify that the migration was successful."""
+    logger.info("\nVerifying migration...")
+
+    success = True
+    for function_name in FUNCTIONS:
+        if check_function_exists(conn, function_name):
+            logger.info(f"✓ Function '{function_name}' exists")
+        else:
+            logger.error(f"✗ Function '{function_name}' missing")
+            success = False
+
+    return success
+
+
+def main():
+    logger.info("="*80)
+    logger.info("MIGRATION 004: Add RPC Functions")
+    logger.info("="*80)
+
+    # Load configuration
+    try:
+        config = load_config()
+        logger.info("✓ Configuration loaded")
+    except Exception as e:
+        logger.error(f"✗ Failed to load configuration: {e}")
+        sys.exit(1)
+
+    # Get database URL and connect
+    database_url = get_database_url(config)
+    conn = create_connection(database_url)
+
+    try:
+        logger.info("\nCreating functions...")
+
+        for function_name, function_sql in FUNCTIONS.items():
+            if not create_function(conn, function_name, function_sql):
+                sys.exit(1)
+
+        # Verify migration
+        if verify_migration(conn):
+            logger.info("\n" + "="*80)
+            logger.info("✓ Migration completed successfully!")
+            logger.info("="*80)
+            sys.exit(0)
+        else:
+            logger.error("\n✗ Migration verification failed")
+            sys.exit(1)
+
+    finally:
+        conn.close()
+        logger.info("\n✓ Database connection closed")
+
+
+if __name__ == "__main__":
+    main()
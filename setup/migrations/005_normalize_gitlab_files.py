@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Migration 005: Store GitLab files in the GitHub file shape.
+
+GitLab MRs used to be stored with GitLab's diff entries (new_path, diff,
+new_file, ...) and converted to the GitHub shape (filename, patch, status,
+additions, ...) by the API on every read. The GitLab fetcher now normalizes
+files at ingestion; this migration rewrites rows ingested before that change.
+
+Line counts for these rows come from the stored (already truncated) diff, as
+they did on the old read path.
+
+This script is idempotent - safe to run multiple times. Files already in the
+GitHub shape are left untouched.
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fetchers.gitlab import normalize_gitlab_file
+from utils.config_loader import load_config
+from utils.logger import setup_logger
+
+try:
+    import psycopg2
+    from psycopg2.extras import Json, RealDictCursor, execute_batch
+except ImportError:
+    print("Error: psycopg2 not installed. Run: uv sync")
+    sys.exit(1)
+
+logger = setup_logger(__name__)
+
+
+# Matches rows with at least one file still in the GitLab shape
+GITLAB_FILES_FILTER = """
+    platform = 'gitlab'
+    AND jsonb_path_exists(files, '$.files[*] ? (exists(@.new_path) && !(exists(@.filename)))')
+"""
+
+
+def get_database_url(config) -> str:
+    """Get PostgreSQL database URL from config."""
+    if config.credentials.database_url:
+        return config.credentials.database_url
+
+    logger.error("DATABASE_URL not found in .env file")
+    logger.error("Add to .env file: DATABASE_URL=postgresql://...")
+    sys.exit(1)
+
+
+def create_connection(database_url: str):
+    """Create a PostgreSQL database connection."""
+    try:
+        conn = psycopg2.connect(database_url)
+        logger.info("✓ Connected to PostgreSQL database")
+        return conn
+    except Exception as e:
+        logger.error(f"✗ Failed to connect to database: {e}")
+        sys.exit(1)
+
+
+def normalize_files(conn) -> bool:
+    """Rewrite GitLab-shaped files of existing rows into the GitHub shape."""
+    try:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(f"SELECT id, files FROM pull_requests WHERE {GITLAB_FILES_FILTER};")
+        rows = cursor.fetchall()
+        cursor.close()
+
+        updates = [
+            (
+                Json({**row["files"], "files": [normalize_gitlab_file(f) for f in row["files"]["files"]]}),
+                row["id"],
+            )
+            for row in rows
+        ]
+
+        cursor = conn.cursor()
+        execute_batch(
+            cursor,
+            "UPDATE pull_requests SET files = %s WHERE id = %s;",
+            updates,
+        )
+        conn.commit()
+        cursor.close()
+        logger.info(f"✓ Normalized files for {len(updates)} GitLab PRs")
+        return True
+    except Exception as e:
+        logger.error(f"✗ Failed to normalize files: {e}")
+        conn.rollback()
+        return False
+
+
+def verify_migration(conn) -> bool:
+    """Verify that the migration was successful."""
+    logger.info("\nVerifying migration...")
+
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM pull_requests WHERE {GITLAB_FILES_FILTER};")
+    remaining = cursor.fetchone()[0]
+    cursor.close()
+
+    if remaining == 0:
+        logger.info("✓ No GitLab-shaped files remain")
+        return True
+
+    logger.error(f"✗ {remaining} PRs still have GitLab-shaped files")
+    return False
+
+
+def main():
+    logger.info("="*80)
+    logger.info("MIGRATION 005: Normalize GitLab Files")
+    logger.info("="*80)
+
+    # Load configuration
+    try:
+        config = load_config()
+        logger.info("✓ Configuration loaded")
+    except Exception as e:
+        logger.error(f"✗ Failed to load configuration: {e}")
+        sys.exit(1)
+
+    # Get database URL and connect
+    database_url = get_database_url(config)
+    conn = create_connection(database_url)
+
+    try:
+        logger.info("\nNormalizing stored files...")
+
+        if not normalize_files(conn):
+            sys.exit(1)
+
+        # Verify migration
+        if verify_migration(conn):
+            logger.info("\n" + "="*80)
+            logger.info("✓ Migration completed successfully!")
+            logger.info("="*80)
+            sys.exit(0)
+        else:
+            logger.error("\n✗ Migration verification failed")
+            sys.exit(1)
+
+    finally:
+        conn.close()
+        logger.info("\n✓ Database connection closed")
+
+
+if __name__ == "__main__":
+    main()
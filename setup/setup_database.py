@@ -70,6 +70,7 @@ CREATE TABLE IF NOT EXISTS pull_requests (
     prerequisites TEXT[],
     reasoning TEXT,
     classified_at TIMESTAMP,
+    classification_info TEXT,  -- Rendered classification summary for issue generation
     
     -- Issue Generation (from issue generation feature - Phase 4) - NULLABLE
     generated_issue TEXT,
@@ -92,8 +93,36 @@ CREATE_INDEXES_SQL = [
     "CREATE INDEX IF NOT EXISTS idx_pr_onboarding_suitability ON pull_requests(onboarding_suitability);",
     "CREATE INDEX IF NOT EXISTS idx_pr_repo_url ON pull_requests(repo_url);",
     "CREATE INDEX IF NOT EXISTS idx_pr_has_generated_issue ON pull_requests(id) WHERE generated_issue IS NOT NULL;",
+    # PR list endpoint: default query shape / keyset pagination, plus hot filters
+    "CREATE INDEX IF NOT EXISTS idx_pr_list ON pull_requests(repo, merged_at, id) INCLUDE (is_favorite, difficulty, onboarding_suitability);",
+    "CREATE INDEX IF NOT EXISTS idx_pr_merged_at_id ON pull_requests(merged_at, id);",
+    "CREATE INDEX IF NOT EXISTS idx_pr_favorite_merged_at ON pull_requests(merged_at, id) WHERE is_favorite;",
+    "CREATE INDEX IF NOT EXISTS idx_pr_excellent_merged_at ON pull_requests(merged_at, id) WHERE onboarding_suitability = 'excellent';",
 ]
 
+# Functions the API calls via RPC (same definitions as migration 004)
+CREATE_FUNCTIONS_SQL = {
+    # Unique repository names for the repo filter dropdown
+    "get_distinct_repos": """
+        CREATE OR REPLACE FUNCTION get_distinct_repos()
+        RETURNS TABLE(repo TEXT) AS $$
+          SELECT DISTINCT pull_requests.repo
+          FROM pull_requests
+          ORDER BY pull_requests.repo;
+        $$ LANGUAGE sql STABLE;
+    """,
+    # Flips is_favorite in a single UPDATE, so concurrent toggles can't lose an update
+    "toggle_favorite": """
+        CREATE OR REPLACE FUNCTION toggle_favorite(_repo TEXT, _pr INTEGER)
+        RETURNS SETOF pull_requests AS $$
+          UPDATE pull_requests
+          SET is_favorite = NOT COALESCE(is_favorite, false)
+          WHERE repo = _repo AND pr_number = _pr
+          RETURNING *;
+        $$ LANGUAGE sql;
+    """,
+}
+
 DROP_TABLE_SQL = "DROP TABLE IF EXISTS pull_requests CASCADE;"
 
 
@@ -181,7 +210,8 @@ def verify_schema(conn) -> bool:
             'idx_enrichment_status', 'idx_repo', 'idx_merged_at', 'idx_platform', 
             'idx_pr_favorite', 'idx_pr_difficulty', 'idx_pr_task_clarity',
             'idx_pr_is_reproducible', 'idx_pr_onboarding_suitability', 'idx_pr_repo_url',
-            'idx_pr_has_generated_issue'
+            'idx_pr_has_generated_issue', 'idx_pr_list', 'idx_pr_merged_at_id',
+            'idx_pr_favorite_merged_at', 'idx_pr_excellent_merged_at'
         ]
         for idx in expected_indexes:
             if idx in indexes:
@@ -189,8 +219,24 @@ def verify_schema(conn) -> bool:
             else:
                 logger.warning(f"⚠ Index '{idx}' missing")
         
+        # Check RPC functions (the API returns 500 without them)
+        cursor.execute(
+            "SELECT proname FROM pg_proc WHERE proname = ANY(%s);",
+            (list(CREATE_FUNCTIONS_SQL),)
+        )
+        functions = {row[0] for row in cursor.fetchall()}
+        
         cursor.close()
-        return True
+        
+        success = True
+        for function_name in CREATE_FUNCTIONS_SQL:
+            if function_name in functions:
+                logger.info(f"✓ Function '{function_name}' exists")
+            else:
+                logger.error(f"✗ Function '{function_name}' missing")
+                success = False
+        
+        return success
         
     except Exception as e:
         logger.error(f"✗ Schema verification failed: {e}")
@@ -213,6 +259,14 @@ def create_schema(conn) -> bool:
         if not execute_sql(conn, idx_sql, f"Created index '{idx_name}'"):
             return False
     
+    # Create RPC functions, then have PostgREST reload its schema cache so
+    # they are callable right away
+    for function_name, function_sql in CREATE_FUNCTIONS_SQL.items():
+        if not execute_sql(conn, function_sql, f"Created function '{function_name}'"):
+            return False
+    if not execute_sql(conn, "NOTIFY pgrst, 'reload schema';", "Reloaded PostgREST schema cache"):
+        return False
+    
     logger.info("\n✓ Database schema created successfully!")
     return True
 
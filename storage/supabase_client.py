@@ -10,12 +10,53 @@ All methods are idempotent and can be safely re-run.
 
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
-from supabase import Client, create_client
 
+import httpx
+from supabase import Client, ClientOptions, create_client
+
+from classifier.context_builder import build_classification_info
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Connection pool shared by every PostgREST request this client makes. HTTP/2
+# multiplexes concurrent API requests over one TLS connection, and keep-alive
+# avoids a fresh handshake for each request after short idle gaps.
+HTTP_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 60.0
+HTTP_TIMEOUT = 120.0
+# Fail fast on an unreachable host instead of waiting out the read timeout
+HTTP_CONNECT_TIMEOUT = 10.0
+
+
+def _build_http_client() -> httpx.Client:
+    """Build the pooled HTTP/2 client passed to supabase-py."""
+    logged = False
+
+    def log_http_version(response: httpx.Response) -> None:
+        # Once per client: confirms whether HTTP/2 was negotiated (HTTP/1.1
+        # means concurrent requests each need their own connection)
+        nonlocal logged
+        if not logged:
+            logged = True
+            logger.info(f"Supabase connection negotiated {response.http_version}")
+
+    return httpx.Client(
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        # Pool limits belong on the transport: httpx ignores the client's
+        # limits when a transport is given. Retry once when a pooled
+        # connection was closed by the server.
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=1,
+            limits=httpx.Limits(
+                max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        ),
+        event_hooks={"response": [log_http_version]},
+    )
+
 
 class SupabaseClient:
     """Client for interacting with Supabase storage."""
@@ -28,7 +69,11 @@ class SupabaseClient:
             supabase_url: Supabase project URL
             supabase_key: Supabase API key (anon/public key)
         """
-        self.client: Client = create_client(supabase_url, supabase_key)
+        self.client: Client = create_client(
+            supabase_url,
+            supabase_key,
+            options=ClientOptions(httpx_client=_build_http_client()),
+        )
         self.table_name = "pull_requests"
         logger.info(f"Initialized SupabaseClient for {supabase_url}")
     
@@ -493,6 +538,8 @@ class SupabaseClient:
                 "reasoning": classification["reasoning"],
                 "classified_at": datetime.now(timezone.utc).isoformat(),
             }
+            # Render the prompt summary once here instead of on every read
+            update_record["classification_info"] = build_classification_info(update_record)
             
             # Update the PR record with classification data
             result = self.client.table(self.table_name).update(
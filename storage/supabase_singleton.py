@@ -0,0 +1,22 @@
+"""
+Process-wide SupabaseClient instance.
+
+The API modules (backend/app.py, backend/routes.py) share one client instead of
+each building their own at import time. Tests can call get_supabase.cache_clear()
+to force a fresh client.
+"""
+
+from functools import lru_cache
+
+from storage.supabase_client import SupabaseClient
+from utils.config_loader import load_config
+
+
+@lru_cache(maxsize=1)
+def get_supabase() -> SupabaseClient:
+    """Get the shared SupabaseClient, creating it on first use."""
+    config = load_config()
+    return SupabaseClient(
+        config.credentials.supabase_url,
+        config.credentials.supabase_key
+    )
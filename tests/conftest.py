@@ -4,6 +4,24 @@ import os
 import pytest
 from pathlib import Path
 
+from utils.config_loader import load_config
+
+# Keep API startup from connecting to the real LLM provider during tests
+os.environ.setdefault("LLM_PREWARM", "false")
+
+
+@pytest.fixture(autouse=True)
+def clear_config_cache():
+    """
+    Clear the cached config around each test.
+    
+    load_config() is memoized for the process; tests that change environment
+    variables need it to re-read them.
+    """
+    load_config.cache_clear()
+    yield
+    load_config.cache_clear()
+
 
 @pytest.fixture
 def test_env(monkeypatch, tmp_path):
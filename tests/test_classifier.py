@@ -4,13 +4,26 @@ Tests for classification components.
 Keeping tests simple and focused on basic functionality.
 """
 
+import asyncio
 import json
+import httpx
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from classifier.context_builder import build_pr_context
+from classifier import batch
+from classifier.llm_cache import LLMCache, cache_key
 from classifier.llm_client import LLMClient
-from classifier.classifier import Classifier
-from classifier.prompt_template import CLASSIFICATION_PROMPT
+from classifier.semantic_cache import SemanticCache, cosine, embed
+from classifier.classifier import CLASSIFICATION_MAX_TOKENS, Classifier
+from classifier.preflight import trivial_classification
+from classifier.prompt_template import (
+    CLASSIFICATION_PROMPT,
+    CLASSIFICATION_PROMPT_BATCH,
+    CLASSIFICATION_SYSTEM,
+    build_classification_batch_prompt,
+    build_classification_prompt,
+    build_classification_user_prompt,
+)
 
 
 class TestContextBuilder:
@@ -85,6 +98,23 @@ class TestContextBuilder:
         assert "useNewHook.js" in context
         assert "Need better state management" in context
         assert "Good idea!" in context
+    
+    def test_build_pr_context_caps_size(self):
+        """Test a runaway PR description is truncated with a marker."""
+        pr_data = {
+            "repo": "facebook/react",
+            "pr_number": 123,
+            "title": "Add new hook",
+            "body": "Stack trace line\n" * 5000,
+        }
+        
+        context = build_pr_context(pr_data, max_tokens=1000)
+        
+        assert len(context) < 4100
+        assert context.startswith("=" * 80 + "\nPULL REQUEST METADATA")
+        assert context.endswith("tokens ...]")
+        assert "[... truncated about " in context
+        assert len(build_pr_context(pr_data, max_tokens=None)) > 80000
 
 
 class TestPromptTemplate:
@@ -100,6 +130,99 @@ class TestPromptTemplate:
         assert "trivial" in CLASSIFICATION_PROMPT
         assert "{pr_context}" in CLASSIFICATION_PROMPT  # Format placeholder
 
+    def test_build_classification_prompt_matches_format(self):
+        """Test that the pre-split builder produces exactly what str.format does."""
+        pr_context = "PR #1: Fix {weird} braces }{"
+
+        assert build_classification_prompt(pr_context) == CLASSIFICATION_PROMPT.format(pr_context=pr_context)
+
+
+    def test_system_and_user_prompts_split_full_prompt(self):
+        """Test that the static system message plus the user message is the full prompt."""
+        pr_context = "PR #1: Fix {weird} braces }{"
+        user_prompt = build_classification_user_prompt(pr_context)
+
+        assert pr_context not in CLASSIFICATION_SYSTEM
+        assert "OUTPUT FORMAT:" in CLASSIFICATION_SYSTEM
+        assert user_prompt.startswith("Now, analyze the following pull request:")
+        assert CLASSIFICATION_SYSTEM + "\n\n" + user_prompt == build_classification_prompt(pr_context)
+
+    def test_build_classification_batch_prompt_numbers_prs(self):
+        """Test that the batch prompt shares the field definitions and numbers each PR."""
+        prompt = build_classification_batch_prompt(["PR #1: Fix {weird} braces", "PR #2: Add docs"])
+
+        assert "4. **onboarding_suitability**" in prompt
+        assert "exactly 2 objects" in prompt
+        assert "--- PR 1 ---\n\nPR #1: Fix {weird} braces" in prompt
+        assert "--- PR 2 ---\n\nPR #2: Add docs" in prompt
+        assert prompt == CLASSIFICATION_PROMPT_BATCH.format(
+            pr_count=2,
+            pr_contexts="--- PR 1 ---\n\nPR #1: Fix {weird} braces\n\n--- PR 2 ---\n\nPR #2: Add docs\n\n---"
+        )
+
+
+class TestPreflight:
+    """Tests for rule-based classification of trivial PRs."""
+    
+    def test_dependency_bot_titles(self):
+        """Test that dependency bot PRs are classified without the LLM."""
+        for title in [
+            "Bump lodash from 4.17.20 to 4.17.21",
+            "chore(deps): update dependency eslint to v9",
+            "build(deps-dev): bump jest from 29.0.0 to 29.7.0 in /web",
+            "[pre-commit.ci] pre-commit autoupdate",
+        ]:
+            result = trivial_classification({"title": title, "files": []})
+            assert result["onboarding_suitability"] == "poor", title
+            assert result["categories"] == ["dependencies"]
+        
+        assert trivial_classification({"title": "Fix bump detection in uploader", "files": []}) is None
+    
+    def test_lockfile_only(self):
+        """Test that lockfile-only changes are trivial but lockfile plus code is not."""
+        lockfiles = [{"filename": "web/package-lock.json"}, {"filename": "poetry.lock"}]
+        
+        assert trivial_classification({"title": "Refresh locks", "files": lockfiles})["difficulty"] == "trivial"
+        assert trivial_classification({"title": "Add dep", "files": lockfiles + [{"filename": "app.js"}]}) is None
+    
+    def test_whitespace_only(self):
+        """Test whitespace-only diffs, keeping indentation significant in Python."""
+        reformatted = {"filename": "app.js", "status": "modified",
+                       "patch": "@@ -1,2 +1,3 @@\n-if(x){y()}\n+if (x) { y() }\n+\n ok"}
+        reindented = {"filename": "app.py", "status": "modified",
+                      "patch": "@@ -1,2 +1,2 @@\n-    return x\n+return x"}
+        trailing = {"filename": "app.py", "status": "modified",
+                    "patch": "@@ -1 +1 @@\n-return x   \n+return x"}
+        
+        assert trivial_classification({"title": "Format", "files": [reformatted, trailing]})["categories"] == ["formatting"]
+        assert trivial_classification({"title": "Fix scope", "files": [reindented]}) is None
+        assert trivial_classification({"title": "Format", "files": [{**reformatted, "patch_truncated": True}]}) is None
+    
+    def test_stored_files_shape(self):
+        """Test the nested files structure of stored PRs ({'summary': ..., 'files': [...]})."""
+        lockfiles = {"summary": {"total_files": 1}, "files": [{"filename": "yarn.lock"}]}
+        code = {"summary": {"total_files": 1}, "files": [{"filename": "app.js", "patch": "+x()"}]}
+        
+        assert trivial_classification({"title": "Refresh locks", "files": lockfiles})["categories"] == ["dependencies"]
+        assert trivial_classification({"title": "Fix crash", "files": code}) is None
+        assert trivial_classification({"title": "Fix crash", "files": {"summary": {}}}) is None
+    
+    @patch('classifier.classifier.LLMClient')
+    def test_classifier_skips_llm_for_trivial_prs(self, mock_llm_class):
+        """Test the classifier returns rule-based classifications without an LLM call."""
+        mock_llm = Mock()
+        mock_llm_class.return_value = mock_llm
+        
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key"
+        )
+        result = classifier.classify_pr({"pr_number": 1, "title": "Bump axios from 1.6.0 to 1.6.2", "files": []})
+        
+        classifier._validate_classification(result)
+        mock_llm.send_prompt.assert_not_called()
+
 
 class TestLLMClient:
     """Tests for LLM client."""
@@ -229,6 +352,409 @@ Test with Japanese locale."""
         # Should raise the exception
         with pytest.raises(Exception, match="API rate limit exceeded"):
             client.generate_issue("Generate an issue...")
+    
+    @patch('classifier.llm_client.AsyncOpenAI')
+    @patch('classifier.llm_client.OpenAI')
+    def test_generate_issue_async_uses_shared_http_client(self, mock_openai_class, mock_async_openai_class):
+        """Test async issue generation goes through AsyncOpenAI with the given pool."""
+        mock_async_client = Mock()
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="# Issue"))]
+        mock_response.usage = None
+        mock_async_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_async_openai_class.return_value = mock_async_client
+        http_client = Mock()
+        
+        client = LLMClient(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key",
+            http_client=http_client
+        )
+        result = asyncio.run(client.generate_issue_async("Generate an issue..."))
+        
+        assert result == "# Issue"
+        assert mock_async_openai_class.call_args.kwargs["http_client"] is http_client
+        mock_async_client.chat.completions.create.assert_awaited_once()
+        mock_openai_class.return_value.chat.completions.create.assert_not_called()
+    
+    @patch('classifier.llm_client.AsyncOpenAI')
+    @patch('classifier.llm_client.OpenAI')
+    def test_generate_issue_async_retries_when_cut_off(self, mock_openai_class, mock_async_openai_class):
+        """Test a response cut off at the token limit is retried once with double the budget."""
+        cut_off = Mock(choices=[Mock(message=Mock(content="# Iss"), finish_reason="length")], usage=None)
+        complete = Mock(choices=[Mock(message=Mock(content="# Issue"), finish_reason="stop")], usage=None)
+        mock_async_client = Mock()
+        mock_async_client.chat.completions.create = AsyncMock(side_effect=[cut_off, complete])
+        mock_async_openai_class.return_value = mock_async_client
+        
+        client = LLMClient(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key"
+        )
+        result = asyncio.run(client.generate_issue_async("Generate an issue...", max_tokens=4096))
+        
+        assert result == "# Issue"
+        budgets = [c.kwargs["max_tokens"] for c in mock_async_client.chat.completions.create.await_args_list]
+        assert budgets == [4096, 8192]
+    
+    @patch('classifier.llm_client.AsyncOpenAI')
+    @patch('classifier.llm_client.OpenAI')
+    def test_send_prompt_async_joins_identical_inflight_request(self, mock_openai_class, mock_async_openai_class):
+        """Test concurrent identical prompts share one API call, unless a fresh answer is asked for."""
+        calls = []
+        
+        async def create(**kwargs):
+            calls.append(kwargs)
+            await asyncio.sleep(0.01)
+            return Mock(usage=None, choices=[Mock(message=Mock(content=f"answer {len(calls)}"))])
+        
+        mock_async_client = Mock()
+        mock_async_client.chat.completions.create = AsyncMock(side_effect=create)
+        mock_async_openai_class.return_value = mock_async_client
+        
+        client = LLMClient(provider="anthropic", model="claude-3-5-sonnet-20241022", api_key="test_key")
+        
+        async def run():
+            return await asyncio.gather(
+                client.send_prompt_async("Same"),
+                client.send_prompt_async("Same"),
+                client.send_prompt_async("Same", use_cache=False),
+            )
+        
+        results = asyncio.run(run())
+        
+        assert results[0] == results[1] == "answer 2"
+        assert len(calls) == 2
+        assert client._inflight == {}
+    
+    @patch('classifier.llm_client.OpenAI')
+    def test_send_prompt_stops_after_json(self, mock_openai_class):
+        """Test free-form responses are streamed and cut off once the JSON object closes."""
+        def chunk(text):
+            return Mock(choices=[Mock(delta=Mock(content=text))])
+        
+        consumed = []
+        
+        class FakeStream:
+            def __init__(self, texts):
+                self.texts = texts
+                self.closed = False
+            
+            def __iter__(self):
+                for text in self.texts:
+                    consumed.append(text)
+                    yield chunk(text)
+            
+            def close(self):
+                self.closed = True
+        
+        stream = FakeStream(['Here you go: {"reasoning": "uses {braces} and \\"quotes\\"', '", "x": {}}', ' Hope', ' that helps!'])
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = stream
+        mock_openai_class.return_value = mock_client
+        
+        client = LLMClient(provider="anthropic", model="claude-3-5-sonnet-20241022", api_key="test_key")
+        result = client.send_prompt("Classify", stop_after_json=True)
+        
+        assert result == 'Here you go: {"reasoning": "uses {braces} and \\"quotes\\"", "x": {}}'
+        assert len(consumed) == 2
+        assert stream.closed
+        assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+    
+    @patch('classifier.llm_client.OpenAI')
+    def test_send_prompt_json_mode_anthropic_uses_forced_tool(self, mock_openai_class):
+        """Test Anthropic JSON mode forces a tool call and returns its arguments."""
+        mock_client = Mock()
+        tool_call = Mock()
+        tool_call.function.arguments = '{"difficulty": "easy"}'
+        mock_response = Mock(usage=None)
+        mock_response.choices = [Mock(message=Mock(content=None, tool_calls=[tool_call]))]
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_openai_class.return_value = mock_client
+        
+        client = LLMClient(provider="anthropic", model="claude-3-5-sonnet-20241022", api_key="test_key")
+        schema = {"type": "object", "properties": {"difficulty": {"type": "string"}}}
+        result = client.send_prompt("Classify", json_schema=schema)
+        
+        assert result == '{"difficulty": "easy"}'
+        kwargs = mock_client.chat.completions.create.call_args.kwargs
+        assert kwargs["tools"][0]["function"]["parameters"] is schema
+        assert kwargs["tool_choice"]["function"]["name"] == kwargs["tools"][0]["function"]["name"]
+        assert "response_format" not in kwargs
+    
+    @patch('classifier.llm_client.OpenAI')
+    def test_send_prompt_json_mode_openai_uses_response_format(self, mock_openai_class):
+        """Test OpenAI JSON mode sends the schema as a strict json_schema response_format."""
+        mock_client = Mock()
+        mock_response = Mock(usage=None)
+        mock_response.choices = [Mock(message=Mock(content='{"difficulty": "easy"}'))]
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_openai_class.return_value = mock_client
+        
+        client = LLMClient(provider="openai", model="gpt-4o", api_key="test_key")
+        schema = {
+            "title": "Classification",
+            "type": "object",
+            "properties": {"difficulty": {"type": "string"}, "tags": {"type": "array", "items": {
+                "type": "object", "properties": {"name": {"type": "string"}}}}},
+            "required": ["difficulty"],
+        }
+        result = client.send_prompt("Classify as JSON", json_schema=schema)
+        
+        assert result == '{"difficulty": "easy"}'
+        kwargs = mock_client.chat.completions.create.call_args.kwargs
+        response_format = kwargs["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["name"] == "Classification"
+        assert response_format["json_schema"]["strict"] is True
+        strict = response_format["json_schema"]["schema"]
+        assert strict["required"] == ["difficulty", "tags"]
+        assert strict["additionalProperties"] is False
+        assert strict["properties"]["tags"]["items"]["additionalProperties"] is False
+        assert schema["required"] == ["difficulty"]
+        assert "tools" not in kwargs
+
+
+class TestRateLimiter:
+    """Tests for client-side request pacing."""
+    
+    def test_spaces_requests_evenly(self):
+        """Test that reservations are one interval apart."""
+        from classifier.rate_limiter import RateLimiter
+        limiter = RateLimiter(requests_per_minute=600)
+        
+        delays = [limiter._reserve() for _ in range(3)]
+        
+        assert delays[0] == 0
+        assert delays[1] == pytest.approx(0.1, abs=0.01)
+        assert delays[2] == pytest.approx(0.2, abs=0.01)
+    
+    @patch('classifier.llm_client.AsyncOpenAI')
+    @patch('classifier.llm_client.OpenAI')
+    def test_client_configures_retries_and_pacing(self, mock_openai_class, mock_async_openai_class):
+        """Test SDK retries are configurable and requests wait for the limiter."""
+        mock_client = Mock()
+        mock_response = Mock(usage=None)
+        mock_response.choices = [Mock(message=Mock(content="ok"))]
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_openai_class.return_value = mock_client
+        
+        client = LLMClient(
+            provider="openai",
+            model="gpt-4o",
+            api_key="test_key",
+            max_retries=6,
+            requests_per_minute=60
+        )
+        client.rate_limiter = Mock()
+        client.send_prompt("Hi")
+        
+        assert mock_openai_class.call_args.kwargs["max_retries"] == 6
+        assert mock_async_openai_class.call_args.kwargs["max_retries"] == 6
+        client.rate_limiter.wait.assert_called_once()
+
+
+class TestBatch:
+    """Tests for batch API submission."""
+    
+    @patch('classifier.llm_client.OpenAI')
+    def test_openai_submit_and_results(self, mock_openai_class):
+        """Test OpenAI batches upload JSONL chat requests and parse the output file."""
+        mock_client = Mock()
+        mock_client.files.create.return_value = Mock(id="file-in")
+        mock_client.batches.create.return_value = Mock(id="batch-1")
+        mock_openai_class.return_value = mock_client
+        
+        client = LLMClient(provider="openai", model="gpt-4o", api_key="test_key")
+        batch_id = client.submit_batch({"0": "First", "1": "Second"}, json_schema={"type": "object"})
+        
+        assert batch_id == "batch-1"
+        lines = [json.loads(line) for line in mock_client.files.create.call_args.kwargs["file"][1].splitlines()]
+        assert [line["custom_id"] for line in lines] == ["0", "1"]
+        assert lines[0]["url"] == "/v1/chat/completions"
+        assert lines[0]["body"]["messages"] == [{"role": "user", "content": "First"}]
+        assert lines[0]["body"]["response_format"]["type"] == "json_schema"
+        
+        mock_client.batches.retrieve.return_value = Mock(status="in_progress")
+        assert client.batch_results("batch-1") is None
+        
+        mock_client.batches.retrieve.return_value = Mock(status="completed", output_file_id="file-out")
+        mock_client.files.content.return_value = Mock(text="\n".join([
+            json.dumps({"custom_id": "0", "error": None, "response": {
+                "status_code": 200, "body": {"choices": [{"message": {"content": "{}"}}]}}}),
+            json.dumps({"custom_id": "1", "error": {"message": "boom"}, "response": None}),
+        ]))
+        assert client.batch_results("batch-1") == {"0": "{}"}
+    
+    def test_anthropic_params_and_results(self):
+        """Test Anthropic batches use native Messages params and read tool call input."""
+        params = batch.anthropic_params(
+            {"model": "claude", "max_tokens": 100, "temperature": 0.0,
+             "messages": [{"role": "system", "content": "Be terse"}, {"role": "user", "content": "Hi"}]},
+            json_schema={"type": "object"},
+            tool_name="submit_json"
+        )
+        assert params["system"] == [{"type": "text", "text": "Be terse", "cache_control": {"type": "ephemeral"}}]
+        assert params["messages"] == [{"role": "user", "content": "Hi"}]
+        assert params["tool_choice"] == {"type": "tool", "name": "submit_json"}
+        
+        def handler(request):
+            if request.url.path.endswith("/msgbatch_1"):
+                return httpx.Response(200, json={"processing_status": "ended", "results_url": "https://results/1"})
+            assert request.headers["x-api-key"] == "key"
+            return httpx.Response(200, text="\n".join([
+                json.dumps({"custom_id": "0", "result": {"type": "succeeded", "message": {
+                    "content": [{"type": "tool_use", "input": {"difficulty": "easy"}}]}}}),
+                json.dumps({"custom_id": "1", "result": {"type": "errored", "error": {}}}),
+            ]))
+        
+        with httpx.Client(transport=httpx.MockTransport(handler)) as http:
+            results = batch.anthropic_batch_results(http, "key", "msgbatch_1")
+        
+        assert list(results) == ["0"]
+        assert json.loads(results["0"]) == {"difficulty": "easy"}
+
+
+class TestLLMCache:
+    """Tests for the on-disk LLM response cache."""
+    
+    def test_cache_roundtrip_and_stats(self, tmp_path):
+        """Test stored responses survive reopening and hits/misses are counted."""
+        key = cache_key({"model": "m", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.0})
+        assert key == cache_key({"temperature": 0.0, "messages": [{"role": "user", "content": "hi"}], "model": "m"})
+        
+        cache = LLMCache(tmp_path)
+        assert cache.get(key) is None
+        cache.set(key, "hello")
+        cache.close()
+        
+        cache = LLMCache(tmp_path)
+        assert cache.get(key) == "hello"
+        assert cache.stats == {"hits": 1, "misses": 0}
+    
+    @patch('classifier.llm_client.OpenAI')
+    def test_send_prompt_served_from_cache(self, mock_openai_class, tmp_path):
+        """Test identical prompts at temperature 0 hit the API once, unless bypassed."""
+        mock_client = Mock()
+        mock_response = Mock(usage=None)
+        mock_response.choices = [Mock(message=Mock(content="Test response"))]
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_openai_class.return_value = mock_client
+        
+        client = LLMClient(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key",
+            cache=LLMCache(tmp_path)
+        )
+        
+        assert client.send_prompt("Same prompt") == "Test response"
+        assert client.send_prompt("Same prompt") == "Test response"
+        assert mock_client.chat.completions.create.call_count == 1
+        
+        client.send_prompt("Same prompt", use_cache=False)
+        client.send_prompt("Other prompt")
+        assert mock_client.chat.completions.create.call_count == 3
+    
+    @patch('classifier.llm_client.OpenAI')
+    def test_cache_skipped_above_zero_temperature(self, mock_openai_class, tmp_path):
+        """Test non-deterministic requests are never cached."""
+        mock_client = Mock()
+        mock_response = Mock(usage=None)
+        mock_response.choices = [Mock(message=Mock(content="Test response"))]
+        mock_client.chat.completions.create.return_value = mock_response
+        mock_openai_class.return_value = mock_client
+        
+        client = LLMClient(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key",
+            temperature=0.7,
+            cache=LLMCache(tmp_path)
+        )
+        client.send_prompt("Same prompt")
+        client.send_prompt("Same prompt")
+        
+        assert mock_client.chat.completions.create.call_count == 2
+
+
+class TestSemanticCache:
+    """Tests for the similar-PR cache."""
+    
+    def test_embed_ignores_case_and_is_normalized(self):
+        """Test identical token bags have similarity 1 and unrelated text 0."""
+        a = embed("Bump lodash from 4.17.20 to 4.17.21")
+        
+        assert cosine(a, embed("bump LODASH from 4.17.20 to 4.17.21")) == pytest.approx(1.0)
+        assert cosine(a, embed("Refactor the scheduler")) == 0.0
+        assert embed("") == {}
+    
+    def test_lookup_threshold_namespace_and_persistence(self, tmp_path):
+        """Test hits need enough similarity and the same namespace, and survive reopening."""
+        cache = SemanticCache(tmp_path, threshold=0.9)
+        cache.set("anthropic/model", "Bump lodash from 4.17.20 to 4.17.21 in package.json", "stored")
+        cache.close()
+        
+        cache = SemanticCache(tmp_path, threshold=0.9)
+        assert cache.get("anthropic/model", "Bump lodash from 4.17.20 to 4.17.21 in package.json") == "stored"
+        assert cache.get("openai/other", "Bump lodash from 4.17.20 to 4.17.21 in package.json") is None
+        assert cache.get("anthropic/model", "Add dark mode toggle to settings page") is None
+        assert cache.stats == {"hits": 1, "misses": 2}
+    
+    def test_miss_then_store_embeds_once(self, tmp_path):
+        """Test storing the context that just missed reuses its embedding."""
+        cache = SemanticCache(tmp_path)
+        
+        with patch('classifier.semantic_cache.embed', wraps=embed) as mock_embed:
+            assert cache.get("anthropic/model", "Fix crash when config is missing") is None
+            cache.set("anthropic/model", "Fix crash when config is missing", "stored")
+            assert cache.get("anthropic/model", "Fix crash when config is missing") == "stored"
+        
+        assert mock_embed.call_count == 1
+    
+    @patch('classifier.classifier.LLMClient')
+    def test_classifier_reuses_near_duplicate_classification(self, mock_llm_class, tmp_path):
+        """Test a near-duplicate PR is classified from the cache without an LLM call."""
+        mock_llm = Mock()
+        mock_llm.send_prompt.return_value = json.dumps({
+            "difficulty": "trivial",
+            "task_clarity": "clear",
+            "is_reproducible": "highly likely",
+            "onboarding_suitability": "poor",
+            "categories": ["dependencies"],
+            "concepts_taught": ["Dependency management"],
+            "prerequisites": ["None"],
+            "reasoning": "Version bump."
+        })
+        mock_llm_class.return_value = mock_llm
+        
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key",
+            semantic_cache=SemanticCache(tmp_path, threshold=0.9),
+            preflight=False
+        )
+        patch_text = "\n".join(
+            f"-    \"dep{i}\": \"^4.17.20\",\n+    \"dep{i}\": \"^4.17.21\"," for i in range(30)
+        )
+        
+        def bump_pr(pr_number):
+            return {
+                "pr_number": pr_number,
+                "repo": "facebook/react",
+                "title": "Bump dependencies from 4.17.20 to 4.17.21",
+                "files": [{"filename": "package.json", "status": "modified", "additions": 30,
+                           "deletions": 30, "changes": 60, "patch": patch_text}]
+            }
+        
+        first = classifier.classify_pr(bump_pr(1))
+        second = classifier.classify_pr(bump_pr(2))
+        
+        assert second == first
+        assert mock_llm.send_prompt.call_count == 1
 
 
 class TestClassifier:
@@ -329,7 +855,8 @@ class TestClassifier:
         classifier = Classifier(
             provider="anthropic",
             model="claude-3-5-sonnet-20241022",
-            api_key="test_key"
+            api_key="test_key",
+            json_mode=False  # Markdown extraction is the non-JSON-mode fallback
         )
         
         # Classify PR
@@ -348,3 +875,283 @@ class TestClassifier:
         assert result["difficulty"] == "easy"
         assert "bug-fix" in result["categories"]
 
+    @patch('classifier.classifier.LLMClient')
+    def test_parse_classification_response_extracts_json(self, mock_llm_class):
+        """Test JSON extraction from fenced blocks and surrounding prose."""
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key",
+            json_mode=False
+        )
+
+        fenced = 'Result:\n```json\n{"difficulty": "easy", "nested": {"a": 1}}\n```\nDone.'
+        assert classifier._parse_classification_response(fenced) == {
+            "difficulty": "easy", "nested": {"a": 1}
+        }
+
+        prose = 'Sure! {"difficulty": "hard"} Hope this helps.'
+        assert classifier._parse_classification_response(prose) == {"difficulty": "hard"}
+
+        with pytest.raises(json.JSONDecodeError):
+            classifier._parse_classification_response("no json here")
+
+    @patch('classifier.classifier.LLMClient')
+    def test_json_mode_sends_schema_and_parses_strictly(self, mock_llm_class):
+        """Test JSON mode passes the classification schema and skips text extraction."""
+        from classifier.classifier import CLASSIFICATION_SCHEMA
+        mock_llm = Mock()
+        mock_llm.send_prompt.return_value = json.dumps({
+            "difficulty": "easy",
+            "task_clarity": "clear",
+            "is_reproducible": "highly likely",
+            "onboarding_suitability": "excellent",
+            "categories": ["bug-fix"],
+            "concepts_taught": ["Debugging"],
+            "prerequisites": ["Basic programming"],
+            "reasoning": "Simple bug fix."
+        })
+        mock_llm_class.return_value = mock_llm
+
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key"
+        )
+        result = classifier.classify_pr({"pr_number": 1, "repo": "facebook/react", "title": "Fix", "files": []})
+
+        assert result["difficulty"] == "easy"
+        assert mock_llm.send_prompt.call_args.kwargs["json_schema"] is CLASSIFICATION_SCHEMA
+        assert mock_llm.send_prompt.call_args.kwargs["system"] == CLASSIFICATION_SYSTEM
+        assert mock_llm_class.call_args.kwargs["max_tokens"] == CLASSIFICATION_MAX_TOKENS
+        assert "difficulty" in CLASSIFICATION_SCHEMA["required"]
+        with pytest.raises(json.JSONDecodeError):
+            classifier._parse_classification_response('Sure! {"difficulty": "hard"}')
+
+    
+    @patch('classifier.classifier.LLMClient')
+    def test_classify_prs_runs_batch_concurrently(self, mock_llm_class):
+        """Test async batch classification returns per-PR results and reports each one."""
+        valid_response = json.dumps({
+            "difficulty": "easy",
+            "task_clarity": "clear",
+            "is_reproducible": "highly likely",
+            "onboarding_suitability": "excellent",
+            "categories": ["bug-fix"],
+            "concepts_taught": ["Debugging"],
+            "prerequisites": ["Basic programming"],
+            "reasoning": "Simple bug fix."
+        })
+        
+        async def send_prompt_async(prompt, **kwargs):
+            if "Broken PR" in prompt:
+                raise Exception("API error")
+            return valid_response
+        
+        mock_llm = Mock()
+        mock_llm.send_prompt_async = AsyncMock(side_effect=send_prompt_async)
+        mock_llm_class.return_value = mock_llm
+        
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key"
+        )
+        prs = [
+            {"pr_number": 1, "repo": "facebook/react", "title": "Fix bug", "files": []},
+            {"pr_number": 2, "repo": "facebook/react", "title": "Broken PR", "files": []},
+        ]
+        reported = []
+        
+        async def on_result(pr_data, result):
+            reported.append(pr_data["pr_number"])
+        
+        results = asyncio.run(classifier.classify_prs(prs, concurrency=2, on_result=on_result))
+        
+        assert results[0]["difficulty"] == "easy"
+        assert isinstance(results[1], Exception)
+        assert sorted(reported) == [1, 2]
+        mock_llm.send_prompt.assert_not_called()
+
+    @patch('classifier.classifier.LLMClient')
+    def test_classify_prs_batch_aligns_results(self, mock_llm_class):
+        """Test batch classification maps responses back to PRs and reports bad ones."""
+        valid_response = json.dumps({
+            "difficulty": "easy",
+            "task_clarity": "clear",
+            "is_reproducible": "highly likely",
+            "onboarding_suitability": "excellent",
+            "categories": ["bug-fix"],
+            "concepts_taught": ["Debugging"],
+            "prerequisites": ["Basic programming"],
+            "reasoning": "Simple bug fix."
+        })
+        mock_llm = Mock()
+        mock_llm.submit_batch.return_value = "batch-1"
+        mock_llm.poll_batch.return_value = {"0": valid_response, "1": '{"difficulty": "easy"}'}
+        mock_llm_class.return_value = mock_llm
+        
+        classifier = Classifier(
+            provider="openai",
+            model="gpt-4o",
+            api_key="test_key"
+        )
+        prs = [
+            {"pr_number": 1, "repo": "facebook/react", "title": "Fix bug", "files": []},
+            {"pr_number": 2, "repo": "facebook/react", "title": "Incomplete", "files": []},
+            {"pr_number": 3, "repo": "facebook/react", "title": "Lost", "files": []},
+        ]
+        
+        results = classifier.classify_prs_batch(prs, poll_interval=0)
+        
+        assert sorted(mock_llm.submit_batch.call_args.args[0]) == ["0", "1", "2"]
+        assert results[0]["difficulty"] == "easy"
+        assert isinstance(results[1], ValueError)
+        assert isinstance(results[2], Exception)
+
+    @patch('classifier.classifier.LLMClient')
+    def test_classify_prs_groups_prs_per_request(self, mock_llm_class):
+        """Test grouped classification sends one request per group and retries PRs it got wrong."""
+        valid = {
+            "difficulty": "easy",
+            "task_clarity": "clear",
+            "is_reproducible": "highly likely",
+            "onboarding_suitability": "excellent",
+            "categories": ["bug-fix"],
+            "concepts_taught": ["Debugging"],
+            "prerequisites": ["Basic programming"],
+            "reasoning": "Simple bug fix."
+        }
+        prompts = []
+        
+        async def send_prompt_async(prompt, **kwargs):
+            prompts.append(prompt)
+            if "--- PR 1 ---" in prompt:
+                return json.dumps({"classifications": [valid, {"difficulty": "easy"}]})
+            return json.dumps({**valid, "difficulty": "hard"})
+        
+        mock_llm = Mock()
+        mock_llm.send_prompt_async = AsyncMock(side_effect=send_prompt_async)
+        mock_llm_class.return_value = mock_llm
+        
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key"
+        )
+        prs = [
+            {"pr_number": 1, "repo": "facebook/react", "title": "Fix bug", "files": []},
+            {"pr_number": 2, "repo": "facebook/react", "title": "Half answered", "files": []},
+            {"pr_number": 3, "repo": "facebook/react", "title": "Alone", "files": []},
+        ]
+        
+        results = asyncio.run(classifier.classify_prs(prs, concurrency=1, prs_per_request=2))
+        
+        assert [r["difficulty"] for r in results] == ["easy", "hard", "hard"]
+        assert len(prompts) == 3
+        assert mock_llm.send_prompt_async.call_args_list[0].kwargs["json_schema"]["required"] == ["classifications"]
+        assert mock_llm.send_prompt_async.call_args_list[0].kwargs["max_tokens"] == 2 * CLASSIFICATION_MAX_TOKENS
+
+    @patch('classifier.classifier.LLMClient')
+    def test_classify_prs_rejects_invalid_prs_per_request(self, mock_llm_class):
+        """Test prs_per_request below 1 is rejected before any request is sent."""
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key"
+        )
+        prs = [{"pr_number": 1, "repo": "facebook/react", "title": "Fix bug", "files": []}]
+        
+        with pytest.raises(ValueError, match="prs_per_request"):
+            asyncio.run(classifier.classify_prs(prs, prs_per_request=0))
+
+    @patch('classifier.classifier.LLMClient')
+    def test_classify_prs_rejects_invalid_concurrency(self, mock_llm_class):
+        """Test concurrency below 1 is rejected instead of waiting forever on the semaphore."""
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-3-5-sonnet-20241022",
+            api_key="test_key"
+        )
+        prs = [{"pr_number": 1, "repo": "facebook/react", "title": "Fix bug", "files": []}]
+        
+        with pytest.raises(ValueError, match="concurrency"):
+            asyncio.run(classifier.classify_prs(prs, concurrency=0))
+
+    @patch('classifier.classifier.LLMClient')
+    def test_small_model_cascade(self, mock_llm_class):
+        """Test the small model's confident answers are kept and unsure ones go to the main model."""
+        base = {
+            "task_clarity": "clear",
+            "is_reproducible": "highly likely",
+            "onboarding_suitability": "excellent",
+            "categories": ["bug-fix"],
+            "concepts_taught": ["Debugging"],
+            "prerequisites": ["Basic programming"],
+            "reasoning": "Simple bug fix."
+        }
+        main_llm, small_llm = Mock(), Mock()
+        main_llm.send_prompt.return_value = json.dumps({**base, "difficulty": "medium"})
+        mock_llm_class.side_effect = [main_llm, small_llm]
+        
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-sonnet-4-5-20250929",
+            api_key="test_key",
+            small_model="claude-3-5-haiku-20241022"
+        )
+        assert mock_llm_class.call_args.kwargs["model"] == "claude-3-5-haiku-20241022"
+        pr = {"pr_number": 1, "repo": "facebook/react", "title": "Fix", "files": []}
+        
+        small_llm.send_prompt.return_value = json.dumps({**base, "difficulty": "easy", "low_confidence": False})
+        result = classifier.classify_pr(pr)
+        assert result["difficulty"] == "easy"
+        assert "low_confidence" not in result
+        assert small_llm.send_prompt.call_args.kwargs["json_schema"]["required"][-1] == "low_confidence"
+        main_llm.send_prompt.assert_not_called()
+        
+        for small_answer in [
+            json.dumps({**base, "difficulty": "easy", "low_confidence": True}),
+            json.dumps({**base, "difficulty": "hard", "low_confidence": False}),
+            '{"difficulty": "easy"}',
+        ]:
+            small_llm.send_prompt.return_value = small_answer
+            assert classifier.classify_pr(pr)["difficulty"] == "medium"
+        assert main_llm.send_prompt.call_count == 3
+
+    @patch('classifier.classifier.LLMClient')
+    def test_small_model_answers_cached_under_small_model(self, mock_llm_class, tmp_path):
+        """Test small-model classifications never land in the main model's semantic cache namespace."""
+        main_llm, small_llm = Mock(), Mock()
+        small_llm.send_prompt.return_value = json.dumps({
+            "difficulty": "easy",
+            "task_clarity": "clear",
+            "is_reproducible": "highly likely",
+            "onboarding_suitability": "excellent",
+            "categories": ["bug-fix"],
+            "concepts_taught": ["Debugging"],
+            "prerequisites": ["Basic programming"],
+            "reasoning": "Simple bug fix.",
+            "low_confidence": False
+        })
+        mock_llm_class.side_effect = [main_llm, small_llm]
+        cache = SemanticCache(tmp_path, threshold=0.9)
+        
+        classifier = Classifier(
+            provider="anthropic",
+            model="claude-sonnet-4-5-20250929",
+            api_key="test_key",
+            semantic_cache=cache,
+            small_model="claude-3-5-haiku-20241022"
+        )
+        pr = {"pr_number": 1, "repo": "facebook/react", "title": "Fix crash on empty input", "files": []}
+        
+        first = classifier.classify_pr(pr)
+        context = classifier._build_context(pr)
+        assert cache.get("anthropic/claude-sonnet-4-5-20250929", context) is None
+        assert json.loads(cache.get("anthropic/claude-3-5-haiku-20241022", context)) == first
+        
+        # A near-duplicate reuses the small model's answer without another call
+        assert classifier.classify_pr({**pr, "pr_number": 2}) == first
+        assert small_llm.send_prompt.call_count == 1
+        main_llm.send_prompt.assert_not_called()
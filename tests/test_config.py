@@ -141,3 +141,20 @@ class TestConfigLoader:
         with pytest.raises(SystemExit) as exc_info:
             load_config()
         assert exc_info.value.code == 1
+    
+    def test_load_config_is_cached(self, test_env):
+        """Test that repeated calls return the same Config instance."""
+        assert load_config() is load_config()
+    
+    def test_llm_limits_default_and_override(self, test_env, monkeypatch):
+        """Test LLM concurrency knobs default sensibly and read env overrides."""
+        config = load_config()
+        assert config.credentials.llm_max_concurrency == 50
+        assert config.credentials.llm_max_connections == 100
+        
+        load_config.cache_clear()
+        monkeypatch.setenv("LLM_MAX_CONCURRENCY", "8")
+        monkeypatch.setenv("LLM_MAX_CONNECTIONS", "16")
+        config = load_config()
+        assert config.credentials.llm_max_concurrency == 8
+        assert config.credentials.llm_max_connections == 16
@@ -7,7 +7,9 @@ requiring a running server or real Supabase connection.
 
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, call
+
+from classifier.context_builder import build_pr_context
 
 
 @pytest.fixture
@@ -24,18 +26,22 @@ def client(mock_supabase):
     # Patch the supabase client in the routes module
     with patch('backend.routes.supabase', mock_supabase):
         from backend.app import app
+        from backend.routes import _PR_CACHE, _PAYLOAD_CACHE, _RESPONSE_CACHE, _REPOS_CACHE, _REPOS_LAST
+        _PR_CACHE.clear()
+        _PAYLOAD_CACHE.clear()
+        _RESPONSE_CACHE.clear()
+        _REPOS_CACHE.clear()
+        _REPOS_LAST.clear()
         with TestClient(app) as test_client:
             yield test_client
 
 
 def setup_pr_query_mocks(mock_result_data, total_count, with_classifications=True):
     """Helper to set up PR query mocks with optional classification data."""
+    # Rows and exact count come back on the same response (count="exact")
     mock_result = Mock()
     mock_result.data = mock_result_data
-    
-    # Create mock with count attribute set to actual integer
-    mock_count_result = Mock()
-    mock_count_result.count = total_count  # This is an integer, not a mock
+    mock_result.count = total_count  # This is an integer, not a mock
     
     # Mock classifications for returned PRs (empty by default)
     mock_classifications_result = Mock()
@@ -54,14 +60,7 @@ def setup_pr_query_mocks(mock_result_data, total_count, with_classifications=Tru
     mock_query.range.return_value = mock_query
     mock_query.execute.return_value = mock_result
     
-    # Set up count query - all chained methods return self, execute returns count_result
-    mock_count_query = Mock()
-    mock_count_query.in_.return_value = mock_count_query
-    mock_count_query.eq.return_value = mock_count_query
-    mock_count_query.gte.return_value = mock_count_query
-    mock_count_query.execute.return_value = mock_count_result  # This should work now
-    
-    return mock_query, mock_count_query, mock_classifications_query
+    return mock_query, mock_classifications_query
 
 
 class TestListPRs:
@@ -79,11 +78,11 @@ class TestListPRs:
             }
         ]
         
-        mock_query, mock_count_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 100)
+        mock_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 100)
 
         # Create persistent table mocks (not recreated each time)
         pr_table_mock = Mock()
-        pr_table_mock.select.side_effect = [mock_query, mock_count_query]
+        pr_table_mock.select.return_value = mock_query
         
         classifications_table_mock = Mock()
         classifications_table_mock.select.return_value = mock_classifications_query
@@ -117,9 +116,7 @@ class TestListPRs:
         # Mock Supabase responses
         mock_result = Mock()
         mock_result.data = []
-
-        mock_count_result = Mock()
-        mock_count_result.count = 150
+        mock_result.count = 150
 
         # Set up mock chain
         mock_query = Mock()
@@ -128,12 +125,8 @@ class TestListPRs:
         mock_query.range.return_value = mock_query
         mock_query.execute.return_value = mock_result
 
-        mock_count_query = Mock()
-        mock_count_query.eq.return_value = mock_count_query
-        mock_count_query.execute.return_value = mock_count_result
-
         mock_table = Mock()
-        mock_table.select.side_effect = [mock_query, mock_count_query]
+        mock_table.select.return_value = mock_query
 
         mock_supabase.client.table.return_value = mock_table
 
@@ -151,6 +144,20 @@ class TestListPRs:
         # Page 2, per_page 25 => offset 25, end 49
         mock_query.range.assert_called_once_with(25, 49)
 
+        # Rows and total come from a single request
+        from backend.routes import PR_LIST_COLUMNS
+        mock_table.select.assert_called_once_with(PR_LIST_COLUMNS, count="exact")
+
+        # List view projects a fixed set of columns, never the large blobs
+        assert "files" not in PR_LIST_COLUMNS.split(",")
+        assert "body" not in PR_LIST_COLUMNS.split(",")
+
+    def test_list_item_model_matches_columns(self):
+        """Test the documented list item shape stays in sync with the projected columns."""
+        from backend.routes import PR_LIST_COLUMNS, PRListItem
+
+        assert list(PRListItem.model_fields) == PR_LIST_COLUMNS.split(",")
+
     def test_list_prs_filtered_by_repo(self, client, mock_supabase):
         """Test PR list filtered by repository."""
         pr_data = [
@@ -163,11 +170,11 @@ class TestListPRs:
             }
         ]
         
-        mock_query, mock_count_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 50)
+        mock_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 50)
 
         # Create persistent table mocks
         pr_table_mock = Mock()
-        pr_table_mock.select.side_effect = [mock_query, mock_count_query]
+        pr_table_mock.select.return_value = mock_query
         
         classifications_table_mock = Mock()
         classifications_table_mock.select.return_value = mock_classifications_query
@@ -201,11 +208,11 @@ class TestListPRs:
             }
         ]
         
-        mock_query, mock_count_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 25)
+        mock_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 25)
 
         # Create persistent table mocks
         pr_table_mock = Mock()
-        pr_table_mock.select.side_effect = [mock_query, mock_count_query]
+        pr_table_mock.select.return_value = mock_query
         
         classifications_table_mock = Mock()
         classifications_table_mock.select.return_value = mock_classifications_query
@@ -226,7 +233,6 @@ class TestListPRs:
 
         # Verify gte was called with adjusted date (2024-06-17)
         mock_query.gte.assert_called_once_with("merged_at", "2024-06-17")
-        mock_count_query.gte.assert_called_once_with("merged_at", "2024-06-17")
 
     def test_list_prs_with_invalid_cutoff_date(self, client, mock_supabase):
         """Test that invalid date format returns 400 error."""
@@ -258,11 +264,11 @@ class TestListPRs:
             }
         ]
         
-        mock_query, mock_count_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 2)
+        mock_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 2)
 
         # Create persistent table mocks
         pr_table_mock = Mock()
-        pr_table_mock.select.side_effect = [mock_query, mock_count_query]
+        pr_table_mock.select.return_value = mock_query
         
         classifications_table_mock = Mock()
         classifications_table_mock.select.return_value = mock_classifications_query
@@ -281,16 +287,17 @@ class TestListPRs:
         assert len(data["prs"]) == 2
 
         # Verify order was called with desc=False (ascending)
-        mock_query.order.assert_called_once_with("merged_at", desc=False)
+        assert mock_query.order.call_args_list == [
+            call("merged_at", desc=False),
+            call("id", desc=False),
+        ]
 
     def test_list_prs_with_sort_order_desc(self, client, mock_supabase):
         """Test PR list sorted in descending order (newest first)."""
         # Mock Supabase responses
         mock_result = Mock()
         mock_result.data = []
-
-        mock_count_result = Mock()
-        mock_count_result.count = 0
+        mock_result.count = 0
 
         # Set up mock chain
         mock_query = Mock()
@@ -299,12 +306,8 @@ class TestListPRs:
         mock_query.range.return_value = mock_query
         mock_query.execute.return_value = mock_result
 
-        mock_count_query = Mock()
-        mock_count_query.eq.return_value = mock_count_query
-        mock_count_query.execute.return_value = mock_count_result
-
         mock_table = Mock()
-        mock_table.select.side_effect = [mock_query, mock_count_query]
+        mock_table.select.return_value = mock_query
 
         mock_supabase.client.table.return_value = mock_table
 
@@ -315,16 +318,17 @@ class TestListPRs:
         assert response.status_code == 200
 
         # Verify order was called with desc=True (descending)
-        mock_query.order.assert_called_once_with("merged_at", desc=True)
+        assert mock_query.order.call_args_list == [
+            call("merged_at", desc=True),
+            call("id", desc=True),
+        ]
 
     def test_list_prs_default_sort_order(self, client, mock_supabase):
         """Test PR list without sort_order defaults to ascending (oldest first, chronological)."""
         # Mock Supabase responses
         mock_result = Mock()
         mock_result.data = []
-
-        mock_count_result = Mock()
-        mock_count_result.count = 0
+        mock_result.count = 0
 
         # Set up mock chain
         mock_query = Mock()
@@ -332,11 +336,8 @@ class TestListPRs:
         mock_query.range.return_value = mock_query
         mock_query.execute.return_value = mock_result
 
-        mock_count_query = Mock()
-        mock_count_query.execute.return_value = mock_count_result
-
         mock_table = Mock()
-        mock_table.select.side_effect = [mock_query, mock_count_query]
+        mock_table.select.return_value = mock_query
 
         mock_supabase.client.table.return_value = mock_table
 
@@ -347,7 +348,118 @@ class TestListPRs:
         assert response.status_code == 200
 
         # Verify order was called with desc=False (ascending is default)
-        mock_query.order.assert_called_once_with("merged_at", desc=False)
+        assert mock_query.order.call_args_list == [
+            call("merged_at", desc=False),
+            call("id", desc=False),
+        ]
+
+    def test_list_prs_returns_next_cursor(self, client, mock_supabase):
+        """Test that a page with more rows after it includes a next_cursor."""
+        pr_data = [
+            {"id": 1, "repo": "facebook/react", "pr_number": 1, "title": "A", "merged_at": "2024-01-01T00:00:00"},
+            {"id": 2, "repo": "facebook/react", "pr_number": 2, "title": "B", "merged_at": "2024-01-02T00:00:00"},
+        ]
+        mock_query, _ = setup_pr_query_mocks(pr_data, 5)
+        mock_table = Mock()
+        mock_table.select.return_value = mock_query
+        mock_supabase.client.table.return_value = mock_table
+
+        response = client.get("/api/prs?per_page=2")
+
+        assert response.status_code == 200
+        next_cursor = response.json()["next_cursor"]
+        assert next_cursor is not None
+
+        from backend.routes import _decode_cursor
+        assert _decode_cursor(next_cursor) == {"merged_at": "2024-01-02T00:00:00", "id": 2}
+
+    def test_list_prs_with_cursor(self, client, mock_supabase):
+        """Test that a cursor request seeks past the cursor instead of using an offset."""
+        from backend.routes import _encode_cursor
+
+        # per_page + 1 rows come back, so there is another page
+        pr_data = [
+            {"id": 3, "repo": "facebook/react", "pr_number": 3, "title": "C", "merged_at": "2024-01-03T00:00:00"},
+            {"id": 4, "repo": "facebook/react", "pr_number": 4, "title": "D", "merged_at": "2024-01-04T00:00:00"},
+            {"id": 5, "repo": "facebook/react", "pr_number": 5, "title": "E", "merged_at": "2024-01-05T00:00:00"},
+        ]
+        mock_query, _ = setup_pr_query_mocks(pr_data, 5)
+        mock_query.or_.return_value = mock_query
+        mock_query.limit.return_value = mock_query
+        mock_table = Mock()
+        mock_table.select.return_value = mock_query
+        mock_supabase.client.table.return_value = mock_table
+
+        cursor = _encode_cursor({"merged_at": "2024-01-02T00:00:00", "id": 2})
+        response = client.get(f"/api/prs?per_page=2&cursor={cursor}")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [pr["id"] for pr in data["prs"]] == [3, 4]
+        assert data["next_cursor"] == _encode_cursor(pr_data[1])
+        # A count would only cover the rows after the cursor, so none is made
+        assert data["total"] is None
+        from backend.routes import PR_LIST_COLUMNS
+        mock_table.select.assert_called_once_with(PR_LIST_COLUMNS)
+
+        mock_query.or_.assert_called_once_with(
+            'merged_at.gt."2024-01-02T00:00:00",and(merged_at.eq."2024-01-02T00:00:00",id.gt.2)'
+        )
+        mock_query.limit.assert_called_once_with(3)
+        mock_query.range.assert_not_called()
+
+    def test_list_prs_without_total(self, client, mock_supabase):
+        """Test with_total=false skips the exact count and detects the next page by row count."""
+        pr_data = [
+            {"id": 1, "repo": "facebook/react", "pr_number": 1, "title": "A", "merged_at": "2024-01-01T00:00:00"},
+            {"id": 2, "repo": "facebook/react", "pr_number": 2, "title": "B", "merged_at": "2024-01-02T00:00:00"},
+            {"id": 3, "repo": "facebook/react", "pr_number": 3, "title": "C", "merged_at": "2024-01-03T00:00:00"},
+        ]
+        mock_query, _ = setup_pr_query_mocks(pr_data, None)
+        mock_table = Mock()
+        mock_table.select.return_value = mock_query
+        mock_supabase.client.table.return_value = mock_table
+
+        response = client.get("/api/prs?per_page=2&with_total=false")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        assert [pr["id"] for pr in data["prs"]] == [1, 2]
+        assert data["next_cursor"] is not None
+
+        from backend.routes import PR_LIST_COLUMNS
+        mock_table.select.assert_called_once_with(PR_LIST_COLUMNS)
+        mock_query.range.assert_called_once_with(0, 2)
+
+    def test_list_prs_with_invalid_cursor(self, client, mock_supabase):
+        """Test that a malformed cursor returns 400 error."""
+        response = client.get("/api/prs?cursor=not-a-cursor")
+
+        assert response.status_code == 400
+        assert "Invalid cursor" in response.json()["detail"]
+
+    def test_list_prs_ndjson(self, client, mock_supabase):
+        """Test the NDJSON variant streams a header line then one PR per line."""
+        import json
+
+        pr_data = [
+            {"id": 1, "repo": "facebook/react", "pr_number": 1, "title": "A", "merged_at": "2024-01-01T00:00:00"},
+            {"id": 2, "repo": "facebook/react", "pr_number": 2, "title": "B", "merged_at": "2024-01-02T00:00:00"},
+        ]
+        mock_query, _ = setup_pr_query_mocks(pr_data, 2)
+        mock_table = Mock()
+        mock_table.select.return_value = mock_query
+        mock_supabase.client.table.return_value = mock_table
+
+        response = client.get("/api/prs.ndjson?repo=facebook/react")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0] == {"total": 2, "page": 1, "per_page": 50, "next_cursor": None}
+        assert [line["pr_number"] for line in lines[1:]] == [1, 2]
+        mock_query.eq.assert_called_with("repo", "facebook/react")
 
     def test_list_prs_with_invalid_sort_order(self, client, mock_supabase):
         """Test that invalid sort order returns 422 validation error."""
@@ -363,9 +475,7 @@ class TestListPRs:
         # Mock Supabase responses
         mock_result = Mock()
         mock_result.data = []
-
-        mock_count_result = Mock()
-        mock_count_result.count = 10
+        mock_result.count = 10
 
         # Set up mock chain
         mock_query = Mock()
@@ -375,13 +485,8 @@ class TestListPRs:
         mock_query.range.return_value = mock_query
         mock_query.execute.return_value = mock_result
 
-        mock_count_query = Mock()
-        mock_count_query.eq.return_value = mock_count_query
-        mock_count_query.gte.return_value = mock_count_query
-        mock_count_query.execute.return_value = mock_count_result
-
         mock_table = Mock()
-        mock_table.select.side_effect = [mock_query, mock_count_query]
+        mock_table.select.return_value = mock_query
 
         mock_supabase.client.table.return_value = mock_table
 
@@ -396,7 +501,7 @@ class TestListPRs:
         # Verify all filters were applied
         mock_query.eq.assert_called_with("repo", "facebook/react")
         mock_query.gte.assert_called_with("merged_at", "2024-01-03")  # 2024-01-01 + 2 days
-        mock_query.order.assert_called_with("merged_at", desc=False)
+        mock_query.order.assert_any_call("merged_at", desc=False)
 
     def test_list_prs_with_onboarding_suitability_filter(self, client, mock_supabase):
         """Test PR list filtered by onboarding_suitability."""
@@ -440,11 +545,11 @@ class TestListPRs:
             }
         ]
         
-        mock_query, mock_count_query, _ = setup_pr_query_mocks(pr_data, 2)
+        mock_query, _ = setup_pr_query_mocks(pr_data, 2)
         
         # Create persistent table mocks
         pr_table_mock = Mock()
-        pr_table_mock.select.side_effect = [mock_query, mock_count_query]
+        pr_table_mock.select.return_value = mock_query
         
         classifications_table_mock = Mock()
         classifications_table_mock.select.side_effect = [mock_classifications_filter_query, mock_classifications_enrich_query]
@@ -527,11 +632,11 @@ class TestListPRs:
             }
         ]
         
-        mock_query, mock_count_query, _ = setup_pr_query_mocks(pr_data, 1)
+        mock_query, _ = setup_pr_query_mocks(pr_data, 1)
         
         # Create persistent table mocks
         pr_table_mock = Mock()
-        pr_table_mock.select.side_effect = [mock_query, mock_count_query]
+        pr_table_mock.select.return_value = mock_query
         
         classifications_table_mock = Mock()
         classifications_table_mock.select.side_effect = [mock_classifications_filter_query, mock_classifications_enrich_query]
@@ -576,11 +681,11 @@ class TestListPRs:
         
         # Mock PRs query (empty result - filtered out by repo/date)
         pr_data = []
-        mock_query, mock_count_query, _ = setup_pr_query_mocks(pr_data, 0)
+        mock_query, _ = setup_pr_query_mocks(pr_data, 0)
         
         # Create persistent table mocks
         pr_table_mock = Mock()
-        pr_table_mock.select.side_effect = [mock_query, mock_count_query]
+        pr_table_mock.select.return_value = mock_query
         
         classifications_table_mock = Mock()
         classifications_table_mock.select.side_effect = [mock_classifications_filter_query, mock_classifications_enrich_query]
@@ -619,11 +724,11 @@ class TestListPRs:
             }
         ]
         
-        mock_query, mock_count_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 5)
+        mock_query, mock_classifications_query = setup_pr_query_mocks(pr_data, 5)
 
         # Create persistent table mocks
         pr_table_mock = Mock()
-        pr_table_mock.select.side_effect = [mock_query, mock_count_query]
+        pr_table_mock.select.return_value = mock_query
         
         classifications_table_mock = Mock()
         classifications_table_mock.select.return_value = mock_classifications_query
@@ -650,31 +755,42 @@ class TestFavoriteToggle:
 
     def test_toggle_favorite_from_false_to_true(self, client, mock_supabase):
         """Test toggling a PR from not favorite to favorite."""
-        # Mock get_pr_by_number to return a PR
-        mock_pr = {
+        mock_rpc_result = Mock()
+        mock_rpc_result.data = [{
             "id": 123,
             "repo": "apache/superset",
             "pr_number": 100,
             "title": "Test PR",
-            "is_favorite": False
-        }
-        mock_supabase.get_pr_by_number.return_value = mock_pr
-
-        # Mock update result
-        mock_update_result = Mock()
-        mock_update_result.data = [{
-            **mock_pr,
             "is_favorite": True
         }]
+        mock_supabase.client.rpc.return_value.execute.return_value = mock_rpc_result
 
-        mock_update_query = Mock()
-        mock_update_query.eq.return_value = mock_update_query
-        mock_update_query.execute.return_value = mock_update_result
+        # Make request
+        response = client.post("/api/prs/apache/superset/100/favorite")
 
-        mock_table = Mock()
-        mock_table.update.return_value = mock_update_query
+        # Assertions
+        assert response.status_code == 200
+        data = response.json()
+        assert data["is_favorite"] is True
 
-        mock_supabase.client.table.return_value = mock_table
+        # Flipped server-side in one call, without reading the PR first
+        mock_supabase.client.rpc.assert_called_once_with(
+            "toggle_favorite", {"_repo": "apache/superset", "_pr": 100}
+        )
+        mock_supabase.get_pr_by_number.assert_not_called()
+        mock_supabase.client.table.assert_not_called()
+
+    def test_toggle_favorite_from_true_to_false(self, client, mock_supabase):
+        """Test toggling a PR from favorite to not favorite."""
+        mock_rpc_result = Mock()
+        mock_rpc_result.data = [{
+            "id": 123,
+            "repo": "apache/superset",
+            "pr_number": 100,
+            "title": "Test PR",
+            "is_favorite": False
+        }]
+        mock_supabase.client.rpc.return_value.execute.return_value = mock_rpc_result
 
         # Make request
         response = client.post("/api/prs/apache/superset/100/favorite")
@@ -682,65 +798,191 @@ class TestFavoriteToggle:
         # Assertions
         assert response.status_code == 200
         data = response.json()
-        assert data["is_favorite"] is True
+        assert data["is_favorite"] is False
 
-        # Verify get_pr_by_number was called
-        mock_supabase.get_pr_by_number.assert_called_once_with("apache/superset", 100)
+    def test_toggle_favorite_pr_not_found(self, client, mock_supabase):
+        """Test 404 error when PR doesn't exist."""
+        # The RPC updates no rows
+        mock_rpc_result = Mock()
+        mock_rpc_result.data = []
+        mock_supabase.client.rpc.return_value.execute.return_value = mock_rpc_result
 
-        # Verify update was called with new value
-        mock_table.update.assert_called_once_with({"is_favorite": True})
+        # Make request
+        response = client.post("/api/prs/fake/repo/99999/favorite")
 
-    def test_toggle_favorite_from_true_to_false(self, client, mock_supabase):
-        """Test toggling a PR from favorite to not favorite."""
-        # Mock get_pr_by_number to return a favorited PR
+        # Assertions
+        assert response.status_code == 404
+        data = response.json()
+        assert "not found" in data["detail"].lower()
+
+    def test_toggle_favorite_refreshes_cached_pr(self, client, mock_supabase):
+        """Test that a toggle caches the returned row so the next read needs no fetch."""
         mock_pr = {
             "id": 123,
             "repo": "apache/superset",
             "pr_number": 100,
             "title": "Test PR",
-            "is_favorite": True
+            "is_favorite": False
         }
         mock_supabase.get_pr_by_number.return_value = mock_pr
 
-        # Mock update result
-        mock_update_result = Mock()
-        mock_update_result.data = [{
-            **mock_pr,
-            "is_favorite": False
-        }]
+        mock_rpc_result = Mock()
+        mock_rpc_result.data = [{**mock_pr, "is_favorite": True}]
+        mock_supabase.client.rpc.return_value.execute.return_value = mock_rpc_result
+
+        # Warm the cache, then toggle
+        client.get("/api/prs/apache/superset/100/context")
+        client.post("/api/prs/apache/superset/100/favorite")
+        assert mock_supabase.get_pr_by_number.call_count == 1
+
+        # Next read sees the new value without going back to Supabase
+        response = client.get("/api/prs/apache/superset/100")
+        assert response.json()["is_favorite"] is True
+        assert mock_supabase.get_pr_by_number.call_count == 1
 
+    def test_set_favorite_by_value(self, client, mock_supabase):
+        """Test PUT sets is_favorite with a single conditional update."""
+        mock_update_result = Mock()
+        mock_update_result.data = [{"id": 123, "repo": "apache/superset", "pr_number": 100, "is_favorite": True}]
         mock_update_query = Mock()
         mock_update_query.eq.return_value = mock_update_query
         mock_update_query.execute.return_value = mock_update_result
-
         mock_table = Mock()
         mock_table.update.return_value = mock_update_query
+        mock_supabase.client.table.return_value = mock_table
+
+        response = client.put("/api/prs/apache/superset/100/favorite", json={"value": True})
+
+        assert response.status_code == 200
+        assert response.json()["is_favorite"] is True
+        mock_table.update.assert_called_once_with({"is_favorite": True})
+        mock_update_query.eq.assert_has_calls([call("repo", "apache/superset"), call("pr_number", 100)])
+        mock_supabase.get_pr_by_number.assert_not_called()
+
+    def test_set_favorite_pr_not_found(self, client, mock_supabase):
+        """Test PUT returns 404 when the update matches no rows."""
+        mock_update_result = Mock()
+        mock_update_result.data = []
+        mock_update_query = Mock()
+        mock_update_query.eq.return_value = mock_update_query
+        mock_update_query.execute.return_value = mock_update_result
+        mock_supabase.client.table.return_value.update.return_value = mock_update_query
+
+        response = client.put("/api/prs/fake/repo/99999/favorite", json={"value": False})
+
+        assert response.status_code == 404
+
+    def test_atomic_toggle_uses_rpc(self, client, mock_supabase):
+        """Test the toggle endpoint flips is_favorite via the RPC in one call."""
+        mock_rpc_result = Mock()
+        mock_rpc_result.data = [{"id": 123, "repo": "apache/superset", "pr_number": 100, "is_favorite": True}]
+        mock_supabase.client.rpc.return_value.execute.return_value = mock_rpc_result
+
+        response = client.post("/api/prs/apache/superset/100/favorite/toggle")
+
+        assert response.status_code == 200
+        assert response.json()["is_favorite"] is True
+        mock_supabase.client.rpc.assert_called_once_with(
+            "toggle_favorite", {"_repo": "apache/superset", "_pr": 100}
+        )
+        mock_supabase.get_pr_by_number.assert_not_called()
+
+    def test_toggle_without_rpc_fails(self, client, mock_supabase):
+        """Test a missing toggle_favorite RPC is an error rather than a racy read-then-write."""
+        mock_supabase.client.rpc.return_value.execute.side_effect = Exception("function not found")
+
+        response = client.post("/api/prs/apache/superset/100/favorite/toggle")
+
+        assert response.status_code == 500
+        mock_supabase.client.table.assert_not_called()
+
+
+class TestBatchFavorites:
+    """Tests for POST /api/prs/favorites endpoint."""
+
+    def test_update_favorites_batch(self, client, mock_supabase):
+        """Test one lookup plus one update per target value."""
+        mock_select_query = Mock()
+        mock_select_query.in_.return_value = mock_select_query
+        mock_select_query.execute.return_value = Mock(data=[
+            {"id": 1, "repo": "apache/superset", "pr_number": 100},
+            {"id": 2, "repo": "apache/superset", "pr_number": 200},
+            {"id": 3, "repo": "facebook/react", "pr_number": 100},  # Cross-product row, not requested
+        ])
+
+        def update_side_effect(values):
+            query = Mock()
+            query.in_.side_effect = lambda column, ids: Mock(execute=Mock(return_value=Mock(data=[
+                {"id": pr_id, "repo": "apache/superset", "pr_number": pr_id * 100,
+                 "is_favorite": values["is_favorite"], "title": "ignored"}
+                for pr_id in ids
+            ])))
+            return query
 
+        mock_table = Mock()
+        mock_table.select.return_value = mock_select_query
+        mock_table.update.side_effect = update_side_effect
         mock_supabase.client.table.return_value = mock_table
 
-        # Make request
-        response = client.post("/api/prs/apache/superset/100/favorite")
+        response = client.post("/api/prs/favorites", json={"updates": [
+            {"repo": "apache/superset", "pr_number": 100, "is_favorite": True},
+            {"repo": "apache/superset", "pr_number": 200, "is_favorite": False},
+            {"repo": "facebook/react", "pr_number": 200, "is_favorite": True},
+        ]})
 
-        # Assertions
         assert response.status_code == 200
         data = response.json()
-        assert data["is_favorite"] is False
+        assert {(row["id"], row["is_favorite"]) for row in data["updated"]} == {(1, True), (2, False)}
+        assert data["not_found"] == [{"repo": "facebook/react", "pr_number": 200}]
 
-        # Verify update was called with new value (toggled to False)
-        mock_table.update.assert_called_once_with({"is_favorite": False})
+        # One select, one update per value, no per-PR lookups
+        mock_table.select.assert_called_once_with("id,repo,pr_number")
+        assert mock_table.update.call_count == 2
+        mock_supabase.get_pr_by_number.assert_not_called()
 
-    def test_toggle_favorite_pr_not_found(self, client, mock_supabase):
-        """Test 404 error when PR doesn't exist."""
-        # Mock get_pr_by_number to return None
-        mock_supabase.get_pr_by_number.return_value = None
+    def test_update_favorites_empty_batch(self, client, mock_supabase):
+        """Test that an empty batch makes no database calls."""
+        response = client.post("/api/prs/favorites", json={"updates": []})
 
-        # Make request
-        response = client.post("/api/prs/fake/repo/99999/favorite")
+        assert response.status_code == 200
+        assert response.json() == {"updated": [], "not_found": []}
+        mock_supabase.client.table.assert_not_called()
 
-        # Assertions
-        assert response.status_code == 404
+
+class TestBatchPRs:
+    """Tests for POST /api/prs/batch endpoint."""
+
+    def test_get_prs_batch(self, client, mock_supabase):
+        """Test one query per repo with cached rows reused."""
+        from backend.routes import _PR_CACHE
+        _PR_CACHE[("facebook/react", 1)] = {"id": 9, "repo": "facebook/react", "pr_number": 1}
+
+        mock_query = Mock()
+        mock_query.eq.return_value = mock_query
+        mock_query.in_.return_value = mock_query
+        mock_query.execute.return_value = Mock(data=[
+            {"id": 1, "repo": "gitlab-org/gitlab", "pr_number": 100, "title": "Fix"},
+        ])
+        mock_supabase.client.table.return_value.select.return_value = mock_query
+
+        response = client.post("/api/prs/batch", json={"items": [
+            {"repo": "gitlab-org/gitlab", "pr_number": 100},
+            {"repo": "gitlab-org/gitlab", "pr_number": 200},
+            {"repo": "facebook/react", "pr_number": 1},
+        ]})
+
+        assert response.status_code == 200
         data = response.json()
-        assert "not found" in data["detail"].lower()
+        assert set(data["prs"]) == {"gitlab-org/gitlab#100", "facebook/react#1"}
+        assert data["prs"]["gitlab-org/gitlab#100"]["title"] == "Fix"
+        assert "llm_payload" not in data["prs"]["gitlab-org/gitlab#100"]
+        assert data["not_found"] == [{"repo": "gitlab-org/gitlab", "pr_number": 200}]
+
+        # Only the uncached repo is queried, once
+        mock_query.eq.assert_called_once_with("repo", "gitlab-org/gitlab")
+        mock_query.in_.assert_called_once_with("pr_number", [100, 200])
+        mock_supabase.get_pr_by_number.assert_not_called()
+        assert ("gitlab-org/gitlab", 100) in _PR_CACHE
 
 
 class TestLLMPayload:
@@ -809,6 +1051,22 @@ class TestLLMPayload:
         data = response.json()
         assert "not found" in data["detail"].lower()
 
+    def test_get_llm_payload_uses_cached_pr(self, client, mock_supabase):
+        """Test that repeated requests for the same PR hit Supabase only once."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1,
+            "repo": "apache/superset",
+            "pr_number": 100,
+            "title": "Fix CORS bug",
+            "merged_at": "2024-01-01T00:00:00Z"
+        }
+
+        client.get("/api/prs/apache/superset/100/llm_payload")
+        response = client.get("/api/prs/apache/superset/100/context")
+
+        assert response.status_code == 200
+        mock_supabase.get_pr_by_number.assert_called_once_with("apache/superset", 100)
+
 
 class TestGetSinglePR:
     """Tests for GET /api/prs/{repo}/{pr_number} endpoint."""
@@ -840,6 +1098,51 @@ class TestGetSinglePR:
         # Verify method was called correctly
         mock_supabase.get_pr_by_number.assert_called_once_with("facebook/react", 12345)
 
+    def test_get_pr_etag_revalidation(self, client, mock_supabase):
+        """Test an unchanged PR revalidates with 304 and a changed one doesn't."""
+        mock_pr = {"id": 1, "repo": "facebook/react", "pr_number": 12345, "title": "Fix bug", "is_favorite": False}
+        mock_supabase.get_pr_by_number.return_value = mock_pr
+
+        first = client.get("/api/prs/facebook/react/12345")
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "private, no-cache"
+
+        unchanged = client.get("/api/prs/facebook/react/12345", headers={"If-None-Match": etag})
+        assert unchanged.status_code == 304
+        assert unchanged.content == b""
+
+        from backend.routes import _PR_CACHE
+        _PR_CACHE.clear()
+        mock_supabase.get_pr_by_number.return_value = {**mock_pr, "is_favorite": True}
+
+        changed = client.get("/api/prs/facebook/react/12345", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["is_favorite"] is True
+        assert changed.headers["etag"] != etag
+
+    def test_revalidation_skips_rendering(self, client, mock_supabase):
+        """Test revalidating an unchanged cached PR reuses its rendered body instead of rebuilding it."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1, "repo": "facebook/react", "pr_number": 12345, "title": "Fix bug", "files": None
+        }
+        first = client.get("/api/prs/facebook/react/12345/llm_payload")
+        etag = first.headers["etag"]
+
+        with patch('backend.routes.build_classification_prompt') as mock_prompt, \
+             patch('backend.routes.orjson.dumps') as mock_dumps:
+            again = client.get("/api/prs/facebook/react/12345/llm_payload", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        mock_prompt.assert_not_called()
+        mock_dumps.assert_not_called()
+
+        # A write through the API replaces the cached row, so it's rendered afresh
+        from backend.routes import _replace_cached_pr, _PAYLOAD_CACHE
+        _replace_cached_pr("facebook/react", 12345, [{**mock_supabase.get_pr_by_number.return_value, "title": "Fix crash"}])
+        _PAYLOAD_CACHE.clear()
+        changed = client.get("/api/prs/facebook/react/12345/llm_payload", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert "Fix crash" in changed.json()["pr_context"]
+
     def test_get_pr_not_found(self, client, mock_supabase):
         """Test 404 when PR doesn't exist."""
         # Mock the get_pr_by_number method to return None
@@ -854,6 +1157,96 @@ class TestGetSinglePR:
         assert "detail" in data
         assert "not found" in data["detail"].lower()
 
+    def test_get_pr_leaves_out_diffs(self, client, mock_supabase):
+        """Test that the PR detail has file metadata but no diffs, which /files serves unchanged."""
+        files = {
+            "summary": {"total_files": 1},
+            "files": [{
+                "filename": "app/models/ci.rb",
+                "status": "modified",
+                "additions": 2,
+                "deletions": 1,
+                "changes": 3,
+                "patch": "@@ -1,3 +1,4 @@\n context\n-old\n+new\n+added"
+            }]
+        }
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1,
+            "repo": "gitlab-org/gitlab",
+            "pr_number": 42,
+            "title": "Fix pipeline",
+            "merged_at": "2024-01-01T00:00:00Z",
+            "files": files
+        }
+
+        response = client.get("/api/prs/gitlab-org/gitlab/42")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["files"]["summary"] == files["summary"]
+        assert data["files"]["files"] == [{k: v for k, v in files["files"][0].items() if k != "patch"}]
+        assert data["files_url"] == "/api/prs/gitlab-org/gitlab/42/files"
+
+        response = client.get(data["files_url"])
+
+        assert response.status_code == 200
+        assert response.json() == {"files": files}
+        assert "etag" in response.headers
+        assert mock_supabase.get_pr_by_number.call_count == 1
+
+    def test_get_pr_is_cached_without_mutating_cached_row(self, client, mock_supabase):
+        """Test repeat views are served from cache and llm_payload is added to a copy."""
+        github_file = {"filename": "a.rb", "patch": "+x"}
+        mock_pr = {
+            "id": 1,
+            "repo": "gitlab-org/gitlab",
+            "pr_number": 44,
+            "title": "Cached",
+            "merged_at": "2024-01-01T00:00:00Z",
+            "files": {"files": [github_file]}
+        }
+        mock_supabase.get_pr_by_number.return_value = mock_pr
+
+        first = client.get("/api/prs/gitlab-org/gitlab/44")
+        second = client.get("/api/prs/gitlab-org/gitlab/44")
+
+        assert first.json() == second.json()
+        assert second.json()["files"]["files"][0]["filename"] == "a.rb"
+        mock_supabase.get_pr_by_number.assert_called_once_with("gitlab-org/gitlab", 44)
+        assert "llm_payload" not in mock_pr
+        assert mock_pr["files"]["files"] == [github_file]
+
+    def test_get_pr_reuses_cached_context(self, client, mock_supabase):
+        """Test that repeat views and the context tab share one context build."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1,
+            "repo": "apache/superset",
+            "pr_number": 101,
+            "title": "Fix CORS bug",
+            "merged_at": "2024-01-01T00:00:00Z"
+        }
+
+        with patch('backend.routes.build_pr_context', wraps=build_pr_context) as spy:
+            first = client.get("/api/prs/apache/superset/101?include_llm_payload=true")
+            client.get("/api/prs/apache/superset/101?include_llm_payload=true")
+            context = client.get("/api/prs/apache/superset/101/context")
+
+        assert context.json()["pr_context"] in first.json()["llm_payload"]
+        assert spy.call_count == 1
+
+    def test_get_pr_omits_llm_payload_by_default(self, client, mock_supabase):
+        """Test the prompt is only built when asked for."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1, "repo": "facebook/react", "pr_number": 12345, "title": "Fix bug"
+        }
+
+        with patch('backend.routes.build_pr_context') as spy:
+            response = client.get("/api/prs/facebook/react/12345")
+
+        assert response.status_code == 200
+        assert "llm_payload" not in response.json()
+        spy.assert_not_called()
+
     def test_get_pr_includes_llm_payload(self, client, mock_supabase):
         """Test that PR detail includes LLM payload for debugging."""
         # Mock the get_pr_by_number method
@@ -883,7 +1276,7 @@ class TestGetSinglePR:
         mock_supabase.client.table.return_value = mock_table
 
         # Make request
-        response = client.get("/api/prs/facebook/react/12345")
+        response = client.get("/api/prs/facebook/react/12345?include_llm_payload=true")
 
         # Assertions
         assert response.status_code == 200
@@ -992,6 +1385,27 @@ class TestPRContext:
         # Verify classification_info indicates no classification
         assert data["classification_info"] == "No classification available"
 
+    def test_get_pr_context_uses_stored_classification_info(self, client, mock_supabase):
+        """Test that the classification summary stored at save time is returned as-is."""
+        mock_pr = {
+            "id": 3,
+            "repo": "apache/superset",
+            "pr_number": 1000,
+            "title": "Fix button",
+            "body": None,
+            "merged_at": "2024-01-01T00:00:00Z",
+            "classified_at": "2024-01-02T00:00:00Z",
+            "difficulty": "easy",
+            "classification_info": "Difficulty: easy (stored)",
+            "files": {"files": []}
+        }
+        mock_supabase.get_pr_by_number.return_value = mock_pr
+
+        response = client.get("/api/prs/apache/superset/1000/context")
+
+        assert response.status_code == 200
+        assert response.json()["classification_info"] == "Difficulty: easy (stored)"
+
     def test_get_pr_context_pr_not_found(self, client, mock_supabase):
         """Test 404 error when PR doesn't exist."""
         # Mock get_pr_by_number to return None
@@ -1007,6 +1421,49 @@ class TestPRContext:
         assert "not found" in data["detail"].lower()
 
 
+class TestPRBundle:
+    """Tests for GET /api/prs/{repo}/{pr_number}/bundle endpoint."""
+
+    def test_get_pr_bundle_success(self, client, mock_supabase):
+        """Test that the bundle combines llm_payload and context from one lookup."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1,
+            "repo": "apache/superset",
+            "pr_number": 100,
+            "title": "Fix CORS bug",
+            "merged_at": "2024-01-01T00:00:00Z",
+            "classified_at": "2024-01-02T00:00:00Z",
+            "difficulty": "easy",
+            "categories": ["bug-fix"],
+            "concepts_taught": ["CORS"],
+            "prerequisites": []
+        }
+
+        with patch('backend.routes.build_pr_context', wraps=build_pr_context) as spy:
+            response = client.get("/api/prs/apache/superset/100/bundle")
+            client.get("/api/prs/apache/superset/100/context")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert "Fix CORS bug" in data["pr_context"]
+        assert data["pr_context"] in data["full_prompt"]
+        assert "onboarding_suitability" in data["prompt_template"]
+        assert "Difficulty: easy" in data["classification_info"]
+
+        # One DB lookup and one context build serve both requests
+        mock_supabase.get_pr_by_number.assert_called_once_with("apache/superset", 100)
+        assert spy.call_count == 1
+
+    def test_get_pr_bundle_not_found(self, client, mock_supabase):
+        """Test 404 error when PR doesn't exist."""
+        mock_supabase.get_pr_by_number.return_value = None
+
+        response = client.get("/api/prs/fake/repo/99999/bundle")
+
+        assert response.status_code == 404
+        assert "not found" in response.json()["detail"].lower()
+
+
 class TestIssueGenerationPrompt:
     """Tests for GET /api/prompts/issue-generation endpoint."""
 
@@ -1056,34 +1513,31 @@ class TestIssueGenerationPrompt:
         assert "medium" in prompt.lower() or "Medium" in prompt
         assert "hard" in prompt.lower() or "Hard" in prompt
 
+    def test_get_issue_generation_prompt_not_modified(self, client, mock_supabase):
+        """Test that a matching If-None-Match returns 304 with no body."""
+        response = client.get("/api/prompts/issue-generation")
+        etag = response.headers["etag"]
+        assert "max-age" in response.headers["cache-control"]
+
+        cached = client.get("/api/prompts/issue-generation", headers={"If-None-Match": etag})
+
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
 
 class TestListRepos:
     """Tests for GET /api/repos endpoint."""
 
     def test_list_repos(self, client, mock_supabase):
         """Test listing unique repositories."""
-        # Mock Supabase response for RPC call (try first)
-        mock_rpc = Mock()
-        mock_rpc.execute.side_effect = Exception("RPC not available")
-        
-        # Mock fallback table query
-        mock_result = Mock()
-        mock_result.data = [
+        mock_rpc_result = Mock()
+        mock_rpc_result.data = [
             {"repo": "facebook/react"},
             {"repo": "microsoft/vscode"},
-            {"repo": "facebook/react"},  # Duplicate
             {"repo": "torvalds/linux"}
         ]
-
-        mock_query = Mock()
-        mock_query.limit.return_value = mock_query
-        mock_query.execute.return_value = mock_result
-
-        mock_table = Mock()
-        mock_table.select.return_value = mock_query
-
-        mock_supabase.client.rpc.return_value = mock_rpc
-        mock_supabase.client.table.return_value = mock_table
+        mock_supabase.client.rpc.return_value.execute.return_value = mock_rpc_result
 
         # Make request
         response = client.get("/api/repos")
@@ -1099,3 +1553,95 @@ class TestListRepos:
         assert "torvalds/linux" in repos
         # Verify alphabetical sorting
         assert repos == sorted(repos)
+
+    def test_list_repos_rpc_missing(self, client, mock_supabase):
+        """Test a missing get_distinct_repos RPC is an error, not a slow table scan."""
+        mock_supabase.client.rpc.return_value.execute.side_effect = Exception("RPC not available")
+
+        response = client.get("/api/repos")
+
+        assert response.status_code == 500
+        mock_supabase.client.table.assert_not_called()
+
+    def test_list_repos_is_cached(self, client, mock_supabase):
+        """Test that repeated dropdown loads reuse the cached repo list."""
+        mock_rpc_result = Mock()
+        mock_rpc_result.data = [{"repo": "apache/superset"}, {"repo": "facebook/react"}]
+        mock_supabase.client.rpc.return_value.execute.return_value = mock_rpc_result
+
+        first = client.get("/api/repos")
+        second = client.get("/api/repos")
+
+        assert first.json() == second.json() == {"repos": ["apache/superset", "facebook/react"]}
+        assert mock_supabase.client.rpc.call_count == 1
+        mock_supabase.client.table.assert_not_called()
+
+    def test_list_repos_serves_stale_while_refreshing(self, client, mock_supabase):
+        """Test an expired repo list is returned immediately and refreshed afterwards."""
+        from backend.routes import _REPOS_CACHE
+
+        mock_rpc_result = Mock()
+        mock_rpc_result.data = [{"repo": "facebook/react"}]
+        mock_supabase.client.rpc.return_value.execute.return_value = mock_rpc_result
+        client.get("/api/repos")
+
+        _REPOS_CACHE.clear()  # TTL expired
+        mock_rpc_result.data = [{"repo": "apache/superset"}, {"repo": "facebook/react"}]
+
+        stale = client.get("/api/repos")
+        fresh = client.get("/api/repos")
+
+        assert stale.json() == {"repos": ["facebook/react"]}
+        assert fresh.json() == {"repos": ["apache/superset", "facebook/react"]}
+        assert mock_supabase.client.rpc.call_count == 2
+
+
+class TestRouter:
+    """Tests for the API router as a whole."""
+
+    def test_no_route_registered_twice(self):
+        """Test no method + path pair is registered twice (a later copy would shadow the first)."""
+        from backend.routes import router
+
+        routes = [(method, route.path) for route in router.routes for method in route.methods]
+        assert len(routes) == len(set(routes))
+
+
+class TestLifespan:
+    """Tests for API startup and shutdown."""
+
+    def _start_app(self, mock_supabase, **credentials):
+        """Run the app's lifespan with the given credentials; return the pre-warm mock."""
+        import backend.app as app_module
+
+        config = Mock()
+        config.credentials = Mock(
+            database_url=None, llm_provider="anthropic",
+            anthropic_api_key=None, openai_api_key=None, llm_prewarm=True
+        )
+        config.credentials.configure_mock(**credentials)
+        with patch('backend.routes.supabase', mock_supabase), \
+             patch.object(app_module, 'config', config), \
+             patch.object(app_module, '_prewarm_llm_connection', new=MagicMock()) as prewarm, \
+             patch.object(app_module.asyncio, 'create_task') as create_task:
+            with TestClient(app_module.app):
+                pass
+        return prewarm, create_task
+
+    def test_prewarm_runs_with_api_key(self, mock_supabase):
+        """Test startup pre-warms the provider connection when its API key is set."""
+        prewarm, create_task = self._start_app(mock_supabase, anthropic_api_key="sk-test")
+        prewarm.assert_called_once()
+        create_task.assert_called_once()
+
+    def test_prewarm_skipped_without_api_key(self, mock_supabase):
+        """Test startup makes no provider call when the provider has no API key."""
+        prewarm, create_task = self._start_app(mock_supabase, llm_provider="openai", anthropic_api_key="sk-test")
+        prewarm.assert_not_called()
+        create_task.assert_not_called()
+
+    def test_prewarm_skipped_when_disabled(self, mock_supabase):
+        """Test LLM_PREWARM=false turns the pre-warm off."""
+        prewarm, create_task = self._start_app(mock_supabase, anthropic_api_key="sk-test", llm_prewarm=False)
+        prewarm.assert_not_called()
+        create_task.assert_not_called()
@@ -1,10 +1,13 @@
 """Tests for GitHub fetcher (Milestone 4 - Phase 1 Index)."""
 
+import time
 from unittest.mock import Mock, patch
+import orjson
 import pytest
 import requests
 
 from fetchers.github import GitHubFetcher
+from fetchers.http_cache import ResponseCache
 
 
 class TestGitHubFetcherInit:
@@ -20,6 +23,9 @@ class TestGitHubFetcherInit:
         assert fetcher.headers["Accept"] == "application/vnd.github+json"
         assert fetcher.headers["Authorization"] == f"Bearer {token}"
         assert fetcher.headers["X-GitHub-Api-Version"] == "2022-11-28"
+        
+        # Pooled session sends the same headers on every request
+        assert fetcher.session.headers["Authorization"] == f"Bearer {token}"
 
 
 class TestFetchPRList:
@@ -35,15 +41,15 @@ class TestFetchPRList:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.headers = {"X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000"}
-        mock_response.json.return_value = [
+        mock_response.content = orjson.dumps([
             {"number": 1, "title": "Good PR", "merged_at": "2025-01-15T10:30:00Z", "body": "Fixes #123"},
             {"number": 2, "title": "No issue", "merged_at": "2025-01-15T10:30:00Z", "body": "No issue ref"},
             {"number": 3, "title": "Multiple issues", "merged_at": "2025-01-16T12:00:00Z", "body": "Fixes #456 and closes #789"},
             {"number": 4, "title": "Not merged", "merged_at": None, "body": "Fixes #999"},
             {"number": 5, "title": "Another good", "merged_at": "2025-01-16T12:00:00Z", "body": "Closes #200"},
-        ]
+        ])
         
-        with patch("requests.get", return_value=mock_response) as mock_get:
+        with patch("requests.Session.get", return_value=mock_response) as mock_get:
             result = fetcher.fetch_pr_list("owner", "repo", max_pages=1)
         
         # Verify request was made with correct params
@@ -65,15 +71,22 @@ class TestFetchPRList:
         """Verify pagination respects max_pages limit."""
         fetcher = GitHubFetcher(token="test_token")
         
-        # Mock response that always returns PRs with single issue
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.headers = {"X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000"}
-        mock_response.json.return_value = [
-            {"number": 1, "title": "PR", "merged_at": "2025-01-15T10:30:00Z", "body": "Fixes #123"}
-        ]
+        def mock_get_side_effect(*args, **kwargs):
+            """Return PRs on every page, always linking to the next one."""
+            page = kwargs["params"]["page"]
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.headers = {
+                "X-RateLimit-Remaining": "4999",
+                "X-RateLimit-Limit": "5000",
+                "Link": f'<https://api.github.com/repositories/1/pulls?page={page + 1}>; rel="next"'
+            }
+            mock_response.content = orjson.dumps([
+                {"number": 1, "title": "PR", "merged_at": "2025-01-15T10:30:00Z", "body": "Fixes #123"}
+            ])
+            return mock_response
         
-        with patch("requests.get", return_value=mock_response) as mock_get:
+        with patch("requests.Session.get", side_effect=mock_get_side_effect) as mock_get:
             result = fetcher.fetch_pr_list("owner", "repo", max_pages=3)
         
         # Should make exactly 3 requests (max_pages)
@@ -86,36 +99,57 @@ class TestFetchPRList:
         # Verify result has PRs from all 3 pages
         assert len(result) == 3
     
-    def test_fetch_pr_list_pagination_stops_on_empty_response(self):
-        """Verify pagination stops when API returns empty list."""
+    def test_fetch_pr_list_pagination_stops_without_next_link(self):
+        """Verify pagination stops at a page without a "next" link (no empty page fetched)."""
         fetcher = GitHubFetcher(token="test_token")
         
         def mock_get_side_effect(*args, **kwargs):
-            """Return PRs on first page, empty on second."""
-            page = kwargs["params"]["page"]
+            """Return PRs on the first page, with no Link header (single page)."""
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.headers = {"X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000"}
-            
-            if page == 1:
-                mock_response.json.return_value = [
-                    {"number": 1, "title": "PR", "merged_at": "2025-01-15T10:30:00Z", "body": "Fixes #123"}
-                ]
-            else:
-                mock_response.json.return_value = []  # No more PRs
-            
+            mock_response.content = orjson.dumps([
+                {"number": 1, "title": "PR", "merged_at": "2025-01-15T10:30:00Z", "body": "Fixes #123"}
+            ])
             return mock_response
         
-        with patch("requests.get", side_effect=mock_get_side_effect) as mock_get:
+        with patch("requests.Session.get", side_effect=mock_get_side_effect) as mock_get:
             result = fetcher.fetch_pr_list("owner", "repo", max_pages=5)
         
-        # Should make only 2 requests (stops on empty)
-        assert mock_get.call_count == 2
+        # Should make only 1 request (last page has no next link)
+        assert mock_get.call_count == 1
         
         # Should have 1 PR from first page
         assert len(result) == 1
         assert result[0]["number"] == 1
     
+    def test_fetch_pr_list_fetches_linked_pages_concurrently(self):
+        """Verify pages up to the Link header's last page are all fetched (capped by max_pages)."""
+        fetcher = GitHubFetcher(token="test_token")
+        link = (
+            '<https://api.github.com/repositories/1/pulls?state=closed&page=2>; rel="next", '
+            '<https://api.github.com/repositories/1/pulls?state=closed&page=4>; rel="last"'
+        )
+        
+        def mock_get_side_effect(*args, **kwargs):
+            page = kwargs["params"]["page"]
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.headers = {"X-RateLimit-Remaining": "4999", "Link": link}
+            mock_response.content = orjson.dumps([
+                {"number": page, "title": "PR", "merged_at": "2025-01-15T10:30:00Z", "body": ""}
+            ])
+            return mock_response
+        
+        with patch("requests.Session.get", side_effect=mock_get_side_effect) as mock_get:
+            result = fetcher.fetch_pr_list("owner", "repo", max_pages=3)
+        
+        # Stops at max_pages even though the Link header reports 4 pages
+        assert sorted(call[1]["params"]["page"] for call in mock_get.call_args_list) == [1, 2, 3]
+        
+        # Pages are returned in order
+        assert [pr["number"] for pr in result] == [1, 2, 3]
+    
     def test_auth_error_raises_exception(self):
         """Verify 401/403 auth errors raise exceptions."""
         fetcher = GitHubFetcher(token="invalid_token")
@@ -127,7 +161,7 @@ class TestFetchPRList:
         mock_response.text = "Bad credentials"
         mock_response.raise_for_status.side_effect = requests.HTTPError("401 Unauthorized")
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             with pytest.raises(requests.HTTPError):
                 fetcher.fetch_pr_list("owner", "repo", max_pages=1)
         
@@ -135,7 +169,7 @@ class TestFetchPRList:
         mock_response.status_code = 403
         mock_response.raise_for_status.side_effect = requests.HTTPError("403 Forbidden")
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             with pytest.raises(requests.HTTPError):
                 fetcher.fetch_pr_list("owner", "repo", max_pages=1)
     
@@ -146,7 +180,7 @@ class TestFetchPRList:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.headers = {"X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000"}
-        mock_response.json.return_value = [
+        mock_response.content = orjson.dumps([
             {
                 "number": 123,
                 "title": "Test PR",
@@ -155,9 +189,9 @@ class TestFetchPRList:
                 "user": {"login": "testuser"},
                 "labels": [{"name": "bug"}]
             }
-        ]
+        ])
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             result = fetcher.fetch_pr_list("owner", "repo", max_pages=1)
         
         # Should return raw dict, not Pydantic model
@@ -226,7 +260,7 @@ class TestFetchPRFiles:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.headers = {"X-RateLimit-Remaining": "4999"}
-        mock_response.json.return_value = [
+        mock_response.content = orjson.dumps([
             {
                 "filename": "app.py",
                 "status": "modified",
@@ -243,9 +277,9 @@ class TestFetchPRFiles:
                 "changes": 10,
                 "patch": "@@ -0,0 +1,10 @@\n+def test():\n+    pass"
             }
-        ]
+        ])
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             result = fetcher.fetch_pr_files("owner", "repo", 123)
         
         # Check structure
@@ -274,7 +308,7 @@ class TestFetchPRFiles:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.headers = {"X-RateLimit-Remaining": "4999"}
-        mock_response.json.return_value = [
+        mock_response.content = orjson.dumps([
             {
                 "filename": "app.py",
                 "status": "modified",
@@ -296,9 +330,9 @@ class TestFetchPRFiles:
                 "deletions": 0,
                 "patch": "@@ -0,0 +1,10 @@\n+def test():\n+    pass"
             }
-        ]
+        ])
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             result = fetcher.fetch_pr_files("owner", "repo", 123)
         
         # Check summary reflects all files but only non-binaries included
@@ -329,9 +363,9 @@ class TestFetchPRFiles:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.headers = {"X-RateLimit-Remaining": "4999"}
-        mock_response.json.return_value = files
+        mock_response.content = orjson.dumps(files)
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             result = fetcher.fetch_pr_files("owner", "repo", 123)
         
         # Check summary shows all 15 but only 10 included
@@ -358,7 +392,7 @@ class TestFetchPRFiles:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.headers = {"X-RateLimit-Remaining": "4999"}
-        mock_response.json.return_value = [
+        mock_response.content = orjson.dumps([
             {
                 "filename": "large_file.py",
                 "status": "modified",
@@ -366,9 +400,9 @@ class TestFetchPRFiles:
                 "deletions": 0,
                 "patch": long_patch
             }
-        ]
+        ])
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             result = fetcher.fetch_pr_files("owner", "repo", 123)
         
         # File list is NOT truncated (only 1 file, all shown)
@@ -392,7 +426,7 @@ class TestFetchIssue:
         
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "number": 123,
             "title": "Test Issue",
             "body": "Issue description",
@@ -401,9 +435,9 @@ class TestFetchIssue:
             "created_at": "2025-01-01T00:00:00Z",
             "closed_at": "2025-01-02T00:00:00Z",
             "comments": 5
-        }
+        })
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             result = fetcher.fetch_issue("owner", "repo", 123)
         
         assert result is not None
@@ -418,7 +452,7 @@ class TestFetchIssue:
         mock_response = Mock()
         mock_response.status_code = 404
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             result = fetcher.fetch_issue("owner", "repo", 999999)
         
         assert result is None
@@ -431,16 +465,20 @@ class TestFetchIssueComments:
         """Test successfully fetching issue comments."""
         fetcher = GitHubFetcher(token="test_token")
         
-        # Mock to return comments on first page, empty on second (stops pagination)
+        # Mock to return comments on first page (linking to the second), empty on second
         call_count = 0
         def mock_get_side_effect(*args, **kwargs):
             nonlocal call_count
             call_count += 1
             mock_response = Mock()
             mock_response.status_code = 200
+            mock_response.headers = {}
             
             if call_count == 1:
-                mock_response.json.return_value = [
+                mock_response.headers = {
+                    "Link": '<https://api.github.com/repositories/1/issues/123/comments?page=2>; rel="next"'
+                }
+                mock_response.content = orjson.dumps([
                     {
                         "id": 1,
                         "user": {"login": "user1"},
@@ -453,13 +491,13 @@ class TestFetchIssueComments:
                         "body": "Second comment",
                         "created_at": "2025-01-02T00:00:00Z"
                     }
-                ]
+                ])
             else:
-                mock_response.json.return_value = []  # Stop pagination
+                mock_response.content = orjson.dumps([])  # Stop pagination
             
             return mock_response
         
-        with patch("requests.get", side_effect=mock_get_side_effect):
+        with patch("requests.Session.get", side_effect=mock_get_side_effect):
             result = fetcher.fetch_issue_comments("owner", "repo", 123)
         
         assert len(result) == 2
@@ -472,13 +510,43 @@ class TestFetchIssueComments:
         
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = []
+        mock_response.headers = {}
+        mock_response.content = orjson.dumps([])
         
-        with patch("requests.get", return_value=mock_response):
+        with patch("requests.Session.get", return_value=mock_response):
             result = fetcher.fetch_issue_comments("owner", "repo", 123)
         
         assert result == []
 
+    
+    def test_fetch_comments_skips_request_when_count_is_zero(self):
+        """Test that no request is made for an issue known to have no comments."""
+        fetcher = GitHubFetcher(token="test_token")
+        
+        with patch("requests.Session.get") as mock_get:
+            result = fetcher.fetch_issue_comments("owner", "repo", 123, comment_count=0)
+        
+        assert result == []
+        mock_get.assert_not_called()
+    
+    def test_fetch_comments_fetches_known_pages(self):
+        """Test that all pages implied by the comment count are fetched, in order."""
+        fetcher = GitHubFetcher(token="test_token")
+        
+        def mock_get_side_effect(*args, **kwargs):
+            page = kwargs["params"]["page"]
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.headers = {}
+            mock_response.content = orjson.dumps([{"id": page, "body": f"Page {page}"}])
+            return mock_response
+        
+        with patch("requests.Session.get", side_effect=mock_get_side_effect) as mock_get:
+            result = fetcher.fetch_issue_comments("owner", "repo", 123, comment_count=250)
+        
+        # 250 comments = 3 pages, no extra request to find the end
+        assert mock_get.call_count == 3
+        assert [comment["id"] for comment in result] == [1, 2, 3]
 
 class TestTruncatePatch:
     """Tests for _truncate_patch helper method."""
@@ -508,3 +576,132 @@ class TestTruncatePatch:
         assert result_lines[0] == "line 0"
         assert result_lines[99] == "line 99"
         assert "... [TRUNCATED: 50 more lines]" in result_lines[100]
+
+
+class TestEnrichPR:
+    """Tests for enrich_pr orchestration."""
+    
+    def test_enrich_pr_combines_files_issue_and_comments(self):
+        """Test that files (fetched in the background) and issue data are combined."""
+        fetcher = GitHubFetcher(token="test_token")
+        files = {"files": [], "summary": {"files_included": 0}}
+        issue = {"number": 42, "title": "Bug"}
+        comments = [{"id": 1, "body": "Confirmed"}]
+        
+        with patch.object(fetcher, "fetch_pr_files", return_value=files) as mock_files, \
+             patch.object(fetcher, "fetch_issue", return_value=issue) as mock_issue, \
+             patch.object(fetcher, "fetch_issue_comments", return_value=comments):
+            result = fetcher.enrich_pr("owner", "repo", 7, "Fixes #42")
+        
+        mock_files.assert_called_once_with("owner", "repo", 7)
+        mock_issue.assert_called_once_with("owner", "repo", 42)
+        assert result == {"files": files, "linked_issue": issue, "issue_comments": comments}
+    
+    def test_enrich_pr_propagates_file_errors(self):
+        """Test that an error fetching files in the background is raised."""
+        fetcher = GitHubFetcher(token="test_token")
+        
+        with patch.object(fetcher, "fetch_pr_files", side_effect=requests.HTTPError("boom")):
+            with pytest.raises(requests.HTTPError):
+                fetcher.enrich_pr("owner", "repo", 7, "No linked issue")
+    
+    def test_enrich_pr_reuses_issue_linked_by_another_pr(self):
+        """Test that an issue linked by two PRs is fetched once."""
+        fetcher = GitHubFetcher(token="test_token")
+        files = {"files": [], "summary": {"files_included": 0}}
+        issue = {"number": 42, "title": "Bug", "comments": 1}
+        comments = [{"id": 1, "body": "Confirmed"}]
+        
+        with patch.object(fetcher, "fetch_pr_files", return_value=files), \
+             patch.object(fetcher, "fetch_issue", return_value=issue) as mock_issue, \
+             patch.object(fetcher, "fetch_issue_comments", return_value=comments) as mock_comments:
+            first = fetcher.enrich_pr("owner", "repo", 7, "Fixes #42")
+            second = fetcher.enrich_pr("owner", "repo", 8, "Closes #42")
+        
+        mock_issue.assert_called_once_with("owner", "repo", 42)
+        mock_comments.assert_called_once()
+        assert first["linked_issue"] == second["linked_issue"] == issue
+        assert second["issue_comments"] == comments
+
+
+class TestRateLimit:
+    """Tests for proactive rate limit handling."""
+    
+    def _response(self, status_code, headers):
+        response = Mock()
+        response.status_code = status_code
+        response.headers = headers
+        response.content = orjson.dumps([])
+        return response
+    
+    def test_waits_for_reset_when_remaining_is_low(self):
+        """Test that requests pause until the reset once the reserve is reached."""
+        fetcher = GitHubFetcher(token="test_token")
+        reset = int(time.time()) + 30
+        low = self._response(200, {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(reset)})
+        
+        with patch("requests.Session.get", return_value=low), \
+             patch("fetchers.github.time.sleep") as mock_sleep:
+            fetcher._make_github_request("https://api.github.com/a")
+            mock_sleep.assert_not_called()
+            fetcher._make_github_request("https://api.github.com/b")
+        
+        mock_sleep.assert_called_once()
+        assert 25 < mock_sleep.call_args[0][0] <= 32
+    
+    def test_secondary_limit_honors_retry_after(self):
+        """Test that a 403 with Retry-After is retried after that many seconds."""
+        fetcher = GitHubFetcher(token="test_token")
+        limited = self._response(403, {"Retry-After": "7"})
+        ok = self._response(200, {})
+        
+        with patch("requests.Session.get", side_effect=[limited, ok]) as mock_get, \
+             patch("fetchers.github.time.sleep") as mock_sleep:
+            response = fetcher._make_github_request("https://api.github.com/a")
+        
+        assert response is ok
+        assert mock_get.call_count == 2
+        mock_sleep.assert_called_once_with(7)
+    
+    def test_plain_403_is_returned(self):
+        """Test that a 403 without rate limit headers is not retried."""
+        fetcher = GitHubFetcher(token="test_token")
+        forbidden = self._response(403, {"X-RateLimit-Remaining": "4000"})
+        
+        with patch("requests.Session.get", return_value=forbidden) as mock_get:
+            assert fetcher._make_github_request("https://api.github.com/a") is forbidden
+        
+        assert mock_get.call_count == 1
+
+
+class TestResponseCache:
+    """Tests for conditional requests with a response cache."""
+    
+    def test_not_modified_is_served_from_cache(self, tmp_path):
+        """Test that the stored ETag is sent and a 304 returns the cached body."""
+        fetcher = GitHubFetcher(token="test_token", cache=ResponseCache(tmp_path))
+        
+        fresh = requests.Response()
+        fresh.status_code = 200
+        fresh.headers.update({"ETag": '"abc"', "Link": '<https://api.github.com/x?page=2>; rel="last"'})
+        fresh._content = b'[{"number": 1}]'
+        
+        not_modified = requests.Response()
+        not_modified.status_code = 304
+        not_modified.headers.update({"X-RateLimit-Remaining": "4998", "Content-Length": "0"})
+        not_modified._content = b""
+        
+        url = "https://api.github.com/repos/owner/repo/pulls"
+        with patch("requests.Session.get", side_effect=[fresh, not_modified]) as mock_get:
+            fetcher._make_github_request(url, params={"page": 1})
+            response = fetcher._make_github_request(url, params={"page": 1})
+        
+        assert mock_get.call_args_list[0][1]["headers"] is None
+        assert mock_get.call_args_list[1][1]["headers"]["If-None-Match"] == '"abc"'
+        assert response is not not_modified
+        assert response.status_code == 200
+        assert response.json() == [{"number": 1}]
+        assert "rel=\"last\"" in response.headers["Link"]
+        assert response.headers["ETag"] == '"abc"'
+        assert response.headers["Content-Length"] == str(len(b'[{"number": 1}]'))
+        assert response.headers["X-RateLimit-Remaining"] == "4998"
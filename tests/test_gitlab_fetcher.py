@@ -0,0 +1,76 @@
+"""Tests for GitLab fetcher file normalization."""
+
+from unittest.mock import Mock, patch
+
+from fetchers.gitlab import GitLabFetcher, count_diff_lines, normalize_gitlab_file
+
+
+class TestNormalizeGitLabFile:
+    """Tests for normalize_gitlab_file."""
+
+    def test_normalizes_to_github_shape(self):
+        """Test that GitLab files are converted to GitHub shape with diff line counts."""
+        file = normalize_gitlab_file({
+            "new_path": "app/models/ci.rb",
+            "old_path": "app/models/ci.rb",
+            "new_file": False,
+            "diff": "--- a/app/models/ci.rb\n+++ b/app/models/ci.rb\n@@ -1,3 +1,4 @@\n context\n-old\n+new\n+added"
+        })
+
+        assert file["filename"] == "app/models/ci.rb"
+        assert file["status"] == "modified"
+        assert file["additions"] == 2
+        assert file["deletions"] == 1
+        assert file["changes"] == 3
+        assert file["patch"].startswith("--- a/app/models/ci.rb")
+        assert file["patch_truncated"] == False
+
+    def test_prefers_stored_counts(self):
+        """Test that stored additions/deletions are used instead of re-parsing the diff."""
+        file = normalize_gitlab_file({
+            "new_path": "big.rb",
+            "diff": "+only\n+two lines kept after truncation",
+            "additions": 250,
+            "deletions": 40
+        })
+
+        assert (file["additions"], file["deletions"], file["changes"]) == (250, 40, 290)
+
+    def test_github_shape_unchanged(self):
+        """Test that files already in GitHub shape pass through."""
+        github_file = {"filename": "app.py", "patch": "+x", "additions": 1, "deletions": 0}
+
+        assert normalize_gitlab_file(github_file) is github_file
+
+    def test_count_diff_lines_first_line(self):
+        """Test that a change on the first line is counted."""
+        assert count_diff_lines("-old\n+new") == (1, 1)
+        assert count_diff_lines("") == (0, 0)
+
+
+class TestFetchMRDiffs:
+    """Tests for fetch_mr_diffs method."""
+
+    def test_counts_full_diff_before_truncating(self):
+        """Test files are stored normalized, with counts from the untruncated diff."""
+        fetcher = GitLabFetcher(token="test_token")
+
+        long_diff = "@@ -1,0 +1,150 @@\n" + "\n".join(f"+line {i}" for i in range(150))
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.json.return_value = [
+            {"old_path": "a.rb", "new_path": "a.rb", "new_file": True, "diff": long_diff},
+            {"old_path": "logo.png", "new_path": "logo.png", "diff": ""},
+        ]
+
+        with patch("requests.get", return_value=mock_response):
+            result = fetcher.fetch_mr_diffs("gitlab-org", "gitlab", 1)
+
+        assert result["summary"]["files_included"] == 1
+        file = result["files"][0]
+        assert file["filename"] == "a.rb"
+        assert file["status"] == "added"
+        assert file["additions"] == 150
+        assert file["patch_truncated"] == True
+        assert "new_path" not in file
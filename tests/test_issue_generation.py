@@ -7,10 +7,12 @@ These tests verify:
 3. Issue generation endpoints work correctly
 """
 
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock, Mock
+from unittest.mock import patch, AsyncMock, MagicMock, Mock
 from fastapi.testclient import TestClient
-from classifier.prompt_template import ISSUE_GENERATION_PROMPT
+from classifier.prompt_template import ISSUE_GENERATION_PROMPT, build_issue_generation_prompt
 
 
 @pytest.fixture
@@ -27,6 +29,11 @@ def client(mock_supabase):
     # Patch the supabase client in the routes module
     with patch('backend.routes.supabase', mock_supabase):
         from backend.app import app
+        from backend.routes import _PR_CACHE, _PAYLOAD_CACHE, _RESPONSE_CACHE, _get_llm_client
+        _PR_CACHE.clear()
+        _PAYLOAD_CACHE.clear()
+        _RESPONSE_CACHE.clear()
+        _get_llm_client.cache_clear()
         with TestClient(app) as test_client:
             yield test_client
 
@@ -76,6 +83,9 @@ class TestIssueGenerationPrompt:
         assert sample_classification in result
         assert "{pr_context}" not in result  # Should be replaced
         assert "{classification_info}" not in result  # Should be replaced
+
+        # Pre-split builder must match str.format exactly
+        assert build_issue_generation_prompt(sample_pr_context, sample_classification) == result
     
     def test_issue_generation_prompt_structure(self):
         """Verify prompt includes key sections and instructions."""
@@ -220,7 +230,7 @@ class TestIssueGenerationEndpoints:
         
         # Mock LLM response
         mock_llm_instance = MagicMock()
-        mock_llm_instance.generate_issue.return_value = "# Fix Button Overflow\n\n## Motivation\n..."
+        mock_llm_instance.generate_issue_async = AsyncMock(return_value="# Fix Button Overflow\n\n## Motivation\n...")
         mock_llm_class.return_value = mock_llm_instance
         
         # Make request
@@ -234,7 +244,7 @@ class TestIssueGenerationEndpoints:
         assert "# Fix Button Overflow" in data["issue_markdown"]
         
         # Verify LLM was called
-        mock_llm_instance.generate_issue.assert_called_once()
+        mock_llm_instance.generate_issue_async.assert_awaited_once()
     
     @patch("backend.routes.LLMClient")
     def test_generate_issue_endpoint_with_custom_prompt(self, mock_llm_class, client, mock_supabase):
@@ -257,7 +267,7 @@ class TestIssueGenerationEndpoints:
         
         # Mock LLM response
         mock_llm_instance = MagicMock()
-        mock_llm_instance.generate_issue.return_value = "# Custom Issue\n..."
+        mock_llm_instance.generate_issue_async = AsyncMock(return_value="# Custom Issue\n...")
         mock_llm_class.return_value = mock_llm_instance
         
         # Make request with custom prompt
@@ -271,10 +281,185 @@ class TestIssueGenerationEndpoints:
         assert response.status_code == 200
         
         # Verify LLM was called (custom prompt should be used)
-        mock_llm_instance.generate_issue.assert_called_once()
-        call_args = mock_llm_instance.generate_issue.call_args[0][0]
+        mock_llm_instance.generate_issue_async.assert_awaited_once()
+        call_args = mock_llm_instance.generate_issue_async.call_args[0][0]
         assert "Custom prompt:" in call_args
     
+    @patch("backend.routes.LLMClient")
+    def test_generate_issue_save_failure_still_returns_issue(self, mock_llm_class, client, mock_supabase):
+        """Test that the DB write runs after the response and its failure isn't an error."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1, "repo": "test/repo", "pr_number": 123, "title": "Fix", "body": None
+        }
+        mock_supabase.client.table.return_value.update.side_effect = Exception("connection reset")
+        mock_llm_instance = MagicMock()
+        mock_llm_instance.generate_issue_async = AsyncMock(return_value="# Issue")
+        mock_llm_class.return_value = mock_llm_instance
+
+        response = client.post("/api/prs/test/repo/123/generate-issue")
+
+        assert response.status_code == 200
+        assert response.json()["issue_markdown"] == "# Issue"
+        mock_supabase.client.table.return_value.update.assert_called_once()
+
+    @patch("backend.routes.LLMClient")
+    def test_generate_issue_token_budget(self, mock_llm_class, client, mock_supabase):
+        """Test the default 4096-token budget and a per-request override."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1, "repo": "test/repo", "pr_number": 123, "title": "Fix", "body": None
+        }
+        mock_llm_instance = MagicMock()
+        mock_llm_instance.generate_issue_async = AsyncMock(return_value="# Issue")
+        mock_llm_class.return_value = mock_llm_instance
+        
+        client.post("/api/prs/test/repo/123/generate-issue")
+        client.post("/api/prs/test/repo/123/generate-issue", json={"max_tokens": 8000})
+        
+        budgets = [c.kwargs["max_tokens"] for c in mock_llm_instance.generate_issue_async.await_args_list]
+        assert budgets == [4096, 8000]
+        assert mock_llm_class.call_args.kwargs["max_tokens"] == 4096
+    
+    @patch("backend.routes.LLMClient")
+    def test_generate_issue_reuses_context_from_preview(self, mock_llm_class, client, mock_supabase):
+        """Test that generating after the /context preview doesn't rebuild the PR context."""
+        from classifier.context_builder import build_pr_context
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1, "repo": "test/repo", "pr_number": 123, "title": "Fix", "body": None
+        }
+        mock_llm_instance = MagicMock()
+        mock_llm_instance.generate_issue_async = AsyncMock(return_value="# Issue")
+        mock_llm_class.return_value = mock_llm_instance
+        
+        with patch("backend.routes.build_pr_context", wraps=build_pr_context) as spy:
+            preview = client.get("/api/prs/test/repo/123/context").json()
+            client.post("/api/prs/test/repo/123/generate-issue")
+        
+        assert spy.call_count == 1
+        prompt = mock_llm_instance.generate_issue_async.call_args[0][0]
+        assert preview["pr_context"] in prompt
+    
+    @patch("backend.routes.LLMClient")
+    def test_generate_issue_reuses_llm_client(self, mock_llm_class, client, mock_supabase):
+        """Test that repeated generations share one LLMClient."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1,
+            "repo": "test/repo",
+            "pr_number": 123,
+            "title": "Fix button overflow",
+            "body": None
+        }
+        mock_llm_instance = MagicMock()
+        mock_llm_instance.generate_issue_async = AsyncMock(return_value="# Issue")
+        mock_llm_class.return_value = mock_llm_instance
+        
+        client.post("/api/prs/test/repo/123/generate-issue")
+        client.post("/api/prs/test/repo/123/generate-issue")
+        
+        assert mock_llm_class.call_count == 1
+        assert mock_llm_instance.generate_issue_async.await_count == 2
+    
+    @patch("backend.routes.LLMClient")
+    def test_generate_issue_invalidates_cached_pr(self, mock_llm_class, client, mock_supabase):
+        """Test that a freshly generated issue is visible through the cached read path."""
+        mock_pr = {"id": 1, "repo": "test/repo", "pr_number": 123, "title": "Fix", "body": None}
+        mock_supabase.get_pr_by_number.return_value = mock_pr
+        mock_llm_instance = MagicMock()
+        mock_llm_instance.generate_issue_async = AsyncMock(return_value="# Issue")
+        mock_llm_class.return_value = mock_llm_instance
+        
+        assert client.get("/api/prs/test/repo/123/generated-issue").status_code == 404
+        client.post("/api/prs/test/repo/123/generate-issue")
+        assert mock_supabase.get_pr_by_number.call_count == 1
+        
+        mock_supabase.get_pr_by_number.return_value = {
+            **mock_pr,
+            "generated_issue": "# Issue",
+            "issue_generated_at": "2025-10-11T10:30:00Z"
+        }
+        response = client.get("/api/prs/test/repo/123/generated-issue")
+        
+        assert response.status_code == 200
+        assert response.json()["issue_markdown"] == "# Issue"
+        assert mock_supabase.get_pr_by_number.call_count == 2
+    
+    @patch("backend.routes.LLMClient")
+    def test_generate_issue_stream(self, mock_llm_class, client, mock_supabase):
+        """Test POST /api/prs/{repo}/{pr_number}/generate-issue/stream streams and saves."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1, "repo": "test/repo", "pr_number": 123, "title": "Fix", "body": None
+        }
+
+        async def fake_stream(prompt, max_tokens=None):
+            for delta in ["# Fix ", "Button", " Overflow"]:
+                yield delta
+
+        mock_llm_instance = MagicMock()
+        mock_llm_instance.stream_issue = fake_stream
+        mock_llm_class.return_value = mock_llm_instance
+
+        response = client.post("/api/prs/test/repo/123/generate-issue/stream")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        # First delta goes out alone; the rest arrive together and are coalesced
+        assert response.text.count('data: {"delta"') == 2
+        assert 'data: {"delta":"# Fix "}' in response.text
+        assert "event: done" in response.text
+
+        # Full markdown is saved once the stream finishes
+        update_payload = mock_supabase.client.table.return_value.update.call_args[0][0]
+        assert update_payload["generated_issue"] == "# Fix Button Overflow"
+
+    @patch("backend.routes.LLMClient")
+    def test_generate_issue_stream_error_not_saved(self, mock_llm_class, client, mock_supabase):
+        """Test that a failed stream reports an error event and saves nothing."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1, "repo": "test/repo", "pr_number": 123, "title": "Fix", "body": None
+        }
+
+        async def failing_stream(prompt, max_tokens=None):
+            yield "# Partial"
+            raise RuntimeError("rate limited")
+
+        mock_llm_instance = MagicMock()
+        mock_llm_instance.stream_issue = failing_stream
+        mock_llm_class.return_value = mock_llm_instance
+
+        response = client.post("/api/prs/test/repo/123/generate-issue/stream")
+
+        assert "event: error" in response.text
+        assert "rate limited" in response.text
+        mock_supabase.client.table.return_value.update.assert_not_called()
+
+    def test_generate_issue_stream_bad_template(self, client, mock_supabase):
+        """Test that a prompt that can't be built returns a 500 with a detail."""
+        mock_supabase.get_pr_by_number.return_value = {
+            "id": 1, "repo": "test/repo", "pr_number": 123, "title": "Fix", "body": None
+        }
+
+        response = client.post(
+            "/api/prs/test/repo/123/generate-issue/stream",
+            json={"custom_prompt_template": "Write an issue for {unknown_placeholder}"}
+        )
+
+        assert response.status_code == 500
+        assert response.json()["detail"].startswith("Failed to generate issue:")
+
+    def test_coalesce_deltas_flushes_on_pause(self):
+        """Test buffered deltas are sent once the LLM pauses past the flush delay."""
+        from backend.routes import _coalesce_deltas
+
+        async def deltas():
+            for delta in ["a", "b", "c"]:
+                yield delta
+            await asyncio.sleep(0.1)
+            yield "d"
+
+        async def collect():
+            return [chunk async for chunk in _coalesce_deltas(deltas(), max_delay=0.01)]
+
+        assert asyncio.run(collect()) == ["a", "bc", "d"]
+
     def test_generate_issue_endpoint_404(self, client, mock_supabase):
         """Test POST /api/prs/{repo}/{pr_number}/generate-issue when PR not found."""
         mock_supabase.get_pr_by_number.return_value = None
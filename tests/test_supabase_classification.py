@@ -6,7 +6,12 @@ These tests use mocking to avoid requiring a real database connection.
 
 import pytest
 from unittest.mock import Mock, MagicMock
-from storage.supabase_client import SupabaseClient
+from storage.supabase_client import (
+    HTTP_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    SupabaseClient,
+    _build_http_client,
+)
 
 
 class TestSupabaseClassificationMethods:
@@ -124,6 +129,8 @@ class TestSupabaseClassificationMethods:
         assert call_args["task_clarity"] == "clear"
         assert call_args["categories"] == ["feature", "api"]
         assert "classified_at" in call_args
+        assert call_args["classification_info"].startswith("Difficulty: medium\n")
+        assert "Categories: feature, api" in call_args["classification_info"]
     
     def test_get_classification_stats(self):
         """Test getting classification statistics."""
@@ -164,3 +171,14 @@ class TestSupabaseClassificationMethods:
         assert stats["by_onboarding"]["excellent"] == 3
         assert stats["by_onboarding"]["poor"] == 2
 
+
+class TestHTTPClient:
+    """Tests for the pooled HTTP client passed to supabase-py."""
+    
+    def test_pool_uses_keepalive_settings(self):
+        """Keep-alive limits must reach the transport's pool (httpx ignores client limits with a transport)."""
+        pool = _build_http_client()._transport._pool
+        
+        assert pool._keepalive_expiry == HTTP_KEEPALIVE_EXPIRY
+        assert pool._max_keepalive_connections == HTTP_KEEPALIVE_CONNECTIONS
+        assert pool._http2
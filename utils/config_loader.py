@@ -2,6 +2,7 @@
 
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 from pydantic import ValidationError
@@ -9,6 +10,7 @@ from pydantic import ValidationError
 from models.config_models import Config, CredentialsConfig
 
 
+@lru_cache(maxsize=1)
 def load_config() -> Config:
     """
     Load and validate configuration from environment variables.
@@ -16,6 +18,10 @@ def load_config() -> Config:
     Reads from .env file in the project root and validates all required
     credentials and settings using Pydantic models.
     
+    The result is cached for the life of the process, so every caller gets the
+    same Config instance. Call load_config.cache_clear() to re-read the
+    environment (tests do this between cases).
+    
     Returns:
         Config: Validated configuration object
         
@@ -34,8 +40,18 @@ def load_config() -> Config:
                 supabase_url=os.getenv("SUPABASE_URL", ""),
                 supabase_key=os.getenv("SUPABASE_KEY", ""),
                 database_url=os.getenv("DATABASE_URL"),
+                github_cache_dir=os.getenv("GITHUB_CACHE_DIR", ".cache/github"),
                 anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
                 openai_api_key=os.getenv("OPENAI_API_KEY"),
+                llm_small_model=os.getenv("LLM_SMALL_MODEL") or None,
+                llm_max_concurrency=os.getenv("LLM_MAX_CONCURRENCY", 50),
+                llm_max_connections=os.getenv("LLM_MAX_CONNECTIONS", 100),
+                llm_json_mode=os.getenv("LLM_JSON_MODE", True),
+                llm_cache_dir=os.getenv("LLM_CACHE_DIR", ".cache/llm"),
+                llm_max_retries=os.getenv("LLM_MAX_RETRIES", 6),
+                llm_requests_per_minute=os.getenv("LLM_REQUESTS_PER_MINUTE") or None,
+                llm_semantic_cache_threshold=os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD") or None,
+                llm_prewarm=os.getenv("LLM_PREWARM", True),
             ),
             log_level=os.getenv("LOG_LEVEL", "INFO"),
         )